@@ -0,0 +1,75 @@
+import asyncio
+import threading
+from typing import Generic, NamedTuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SlotStats(NamedTuple):
+    generation: int
+    waiting: int
+
+
+class LatestFrameSlot(Generic[T]):
+    """
+    Holds the newest frame the render loop published for every WebRTC track to read.
+
+    The render loop is the only producer. Each publish replaces the frame and bumps the
+    generation, so a reader can tell a new frame from one it already sent; frames are
+    never queued, a slow reader just skips generations. latest() reads one attribute
+    and never waits. Readers on an asyncio loop in another thread can await a newer
+    generation with wait_newer(), which the producer wakes with call_soon_threadsafe.
+    """
+
+    def __init__(self):
+        # (generation, frame), replaced as a whole so latest() needs no lock
+        self._latest: tuple[int, T] | None = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future[None]]] = []
+
+    def publish(self, frame: T) -> int:
+        """Replace the frame and return its generation."""
+        with self._lock:
+            self._generation += 1
+            self._latest = (self._generation, frame)
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+        return self._generation
+
+    def latest(self) -> tuple[int, T] | None:
+        """The newest (generation, frame), None before the first publish."""
+        return self._latest
+
+    async def wait_newer(self, generation: int, timeout: float | None = None) -> tuple[int, T] | None:
+        """Wait up to timeout seconds for a frame newer than generation. None if there is none by then."""
+        latest = self._latest
+        if latest is not None and latest[0] > generation:
+            return latest
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[None] = loop.create_future()
+        with self._lock:
+            latest = self._latest
+            if latest is not None and latest[0] > generation:
+                return latest
+            self._waiters.append((loop, future))
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                if (loop, future) in self._waiters:
+                    self._waiters.remove((loop, future))
+        latest = self._latest
+        if latest is not None and latest[0] > generation:
+            return latest
+        return None
+
+    def stats(self) -> SlotStats:
+        with self._lock:
+            return SlotStats(generation=self._generation, waiting=len(self._waiters))
+
+
+def _resolve(future: asyncio.Future[None]):
+    if not future.done():
+        future.set_result(None)
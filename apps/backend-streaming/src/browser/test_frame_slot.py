@@ -0,0 +1,51 @@
+import asyncio
+import threading
+import unittest
+
+from browser.frame_slot import LatestFrameSlot
+
+
+class TestLatestFrameSlot(unittest.TestCase):
+    def test_latest_keeps_only_the_newest_frame(self):
+        slot = LatestFrameSlot[str]()
+        self.assertIsNone(slot.latest())
+
+        self.assertEqual(slot.publish("a"), 1)
+        self.assertEqual(slot.publish("b"), 2)
+
+        self.assertEqual(slot.latest(), (2, "b"))
+        self.assertEqual(slot.latest(), (2, "b"))
+
+    def test_wait_newer_returns_a_newer_frame_at_once(self):
+        slot = LatestFrameSlot[str]()
+        slot.publish("a")
+
+        self.assertEqual(asyncio.run(slot.wait_newer(0, timeout=0)), (1, "a"))
+
+    def test_wait_newer_times_out_without_a_newer_frame(self):
+        slot = LatestFrameSlot[str]()
+        slot.publish("a")
+
+        self.assertIsNone(asyncio.run(slot.wait_newer(1, timeout=0.01)))
+        self.assertEqual(slot.stats().waiting, 0)
+
+    def test_publish_from_another_thread_wakes_all_readers(self):
+        slot = LatestFrameSlot[str]()
+        slot.publish("a")
+
+        async def read_twice():
+            readers = [asyncio.create_task(slot.wait_newer(1, timeout=1)) for _ in range(2)]
+            while slot.stats().waiting < 2:
+                await asyncio.sleep(0)
+            producer = threading.Thread(target=slot.publish, args=("b",))
+            producer.start()
+            results = await asyncio.gather(*readers)
+            producer.join(timeout=1)
+            return results
+
+        self.assertEqual(asyncio.run(read_twice()), [(2, "b"), (2, "b")])
+        self.assertEqual(slot.stats(), (2, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,6 @@
 import asyncio
 import os
 import numpy as np
-from PIL import Image
 from performance.fps_counter import FPSCounter
 from aiortc import RTCPeerConnection, RTCSessionDescription, VideoStreamTrack, RTCConfiguration, RTCIceServer
 from aiohttp import web
@@ -9,50 +8,46 @@ from aiohttp_cors import setup as cors_setup, ResourceOptions
 import av # PyAV is used by aiortc for encoding
 from core.state import GlobalState
 from core.shutdown import is_shutdown_requested
+from browser.frame_slot import LatestFrameSlot
+from rendering.yuv.converter import copy_video_frame
+
+# Seconds between shutdown checks while a track waits for a frame
+SHUTDOWN_POLL_INTERVAL = 0.1
 
 # --- aiortc Video Track ---
 class WgpuVideoStreamTrack(VideoStreamTrack):
-    """A video track that streams frames from our WGPU renderer."""
+    """
+    A video track that streams the frames the render loop publishes.
+
+    All tracks read the same LatestFrameSlot, so another peer costs no rendering,
+    readback or conversion. recv() never touches the GPU; it waits on the event loop
+    for a frame newer than the last one it returned. The encoders modify the frames
+    they get (pict_type), so every track returns its own copy of the shared frame.
+    """
     def __init__(self, state: GlobalState):
         super().__init__()
         if state.console is None:
             raise ValueError("Console is not initialized")
+        if state.video_frame_slot is None:
+            raise ValueError("Video frame slot is not initialized")
         self.state = state
         self.fps_counter = FPSCounter(console=state.console, name="WebRTCStream")
         self.fps_counter.start()
         self.state.console.log(f"Initialized WgpuVideoStreamTrack")
-        self.last_frame = None
+        self.generation = 0
 
     async def recv(self):
-        # Check if shutdown was requested
-        if is_shutdown_requested():
-            return None
-            
-        pts, time_base = await self.next_timestamp()
-
-        # Get the latest rendered frame
-        frame_data = self.state.renderer.draw_frame()
-
-        if frame_data is None:
-            return self.last_frame
-
-        # Create a PyAV VideoFrame and convert RGBA to YUV420P for WebRTC
-        rgba_frame = av.VideoFrame.from_ndarray(frame_data, format="rgba")
-        rgba_frame.pts = pts
-        rgba_frame.time_base = time_base
-
-        frame = rgba_frame.reformat(
-            format="yuv420p",
-            dst_color_range=1,
-            dst_colorspace=1,
-            interpolation=Image.Resampling.LANCZOS,
-            width=rgba_frame.width,
-            height=rgba_frame.height,
-        )
+        # Paces the track, the published frames carry the render loop's timestamps
+        await self.next_timestamp()
 
-        self.fps_counter.increment()
-        self.last_frame = frame
-        return frame
+        while not is_shutdown_requested():
+            latest = await self.state.video_frame_slot.wait_newer(self.generation, timeout=SHUTDOWN_POLL_INTERVAL)
+            if latest is None:
+                continue
+            self.generation, frame = latest
+            self.fps_counter.increment()
+            return copy_video_frame(frame)
+        return None
 
 class WebRTCServer:
     """WebRTC server for streaming video and handling signaling."""
@@ -287,6 +282,7 @@ class WebRTCServer:
             await runner.cleanup()
 
 def init_webrtc(state: GlobalState):
+    state.set_video_frame_slot(LatestFrameSlot())
     webrtc_server = WebRTCServer(state)
     state.set_webrtc_server(webrtc_server)
 
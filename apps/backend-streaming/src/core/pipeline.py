@@ -2,7 +2,7 @@ from core.state import GlobalState
 from streaming.camera import start_camera_streams
 from ui.canvas import init_canvas
 from rendering.init import init_grid_renderer, init_pointcloud_transformer, init_wgpu
-from rendering.init import init_pointcloud_renderer
+from rendering.init import init_pointcloud_renderer, init_point_culler
 from rendering.init import init_depth_processor
 from tetris_buffer.init import init_tetris_buffer
 from streaming.camera_descriptions import init_camera_descriptions
@@ -28,6 +28,7 @@ def init_pipeline(state: GlobalState):
     init_depth_processor(state)
     init_pointcloud_transformer(state)
     init_pointcloud_renderer(state)
+    init_point_culler(state)
     init_webrtc(state)
     init_tetris_buffer(state)
 
@@ -6,17 +6,25 @@ from rendering.grid.renderer import GridRenderer, GridRendererOptions
 from wgpu import GPUDevice, GPUCanvasContext
 from rendering.pointcloud.renderer import PointCloudRenderer, PointCloudRendererOptions
 from rendering.depth2points.processor import DepthProcessor
+from rendering.depth2points.lod import LodSelector
+from rendering.culling.culler import PointCuller, PointCullerOptions
+from rendering.readback import FrameReadback
+from rendering.yuv.converter import YuvConverter
+from browser.frame_slot import LatestFrameSlot
 from typing import TYPE_CHECKING
-from typing import Literal, Any
+from typing import Literal, Any, Callable
 from tetris_buffer import TetrisEngine
-from queue import Queue
+from tetris_buffer.row_channel import DisplayRow, RowChannel, RowDeliveryPolicy
 from typing import Tuple
 import numpy as np
 from streaming.zenoh_cdr import CameraSensor
+from streaming.ingest_queue import IngestQueue, QueuePolicy
 
 RenderMethod = Literal["onscreen", "webrtc"]
+DecoderBackend = Literal["thread", "process"]
 
 if TYPE_CHECKING:
+    import av
     from rendering.renderer import Renderer
     from browser.camera import RemoteCamera
     from browser.webrtc import WebRTCServer
@@ -39,16 +47,46 @@ class GlobalState:
         self.context: GPUCanvasContext | None = None
         self.render_format: str | None = None
         self.renderer: "Renderer | None" = None
+        # Read frames back through persistent staging buffers instead of canvas.draw()
+        self.persistent_readback: bool = False
+        self.frame_readback: FrameReadback | None = None
+        # Convert the frame to YUV 4:2:0 on the GPU and read back the planes, needs persistent_readback
+        self.gpu_yuv_conversion: bool = False
+        self.yuv_converter: YuvConverter | None = None
         self.camera_streams: list[tuple[Subscriber, Subscriber]] | None = None
+        self.ingest_policy: QueuePolicy = "drop_oldest"
+        self.decoder_backend: DecoderBackend = "thread"
+        self.ingest_queues: list[IngestQueue[Any]] | None = None
+        # Per tetris buffer index, hands a frame back to the decoder that produced it
+        self.frame_releasers: dict[int, Callable[[np.ndarray], None]] = {}
         self.grid_renderer: GridRenderer | None = None
         self.grid_options: GridRendererOptions | None = None
         self.pointcloud_transformer: PointcloudTransformer | None = None
+        # The depth processor writes world-space points and no transformer is created
+        self.fused_depth_to_world: bool = False
+        # All depth cameras in one texture array and one dispatch, needs fused_depth_to_world
+        self.batched_depth_processing: bool = False
+        # Compact away zero-depth pixels on the GPU and draw the rest indirectly
+        self.drop_invalid_points: bool = False
+        # Subsample the depth grids by the projected point footprint, needs drop_invalid_points
+        self.point_lod: bool = False
+        self.lod_selector: LodSelector | None = None
         self.pointcloud_renderer: PointCloudRenderer | None = None
         self.pointcloud_options: PointCloudRendererOptions | None = None
+        # Culling is off while the options are None
+        self.culling_options: PointCullerOptions | None = None
+        self.point_culler: PointCuller | None = None
         self.depth_processor: DepthProcessor | None = None
         self.webrtc_server: "WebRTCServer | None" = None
+        # Newest VideoFrame of the render loop, shared by all WebRTC tracks
+        self.video_frame_slot: "LatestFrameSlot[av.VideoFrame] | None" = None
         self.tetris_buffer: TetrisEngine[Any] | None = None
-        self.display_queues: Queue[list[np.ndarray]] = Queue(maxsize=10)
+        self.row_delivery_policy: RowDeliveryPolicy = "coalesce_to_latest"
+        self.adaptive_index_delta: bool = False
+        # Partial rows are off while the deadline is None
+        self.partial_row_deadline_ns: int | None = None
+        self.staleness_budget_ns: int = 0
+        self.display_rows: RowChannel[DisplayRow] | None = None
         self.depth_xylt = None
         self.render_loop: RenderLoop | None = None
         # Shutdown flag for graceful termination
@@ -90,6 +128,27 @@ class GlobalState:
     def set_pointcloud_options(self, pointcloud_options: PointCloudRendererOptions):
         self.pointcloud_options = pointcloud_options
 
+    def set_culling_options(self, culling_options: PointCullerOptions | None):
+        self.culling_options = culling_options
+
+    def set_point_culler(self, point_culler: PointCuller):
+        self.point_culler = point_culler
+
+    def set_fused_depth_to_world(self, fused_depth_to_world: bool):
+        self.fused_depth_to_world = fused_depth_to_world
+
+    def set_batched_depth_processing(self, batched_depth_processing: bool):
+        self.batched_depth_processing = batched_depth_processing
+
+    def set_drop_invalid_points(self, drop_invalid_points: bool):
+        self.drop_invalid_points = drop_invalid_points
+
+    def set_point_lod(self, point_lod: bool):
+        self.point_lod = point_lod
+
+    def set_lod_selector(self, lod_selector: LodSelector):
+        self.lod_selector = lod_selector
+
     def set_depth_processor(self, depth_processor: DepthProcessor):
         self.depth_processor = depth_processor
 
@@ -107,6 +166,18 @@ class GlobalState:
 
     def set_renderer(self, renderer: "Renderer"):
         self.renderer = renderer
+
+    def set_persistent_readback(self, persistent_readback: bool):
+        self.persistent_readback = persistent_readback
+
+    def set_frame_readback(self, frame_readback: FrameReadback):
+        self.frame_readback = frame_readback
+
+    def set_gpu_yuv_conversion(self, gpu_yuv_conversion: bool):
+        self.gpu_yuv_conversion = gpu_yuv_conversion
+
+    def set_yuv_converter(self, yuv_converter: YuvConverter):
+        self.yuv_converter = yuv_converter
     
     def set_device(self, device: GPUDevice):
         self.device = device
@@ -114,12 +185,48 @@ class GlobalState:
     def set_camera_streams(self, camera_streams: list[tuple[Subscriber, Subscriber]]):
         self.camera_streams = camera_streams
     
+    def set_ingest_policy(self, ingest_policy: QueuePolicy):
+        self.ingest_policy = ingest_policy
+
+    def set_decoder_backend(self, decoder_backend: DecoderBackend):
+        self.decoder_backend = decoder_backend
+
+    def set_ingest_queues(self, ingest_queues: list[IngestQueue[Any]]):
+        self.ingest_queues = ingest_queues
+
+    def set_frame_releaser(self, buffer_index: int, release: Callable[[np.ndarray], None]):
+        self.frame_releasers[buffer_index] = release
+
+    def release_frame(self, buffer_index: int, frame: np.ndarray):
+        """Tell the decoder of a tetris buffer that its frame is no longer needed, if it pools frames."""
+        release = self.frame_releasers.get(buffer_index)
+        if release is not None:
+            release(frame)
+
     def set_render_format(self, render_format: str):
         self.render_format = render_format
 
     def set_webrtc_server(self, webrtc_server: "WebRTCServer"):
         self.webrtc_server = webrtc_server
 
+    def set_video_frame_slot(self, video_frame_slot: "LatestFrameSlot[av.VideoFrame]"):
+        self.video_frame_slot = video_frame_slot
+
+    def set_row_delivery_policy(self, row_delivery_policy: RowDeliveryPolicy):
+        self.row_delivery_policy = row_delivery_policy
+
+    def set_adaptive_index_delta(self, adaptive_index_delta: bool):
+        self.adaptive_index_delta = adaptive_index_delta
+
+    def set_partial_row_deadline_ns(self, partial_row_deadline_ns: int | None):
+        self.partial_row_deadline_ns = partial_row_deadline_ns
+
+    def set_staleness_budget_ns(self, staleness_budget_ns: int):
+        self.staleness_budget_ns = staleness_budget_ns
+
+    def set_display_rows(self, display_rows: RowChannel[DisplayRow]):
+        self.display_rows = display_rows
+
     def set_tetris_buffer(self, tetris_buffer: TetrisEngine[Any]):
         self.tetris_buffer = tetris_buffer
 
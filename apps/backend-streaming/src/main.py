@@ -23,6 +23,9 @@ def main():
     state.set_console(console)
     state.set_camera_in_channel(camera_in_channel)
     state.set_render_method("webrtc")
+    state.set_ingest_policy("drop_oldest")
+    state.set_decoder_backend("thread")
+    state.set_row_delivery_policy("coalesce_to_latest")
 
     run_core(state)
 
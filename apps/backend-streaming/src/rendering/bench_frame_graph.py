@@ -0,0 +1,175 @@
+"""
+Compares the CPU time per frame of separate submissions per stage with one FrameGraph submission.
+
+Four 640x576 depth cameras go through upload, depth-to-points, transform and a
+point cloud render into an offscreen target on a software (fallback) adapter.
+The old path submits once per camera in DepthProcessor and PointcloudTransformer
+and once more for the render pass, the FrameGraph path records everything into
+one encoder, and the batched path adds a batched DepthProcessor with the pose
+applied in the depth kernel: one dispatch for all cameras. The last path is the
+batched one when only one camera has a new frame, which uploads and processes that
+layer alone. Every frame waits for the GPU, so the software rasterizer's work is
+part of the process CPU and wall time per frame; the time until the frame's
+submits returned is the recording and submission overhead alone.
+
+Usage (from apps/backend-streaming/src): python -m rendering.bench_frame_graph
+"""
+import time
+from types import SimpleNamespace
+from typing import Callable
+
+import numpy as np
+import wgpu
+from rich.console import Console
+
+from rendering.depth2points.processor import DepthOutputBuffers, DepthProcessor, DepthProcessorOptions
+from rendering.frame_graph import FrameGraph
+from rendering.grid.renderer import GridRenderer, create_grid_options
+from rendering.pointcloud.renderer import PointCloudRenderer, create_pointcloud_options
+from rendering.pointcloud_transformer.transformer import PointcloudTransformer, PointcloudTransformerOptions
+from streaming.zenoh_cdr import CameraModel, Quaternion, RigidTransform, Vector3
+
+CAMERAS = 4
+WIDTH, HEIGHT = 640, 576
+FRAMES = 30
+RENDER_FORMAT = wgpu.TextureFormat.rgba8unorm
+RENDER_SIZE = (1280, 720, 1)
+
+
+class Scene:
+    def __init__(self, device: wgpu.GPUDevice):
+        console = Console(quiet=True)
+        camera = CameraModel(
+            camera_model=1, image_width=WIDTH, image_height=HEIGHT,
+            focal_length=[500.0, 500.0], principal_point=[WIDTH / 2, HEIGHT / 2],
+            tangential_coefficients=[0.0, 0.0], radial_coefficients=[0.0] * 8,
+        )
+        # Only the fields PointcloudTransformer reads
+        sensor = SimpleNamespace(
+            depth_parameters=camera,
+            camera_pose=RigidTransform(translation=Vector3(0.0, 0.0, 0.0), rotation=Quaternion(0.0, 0.0, 0.0, 1.0)),
+        )
+        xs, ys = np.meshgrid(np.linspace(-1, 1, WIDTH), np.linspace(-1, 1, HEIGHT))
+        xy_lookup_table = np.stack([xs, ys], axis=-1).astype(np.float32)
+
+        self.device = device
+        self.depth_processor = DepthProcessor(device, DepthProcessorOptions(
+            width=WIDTH, height=HEIGHT, camera_params=[camera] * CAMERAS,
+            xy_lookup_tables=[xy_lookup_table] * CAMERAS, console=console,
+        ))
+        self.batched_depth_processor = DepthProcessor(device, DepthProcessorOptions(
+            width=WIDTH, height=HEIGHT, camera_params=[camera] * CAMERAS,
+            xy_lookup_tables=[xy_lookup_table] * CAMERAS, console=console,
+            camera_poses=[sensor.camera_pose] * CAMERAS, batched=True,
+        ))
+        self.transformer = PointcloudTransformer(device, PointcloudTransformerOptions(
+            camera_sensors=[sensor] * CAMERAS,
+            input_buffers=[b.position_buffer for b in self.depth_processor.output_buffers],
+            console=console,
+        ))
+        self.grid_renderer = GridRenderer(device, create_grid_options({}), RENDER_FORMAT)
+        self.pointcloud_renderer = PointCloudRenderer(device, create_pointcloud_options({}), RENDER_FORMAT)
+        self.color_texture = device.create_texture(
+            size=RENDER_SIZE, format=RENDER_FORMAT, usage=wgpu.TextureUsage.RENDER_ATTACHMENT,
+        )
+        self.depth_texture = device.create_texture(
+            size=RENDER_SIZE, format=wgpu.TextureFormat.depth24plus, usage=wgpu.TextureUsage.RENDER_ATTACHMENT,
+        )
+        rng = np.random.default_rng(0)
+        self.depth_frames = [rng.integers(500, 4000, (HEIGHT, WIDTH), dtype=np.uint16) for _ in range(CAMERAS)]
+        # Reading it back waits for all submitted work
+        self.fence = device.create_buffer(size=4, usage=wgpu.BufferUsage.COPY_SRC)
+        self.view_matrix = np.eye(4, dtype=np.float32)
+        self.projection_matrix = np.eye(4, dtype=np.float32)
+
+    def record_render(self, command_encoder: wgpu.GPUCommandEncoder, batched: bool = False):
+        render_pass = command_encoder.begin_render_pass(
+            color_attachments=[{
+                "view": self.color_texture.create_view(),
+                "clear_value": (0.0, 0.0, 0.0, 1.0),
+                "load_op": wgpu.LoadOp.clear,
+                "store_op": wgpu.StoreOp.store,
+            }],
+            depth_stencil_attachment={
+                "view": self.depth_texture.create_view(),
+                "depth_clear_value": 1.0,
+                "depth_load_op": wgpu.LoadOp.clear,
+                "depth_store_op": wgpu.StoreOp.store,
+            },
+        )
+        self.grid_renderer.update_camera(self.view_matrix, self.projection_matrix)
+        self.pointcloud_renderer.update_camera(self.view_matrix, self.projection_matrix)
+        self.grid_renderer.render(command_encoder, render_pass)
+        if batched:
+            buffers = self.batched_depth_processor.output_buffers
+            point_count = self.batched_depth_processor.points_per_output_buffer
+        else:
+            buffers = [
+                DepthOutputBuffers(position, b.tex_coord_buffer, b.normal_buffer, b.camera_params_buffer, b.draw_args_buffer)
+                for position, b in zip(self.transformer.output_buffers, self.depth_processor.output_buffers)
+            ]
+            point_count = WIDTH * HEIGHT
+        self.pointcloud_renderer.render(command_encoder, render_pass, buffers, point_count)
+        render_pass.end()
+
+    def separate_submissions(self):
+        for i in range(CAMERAS):
+            self.depth_processor.process_depth_data(i, self.depth_frames[i])
+        self.transformer.process_all()
+        command_encoder = self.device.create_command_encoder()
+        self.record_render(command_encoder)
+        self.device.queue.submit([command_encoder.finish()])
+
+    def frame_graph(self):
+        frame_graph = FrameGraph(self.device)
+        for i in range(CAMERAS):
+            frame_graph.add_stage(
+                f"depth {i}",
+                lambda encoder, i=i: self.depth_processor.record_depth_data(encoder, i, self.depth_frames[i]),
+            )
+            frame_graph.add_stage(f"transform {i}", lambda encoder, i=i: self.transformer.record_single(encoder, i))
+        frame_graph.add_stage("render", self.record_render)
+        frame_graph.submit()
+
+    def batched_frame_graph(self, changed: int = CAMERAS):
+        depth_frames = self.depth_frames[:changed] + [None] * (CAMERAS - changed)
+        frame_graph = FrameGraph(self.device)
+        frame_graph.add_stage(
+            "depth", lambda encoder: self.batched_depth_processor.record_depth_batch(encoder, depth_frames),
+        )
+        frame_graph.add_stage("render", lambda encoder: self.record_render(encoder, batched=True))
+        frame_graph.submit()
+
+
+def run(scene: Scene, frame: Callable[[], None]) -> tuple[float, float, float]:
+    """Return milliseconds per frame: (process CPU time, wall time, wall time until the submits returned)."""
+    frame()
+    scene.device.queue.read_buffer(scene.fence)
+    recording = 0.0
+    cpu_began, wall_began = time.process_time(), time.perf_counter()
+    for _ in range(FRAMES):
+        began = time.perf_counter()
+        frame()
+        recording += time.perf_counter() - began
+        scene.device.queue.read_buffer(scene.fence)
+    cpu, wall = time.process_time() - cpu_began, time.perf_counter() - wall_began
+    return cpu / FRAMES * 1e3, wall / FRAMES * 1e3, recording / FRAMES * 1e3
+
+
+def main():
+    adapter = wgpu.gpu.request_adapter_sync(power_preference="low-power", force_fallback_adapter=True)
+    device = adapter.request_device_sync()
+    print(f"Adapter: {adapter.info['device']} ({adapter.info['backend_type']})")
+    scene = Scene(device)
+    for name, frame in [
+        ("separate submissions", scene.separate_submissions),
+        ("frame graph", scene.frame_graph),
+        ("batched frame graph", scene.batched_frame_graph),
+        ("batched, one changed", lambda: scene.batched_frame_graph(changed=1)),
+    ]:
+        cpu, wall, recording = run(scene, frame)
+        print(f"{name:20}: {cpu:6.2f}ms CPU {wall:6.2f}ms wall per frame, {recording:5.2f}ms until submitted")
+
+
+if __name__ == "__main__":
+    main()
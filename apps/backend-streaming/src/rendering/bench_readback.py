@@ -0,0 +1,109 @@
+"""
+Compares reading frames back with canvas.draw() against the persistent FrameReadback.
+
+A 1280x960 grid is rendered into the offscreen canvas on a software (fallback)
+adapter. The canvas path renders and then downloads the frame with canvas.draw(),
+allocating a new array every frame, like Renderer.draw_frame did. The FrameReadback
+path records the copy into the frame's submission and collects the previous frame
+after submitting. For each path the time per frame of the render thread and the
+time a consumer waits in draw_frame are reported.
+
+Usage (from apps/backend-streaming/src): python -m rendering.bench_readback
+"""
+import time
+from typing import Callable
+
+import numpy as np
+import wgpu
+from rendercanvas.offscreen import OffscreenRenderCanvas
+
+from rendering.grid.renderer import GridRenderer, create_grid_options
+from rendering.readback import FrameReadback
+
+FRAMES = 60
+SIZE = (1280, 960)
+
+
+class Scene:
+    def __init__(self, device: wgpu.GPUDevice):
+        self.device = device
+        self.canvas = OffscreenRenderCanvas(size=SIZE)
+        self.context = self.canvas.get_context("wgpu")
+        render_format = self.context.get_preferred_format(device.adapter)
+        self.context.configure(device=device, format=render_format)
+        self.grid_renderer = GridRenderer(device, create_grid_options({}), render_format)
+        self.readback = FrameReadback(device)
+        self.depth_texture = device.create_texture(
+            size=(*SIZE, 1), format=wgpu.TextureFormat.depth24plus, usage=wgpu.TextureUsage.RENDER_ATTACHMENT,
+        )
+        self.view_matrix = np.eye(4, dtype=np.float32)
+        self.projection_matrix = np.eye(4, dtype=np.float32)
+
+    def record_render(self, command_encoder: wgpu.GPUCommandEncoder):
+        render_pass = command_encoder.begin_render_pass(
+            color_attachments=[{
+                "view": self.context.get_current_texture().create_view(),
+                "clear_value": (0.05, 0.05, 0.1, 1.0),
+                "load_op": wgpu.LoadOp.clear,
+                "store_op": wgpu.StoreOp.store,
+            }],
+            depth_stencil_attachment={
+                "view": self.depth_texture.create_view(),
+                "depth_clear_value": 1.0,
+                "depth_load_op": wgpu.LoadOp.clear,
+                "depth_store_op": wgpu.StoreOp.store,
+            },
+        )
+        self.grid_renderer.update_camera(self.view_matrix, self.projection_matrix)
+        self.grid_renderer.render(command_encoder, render_pass)
+        render_pass.end()
+
+    def render_canvas(self):
+        command_encoder = self.device.create_command_encoder()
+        self.record_render(command_encoder)
+        self.device.queue.submit([command_encoder.finish()])
+
+    def draw_canvas(self) -> np.ndarray:
+        return np.asarray(self.canvas.draw())
+
+    def render_readback(self):
+        command_encoder = self.device.create_command_encoder()
+        self.record_render(command_encoder)
+        self.readback.record_copy(command_encoder, self.context.get_current_texture())
+        self.device.queue.submit([command_encoder.finish()])
+        self.readback.submitted()
+
+    def draw_readback(self) -> np.ndarray | None:
+        return self.readback.latest()
+
+
+def run(render: Callable[[], None], draw: Callable[[], np.ndarray | None]) -> tuple[float, float]:
+    """Return milliseconds per frame: (render thread, consumer waiting in draw)."""
+    render()
+    draw()
+    rendering = drawing = 0.0
+    for _ in range(FRAMES):
+        began = time.perf_counter()
+        render()
+        rendered = time.perf_counter()
+        draw()
+        drawing += time.perf_counter() - rendered
+        rendering += rendered - began
+    return rendering / FRAMES * 1e3, drawing / FRAMES * 1e3
+
+
+def main():
+    adapter = wgpu.gpu.request_adapter_sync(power_preference="low-power", force_fallback_adapter=True)
+    device = adapter.request_device_sync()
+    print(f"Adapter: {adapter.info['device']} ({adapter.info['backend_type']})")
+    scene = Scene(device)
+    for name, render, draw in [
+        ("canvas.draw()", scene.render_canvas, scene.draw_canvas),
+        ("frame readback", scene.render_readback, scene.draw_readback),
+    ]:
+        rendering, drawing = run(render, draw)
+        print(f"{name:15}: {rendering:6.2f}ms render {drawing:6.2f}ms draw_frame per frame")
+
+
+if __name__ == "__main__":
+    main()
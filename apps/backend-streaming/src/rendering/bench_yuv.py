@@ -0,0 +1,86 @@
+"""
+Compares the CPU conversion of read back RGBA frames to yuv420p with the GPU YuvConverter.
+
+The 1280x960 grid scene of bench_readback is rendered on a software (fallback)
+adapter and read back through FrameReadback. The CPU path reads back RGBA and
+converts it with VideoFrame.reformat like WgpuVideoStreamTrack.recv did; the GPU
+path converts the frame in a compute pass, reads back the planes and builds the
+VideoFrame with yuv420_video_frame. For each path the time per frame of the render
+thread and the time the consumer needs to get a yuv420p VideoFrame are reported.
+
+Usage (from apps/backend-streaming/src): python -m rendering.bench_yuv
+"""
+import time
+from typing import Callable
+
+import av
+import wgpu
+
+from rendering.bench_readback import FRAMES, Scene
+from rendering.yuv.converter import YuvConverter, yuv420_video_frame
+
+
+class YuvScene(Scene):
+    def __init__(self, device: wgpu.GPUDevice):
+        super().__init__(device)
+        render_format = self.context.get_preferred_format(device.adapter)
+        self.context.configure(
+            device=device,
+            format=render_format,
+            usage=wgpu.TextureUsage.RENDER_ATTACHMENT | wgpu.TextureUsage.TEXTURE_BINDING,
+        )
+        self.converter = YuvConverter(device, render_format)
+
+    def render_yuv(self):
+        command_encoder = self.device.create_command_encoder()
+        self.record_render(command_encoder)
+        planes_buffer, layout = self.converter.record(command_encoder, self.context.get_current_texture())
+        self.readback.record_buffer_copy(command_encoder, planes_buffer, layout.size, layout)
+        self.device.queue.submit([command_encoder.finish()])
+        self.readback.submitted()
+
+    def frame_cpu(self) -> av.VideoFrame | None:
+        frame = self.readback.latest()
+        if frame is None:
+            return None
+        return av.VideoFrame.from_ndarray(frame, format="rgba").reformat(
+            format="yuv420p", dst_color_range=1, dst_colorspace=1,
+        )
+
+    def frame_gpu(self) -> av.VideoFrame | None:
+        latest = self.readback.latest_with_layout()
+        if latest is None:
+            return None
+        return yuv420_video_frame(*latest)
+
+
+def run(render: Callable[[], None], convert: Callable[[], av.VideoFrame | None]) -> tuple[float, float]:
+    """Return milliseconds per frame: (render thread, consumer building the VideoFrame)."""
+    render()
+    render()
+    rendering = converting = 0.0
+    for _ in range(FRAMES):
+        began = time.perf_counter()
+        render()
+        rendered = time.perf_counter()
+        convert()
+        converting += time.perf_counter() - rendered
+        rendering += rendered - began
+    return rendering / FRAMES * 1e3, converting / FRAMES * 1e3
+
+
+def main():
+    adapter = wgpu.gpu.request_adapter_sync(power_preference="low-power", force_fallback_adapter=True)
+    device = adapter.request_device_sync()
+    print(f"Adapter: {adapter.info['device']} ({adapter.info['backend_type']})")
+    scene = YuvScene(device)
+    for name, render, convert in [
+        ("CPU reformat", scene.render_readback, scene.frame_cpu),
+        ("GPU planes", scene.render_yuv, scene.frame_gpu),
+    ]:
+        rendering, converting = run(render, convert)
+        print(f"{name:12}: {rendering:6.2f}ms render {converting:6.2f}ms yuv420p frame per frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+from typing import Any
+import numpy as np
+from dataclasses import dataclass
+from rendering.depth2points.processor import DepthOutputBuffers
+import wgpu
+import os
+import math
+
+# --------------------------------------------------------------------------------------------------
+# Options and Data Structures
+# --------------------------------------------------------------------------------------------------
+
+@dataclass
+class PointCullerOptions:
+    """Configuration options for the point culler."""
+    # Points further than this from the viewer are dropped (meters)
+    far_distance: float
+    # Depth up to which a camera's bounding box reaches (meters)
+    max_camera_depth: float
+    # World-space region of interest, points outside are dropped; None keeps everything
+    roi_min: tuple[float, float, float] | None
+    roi_max: tuple[float, float, float] | None
+
+
+def create_culling_options(options: dict[str, Any] | None = None) -> PointCullerOptions:
+    """Create point culler options with default values."""
+    if options is None:
+        options = {}
+
+    return PointCullerOptions(
+        far_distance=options.get('far_distance', 20.0),
+        max_camera_depth=options.get('max_camera_depth', 10.0),
+        roi_min=options.get('roi_min', None),
+        roi_max=options.get('roi_max', None),
+    )
+
+# --------------------------------------------------------------------------------------------------
+# Bounding Boxes
+# --------------------------------------------------------------------------------------------------
+
+def camera_bounds(xy_lookup_table: np.ndarray, camera_to_world: np.ndarray, max_depth: float) -> np.ndarray:
+    """
+    World-space bounding box (2x3, min and max) of every point a depth camera can produce.
+
+    The points of a pixel lie on the ray (x * d, -y * d, -d) of its lookup table entry,
+    so the camera's view frustum up to max_depth is the pyramid spanned by the origin and
+    the four extreme lookup table values at that depth.
+    """
+    xs, ys = xy_lookup_table[..., 0], xy_lookup_table[..., 1]
+    x_range = (np.nanmin(xs), np.nanmax(xs))
+    y_range = (np.nanmin(ys), np.nanmax(ys))
+    corners = np.array(
+        [[0.0, 0.0, 0.0, 1.0]] +
+        [[x * max_depth, -y * max_depth, -max_depth, 1.0] for x in x_range for y in y_range],
+        dtype=np.float64,
+    )
+    world = (camera_to_world @ corners.T).T[:, :3]
+    return np.stack([world.min(axis=0), world.max(axis=0)])
+
+
+def is_box_visible(
+    bounds: np.ndarray,
+    view_matrix: np.ndarray,
+    projection_matrix: np.ndarray,
+    far_distance: float,
+    roi: np.ndarray | None = None,
+) -> bool:
+    """
+    Whether any point inside bounds can survive the culling pass.
+
+    The matrices are flattened column-major like the shader uniforms. Conservative: a
+    box is only rejected when all its corners are outside the same clip plane, it is
+    entirely beyond far_distance or it does not overlap roi.
+    """
+    if roi is not None and (np.any(bounds[1] < roi[0]) or np.any(bounds[0] > roi[1])):
+        return False
+
+    view = np.asarray(view_matrix, dtype=np.float64).reshape(4, 4).T
+    projection = np.asarray(projection_matrix, dtype=np.float64).reshape(4, 4).T
+
+    # Closest point of the box to the viewer
+    eye = np.linalg.inv(view)[:3, 3]
+    if np.linalg.norm(np.clip(eye, bounds[0], bounds[1]) - eye) > far_distance:
+        return False
+
+    corners = np.array([
+        [x, y, z, 1.0] for x in bounds[:, 0] for y in bounds[:, 1] for z in bounds[:, 2]
+    ])
+    clip = (projection @ view @ corners.T).T
+    x, y, z, w = clip[:, 0], clip[:, 1], clip[:, 2], clip[:, 3]
+    outside = [x < -w, x > w, y < -w, y > w, z < 0.0, z > w]
+    return not any(np.all(plane) for plane in outside)
+
+# --------------------------------------------------------------------------------------------------
+# Point Culler Class
+# --------------------------------------------------------------------------------------------------
+
+class PointCuller:
+    """
+    Culls the point clouds to what the remote camera can see before they are drawn.
+
+    Every frame, output buffer sets whose bounding box is outside the view frustum,
+    beyond the far distance or outside the region of interest are skipped. The
+    points of the remaining sets are tested one by one in a compute pass, and the
+    indices of those inside the frustum, the far distance and the region of interest
+    are appended to an index buffer; the set is drawn in place through it with its
+    own draw_indexed_indirect arguments. A set is only tested again when the view
+    changed or its points did, otherwise its last indices are drawn.
+    """
+
+    def __init__(
+        self,
+        device: wgpu.GPUDevice,
+        options: PointCullerOptions,
+        input_buffers: list[DepthOutputBuffers],
+        bounds: list[np.ndarray],
+        points_per_buffer: int,
+        compact_vertices: bool = False,
+    ):
+        """Initialize the point culler; bounds holds one world-space box per input buffer set."""
+        if len(bounds) != len(input_buffers):
+            raise ValueError("One bounding box per input buffer set is needed")
+        if any(b.draw_args_buffer is None for b in input_buffers):
+            raise ValueError("The point culler reads the point count from the input draw arguments")
+        if (options.roi_min is None) != (options.roi_max is None):
+            raise ValueError("roi_min and roi_max must be given together")
+
+        self.device = device
+        self.options = options
+        self.input_buffers = input_buffers
+        self.bounds = bounds
+        self.points_per_buffer = points_per_buffer
+        self.compact_vertices = compact_vertices
+        self.roi = None if options.roi_min is None else np.array([options.roi_min, options.roi_max], dtype=np.float64)
+        self.output_buffers: list[DepthOutputBuffers] = []
+        self.compute_bind_groups: list[wgpu.GPUBindGroup] = []
+        # Input buffer sets whose bounding box was visible in the last frame
+        self.visible: list[bool] = [True] * len(input_buffers)
+        # Input buffer sets whose indices are up to date for the matrices they were culled with
+        self.culled: list[bool] = [False] * len(input_buffers)
+        self.culled_matrices: tuple[np.ndarray, np.ndarray] | None = None
+
+        shader_path = os.path.join(os.path.dirname(__file__), 'shaders', 'point-cull.wgsl')
+        with open(shader_path, 'r') as f:
+            compute_module = self.device.create_shader_module(code=f.read())
+
+        self.pipeline = self.device.create_compute_pipeline(
+            layout='auto',
+            compute={
+                "module": compute_module,
+                "entry_point": "main",
+                "constants": {"compact_vertices": int(compact_vertices)},
+            }
+        )
+
+        self.uniform_buffer = self.device.create_buffer(
+            size=176, # Must match shader uniform struct size
+            usage=wgpu.BufferUsage.UNIFORM | wgpu.BufferUsage.COPY_DST
+        )
+
+        self._create_buffers()
+
+    def _create_buffers(self):
+        """Create the index buffer, draw arguments and compute bind group of every input buffer set."""
+        for input_buffer in self.input_buffers:
+            draw_args_buffer = self.device.create_buffer(
+                size=20,
+                usage=wgpu.BufferUsage.STORAGE | wgpu.BufferUsage.INDIRECT | wgpu.BufferUsage.COPY_DST | wgpu.BufferUsage.COPY_SRC
+            )
+            # (index_count, instance_count, first_index, base_vertex, first_instance)
+            self.device.queue.write_buffer(draw_args_buffer, 0, np.array([0, 1, 0, 0, 0], dtype=np.uint32))
+            output_buffer = DepthOutputBuffers(
+                position_buffer=input_buffer.position_buffer,
+                tex_coord_buffer=input_buffer.tex_coord_buffer,
+                normal_buffer=input_buffer.normal_buffer,
+                camera_params_buffer=input_buffer.camera_params_buffer,
+                draw_args_buffer=draw_args_buffer,
+                index_buffer=self.device.create_buffer(
+                    size=self.points_per_buffer * 4,
+                    usage=wgpu.BufferUsage.STORAGE | wgpu.BufferUsage.INDEX | wgpu.BufferUsage.COPY_SRC
+                ),
+            )
+            self.output_buffers.append(output_buffer)
+            self.compute_bind_groups.append(self.device.create_bind_group(
+                layout=self.pipeline.get_bind_group_layout(0),
+                entries=[
+                    {"binding": 0, "resource": {"buffer": input_buffer.position_buffer}},
+                    {"binding": 1, "resource": {"buffer": input_buffer.draw_args_buffer}},
+                    {"binding": 2, "resource": {"buffer": output_buffer.index_buffer}},
+                    {"binding": 3, "resource": {"buffer": output_buffer.draw_args_buffer}},
+                    {"binding": 4, "resource": {"buffer": self.uniform_buffer}},
+                ]
+            ))
+
+    def _write_uniforms(self, view_matrix: np.ndarray, projection_matrix: np.ndarray):
+        """Write the camera matrices and culling parameters laid out like the shader's Uniforms struct."""
+        uniform_data = np.zeros(44, dtype=np.float32)
+        uniform_data[0:16] = view_matrix.flatten()
+        uniform_data[16:32] = projection_matrix.flatten()
+        if self.roi is not None:
+            uniform_data[32:35] = self.roi[0]
+            uniform_data[35] = 1.0
+            uniform_data[36:39] = self.roi[1]
+        uniform_data[40] = self.options.far_distance
+        self.device.queue.write_buffer(self.uniform_buffer, 0, uniform_data)
+
+    def record(
+        self,
+        command_encoder: wgpu.GPUCommandEncoder,
+        view_matrix: np.ndarray,
+        projection_matrix: np.ndarray,
+        changed: list[int] | None = None,
+    ) -> list[DepthOutputBuffers]:
+        """
+        Record the culling passes for the current camera and return the culled buffer sets to draw.
+
+        changed lists the input buffer sets whose points were rewritten since the last
+        call, None when any may have been.
+        """
+        if self.culled_matrices is None or not (
+            np.array_equal(view_matrix, self.culled_matrices[0]) and np.array_equal(projection_matrix, self.culled_matrices[1])
+        ):
+            self.culled = [False] * len(self.input_buffers)
+            self.culled_matrices = (np.array(view_matrix, copy=True), np.array(projection_matrix, copy=True))
+            self._write_uniforms(view_matrix, projection_matrix)
+        for i in range(len(self.input_buffers)) if changed is None else changed:
+            self.culled[i] = False
+        self.visible = [
+            is_box_visible(bounds, view_matrix, projection_matrix, self.options.far_distance, self.roi)
+            for bounds in self.bounds
+        ]
+
+        visible_buffers: list[DepthOutputBuffers] = []
+        for i, output_buffer in enumerate(self.output_buffers):
+            if not self.visible[i]:
+                continue
+            visible_buffers.append(output_buffer)
+            if self.culled[i]:
+                continue
+            command_encoder.clear_buffer(output_buffer.draw_args_buffer, 0, 4)
+            compute_pass = command_encoder.begin_compute_pass()
+            compute_pass.set_pipeline(self.pipeline)
+            compute_pass.set_bind_group(0, self.compute_bind_groups[i])
+            compute_pass.dispatch_workgroups(math.ceil(self.points_per_buffer / 64), 1, 1)
+            compute_pass.end()
+            self.culled[i] = True
+        return visible_buffers
+
+    def destroy(self):
+        """Clean up all GPU resources created by this class."""
+        for ob in self.output_buffers:
+            ob.index_buffer.destroy()
+            ob.draw_args_buffer.destroy()
+        self.uniform_buffer.destroy()
+        self.output_buffers.clear()
+        self.compute_bind_groups.clear()
@@ -0,0 +1,83 @@
+// Same position layout as the depth processor output
+override compact_vertices: bool = false;
+
+@group(0) @binding(0) var<storage, read> InputPositions: array<vec2<u32>>;
+
+struct InputDrawIndirectArgs {
+    vertex_count: u32,
+    instance_count: u32,
+    first_vertex: u32,
+    first_instance: u32,
+};
+
+@group(0) @binding(1) var<storage, read> InputDrawArgs: InputDrawIndirectArgs;
+
+// Indices of the visible points into the input buffers, which are drawn in place
+@group(0) @binding(2) var<storage, read_write> OutputIndices: array<u32>;
+
+// Arguments of the culled point draw, index_count is reset before every dispatch
+struct DrawIndexedIndirectArgs {
+    index_count: atomic<u32>,
+    instance_count: u32,
+    first_index: u32,
+    base_vertex: i32,
+    first_instance: u32,
+};
+
+@group(0) @binding(3) var<storage, read_write> OutputDrawArgs: DrawIndexedIndirectArgs;
+
+struct Uniforms {
+    view: mat4x4<f32>,
+    projection: mat4x4<f32>,
+    // xyz in world space, w > 0 when the box is enabled
+    roi_min: vec4<f32>,
+    roi_max: vec4<f32>,
+    far_distance: f32,
+    padding0: f32,
+    padding1: f32,
+    padding2: f32,
+};
+
+@group(0) @binding(4) var<uniform> uniforms: Uniforms;
+
+fn load_position(index: u32) -> vec4<f32> {
+    if (compact_vertices) {
+        let packed = InputPositions[index];
+        return vec4<f32>(unpack2x16float(packed.x), unpack2x16float(packed.y));
+    }
+    return vec4<f32>(
+        bitcast<vec2<f32>>(InputPositions[2u * index]),
+        bitcast<vec2<f32>>(InputPositions[2u * index + 1u]),
+    );
+}
+
+fn is_visible(position: vec4<f32>) -> bool {
+    if (uniforms.roi_min.w > 0.0) {
+        if (any(position.xyz < uniforms.roi_min.xyz) || any(position.xyz > uniforms.roi_max.xyz)) {
+            return false;
+        }
+    }
+    let view_position = uniforms.view * position;
+    if (length(view_position.xyz) > uniforms.far_distance) {
+        return false;
+    }
+    // The clip volume the rasterizer keeps
+    let clip = uniforms.projection * view_position;
+    return all(abs(clip.xy) <= vec2<f32>(clip.w)) && clip.z >= 0.0 && clip.z <= clip.w;
+}
+
+@compute @workgroup_size(64)
+fn main(@builtin(global_invocation_id) global_id: vec3<u32>) {
+    if (global_id.x >= InputDrawArgs.vertex_count) {
+        return;
+    }
+    // Several input sets can share buffers, each drawing its own range
+    let index = InputDrawArgs.first_vertex + global_id.x;
+
+    let position = load_position(index);
+    if (!is_visible(position)) {
+        return;
+    }
+
+    OutputIndices[atomicAdd(&OutputDrawArgs.index_count, 1u)] = index;
+}
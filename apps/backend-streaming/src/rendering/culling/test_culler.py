@@ -0,0 +1,82 @@
+import unittest
+
+import numpy as np
+
+from rendering.culling.culler import camera_bounds, is_box_visible
+
+
+def look_at(eye: list[float], target: list[float]) -> np.ndarray:
+    eye = np.array(eye, dtype=np.float64)
+    forward = np.array(target, dtype=np.float64) - eye
+    forward /= np.linalg.norm(forward)
+    side = np.cross(forward, [0.0, 1.0, 0.0])
+    side /= np.linalg.norm(side)
+    up = np.cross(side, forward)
+    view = np.eye(4)
+    view[0, :3], view[1, :3], view[2, :3] = side, up, -forward
+    view[:3, 3] = -view[:3, :3] @ eye
+    return view.T.flatten()
+
+
+def perspective(near: float, far: float) -> np.ndarray:
+    # 90 degree field of view, depth mapped to 0..1
+    projection = np.zeros((4, 4))
+    projection[0, 0] = projection[1, 1] = 1.0
+    projection[2, 2] = far / (near - far)
+    projection[2, 3] = near * far / (near - far)
+    projection[3, 2] = -1.0
+    return projection.T.flatten()
+
+
+def translation(x: float, y: float, z: float) -> np.ndarray:
+    matrix = np.eye(4)
+    matrix[:3, 3] = [x, y, z]
+    return matrix
+
+
+XY_LOOKUP_TABLE = np.stack(np.meshgrid(np.linspace(-0.5, 0.5, 8), np.linspace(-0.25, 0.25, 6)), axis=-1)
+
+
+class TestCameraBounds(unittest.TestCase):
+    def test_box_spans_the_frustum_up_to_max_depth(self):
+        bounds = camera_bounds(XY_LOOKUP_TABLE, translation(1.0, 0.0, 0.0), max_depth=4.0)
+
+        np.testing.assert_allclose(bounds, [[-1.0, -1.0, -4.0], [3.0, 1.0, 0.0]])
+
+
+class TestIsBoxVisible(unittest.TestCase):
+    def setUp(self):
+        self.bounds = np.array([[-1.0, -1.0, -5.0], [1.0, 1.0, -3.0]])
+        self.projection = perspective(0.1, 100.0)
+
+    def test_box_in_front_is_visible(self):
+        view = look_at([0, 0, 0], [0, 0, -1])
+
+        self.assertTrue(is_box_visible(self.bounds, view, self.projection, far_distance=10.0))
+
+    def test_box_behind_or_to_the_side_is_culled(self):
+        self.assertFalse(is_box_visible(self.bounds, look_at([0, 0, 0], [0, 0, 1]), self.projection, 10.0))
+        self.assertFalse(is_box_visible(self.bounds, look_at([0, 0, 0], [-1, 0, 0.2]), self.projection, 10.0))
+
+    def test_box_partly_in_view_is_visible(self):
+        view = look_at([0, 0, 0], [-1, 0, -1])
+
+        self.assertTrue(is_box_visible(self.bounds, view, self.projection, far_distance=10.0))
+
+    def test_box_beyond_far_distance_is_culled(self):
+        view = look_at([0, 0, 0], [0, 0, -1])
+
+        self.assertFalse(is_box_visible(self.bounds, view, self.projection, far_distance=2.5))
+        self.assertTrue(is_box_visible(self.bounds, view, self.projection, far_distance=3.5))
+
+    def test_box_outside_region_of_interest_is_culled(self):
+        view = look_at([0, 0, 0], [0, 0, -1])
+        inside = np.array([[0.0, 0.0, -4.0], [2.0, 2.0, -2.0]])
+        outside = np.array([[2.0, 0.0, -4.0], [3.0, 2.0, -2.0]])
+
+        self.assertTrue(is_box_visible(self.bounds, view, self.projection, 10.0, roi=inside))
+        self.assertFalse(is_box_visible(self.bounds, view, self.projection, 10.0, roi=outside))
+
+
+if __name__ == "__main__":
+    unittest.main()
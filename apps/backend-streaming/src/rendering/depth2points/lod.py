@@ -0,0 +1,64 @@
+import numpy as np
+
+# Strides the depth grid can be subsampled with, finest first
+LOD_STRIDES = (1, 2, 4)
+# Screen-space spacing (pixels) of neighbouring points a level may not exceed, so subsampling leaves no holes
+TARGET_POINT_FOOTPRINT = 1.0
+# Depth (meters) along the optical axis at which the point spacing of a camera is estimated
+REFERENCE_DEPTH = 2.0
+
+
+def point_footprint(
+    anchor: np.ndarray,
+    point_spacing: float,
+    view_matrix: np.ndarray,
+    projection_matrix: np.ndarray,
+    viewport_height: int,
+) -> float | None:
+    """
+    Screen-space distance in pixels between neighbouring points around anchor.
+
+    The matrices are flattened column-major like the shader uniforms. None when the
+    anchor is behind the viewer.
+    """
+    view = np.asarray(view_matrix, dtype=np.float64).reshape(4, 4).T
+    projection = np.asarray(projection_matrix, dtype=np.float64).reshape(4, 4).T
+    distance = -(view @ np.append(anchor, 1.0))[2]
+    if distance <= 0.0:
+        return None
+    pixels_per_meter = projection[1, 1] * viewport_height / 2 / distance
+    return point_spacing * pixels_per_meter
+
+
+def select_stride(footprint: float | None) -> int:
+    """Coarsest stride that keeps neighbouring points at most TARGET_POINT_FOOTPRINT apart."""
+    stride = LOD_STRIDES[0]
+    if footprint is None:
+        return stride
+    for s in LOD_STRIDES:
+        if s * footprint <= TARGET_POINT_FOOTPRINT:
+            stride = s
+    return stride
+
+
+class LodSelector:
+    """
+    Picks the depth grid stride of every camera from the projected point footprint.
+
+    A camera's footprint is the on-screen spacing of neighbouring depth pixels at
+    REFERENCE_DEPTH on its optical axis. When the points there are so dense that
+    several fall on one pixel of the viewport, because the canvas is small or the
+    viewer is far away, the grid is subsampled by 2 or 4 in both directions.
+    """
+
+    def __init__(self, camera_to_world: list[np.ndarray], focal_lengths: list[float]):
+        # Point on the optical axis; the cameras look down -z like the depth shader's points
+        self.anchors = [(m @ np.array([0.0, 0.0, -REFERENCE_DEPTH, 1.0]))[:3] for m in camera_to_world]
+        self.point_spacings = [REFERENCE_DEPTH / f for f in focal_lengths]
+
+    def select(self, view_matrix: np.ndarray, projection_matrix: np.ndarray, viewport_height: int) -> list[int]:
+        """Stride of every camera for the current view."""
+        return [
+            select_stride(point_footprint(anchor, spacing, view_matrix, projection_matrix, viewport_height))
+            for anchor, spacing in zip(self.anchors, self.point_spacings)
+        ]
@@ -5,7 +5,9 @@ from rich.console import Console
 import wgpu
 import os
 import math
-from streaming.zenoh_cdr import CameraModel
+import time
+from streaming.zenoh_cdr import CameraModel, RigidTransform
+from rendering.pointcloud_transformer.extrinsics_utils import derive_transform_from_extrinsics, transform_params_to_matrix
 
 # --------------------------------------------------------------------------------------------------
 # Options and Data Structures
@@ -19,6 +21,14 @@ class DepthProcessorOptions:
     camera_params: list[CameraModel]  # list of camera parameter dictionaries
     xy_lookup_tables: list[np.ndarray]
     console: Console
+    # When given, points are written in world space and no PointcloudTransformer is needed
+    camera_poses: list[RigidTransform] | None = None
+    # All cameras as layers of one texture array, one dispatch and one output buffer set
+    batched: bool = False
+    # float16x4 positions only (8 bytes per point instead of 48), see PointCloudRendererOptions
+    compact_vertices: bool = False
+    # Only points with a valid depth are appended to the output buffers
+    drop_invalid_points: bool = False
 
 @dataclass
 class DepthInputBuffers:
@@ -33,6 +43,10 @@ class DepthOutputBuffers:
     tex_coord_buffer: wgpu.GPUBuffer
     normal_buffer: wgpu.GPUBuffer
     camera_params_buffer: wgpu.GPUBuffer
+    # draw_indirect arguments with the number of points in the buffers
+    draw_args_buffer: wgpu.GPUBuffer | None = None
+    # u32 indices of the points to draw; draw_args_buffer then holds draw_indexed_indirect arguments
+    index_buffer: wgpu.GPUBuffer | None = None
 
 # --------------------------------------------------------------------------------------------------
 # Depth Processor Class
@@ -41,6 +55,24 @@ class DepthOutputBuffers:
 class DepthProcessor:
     """
     Manages the WebGPU compute pipeline for processing depth textures into 3D point clouds.
+
+    In batched mode the depth images and lookup tables of all cameras are layers of
+    one texture array each, and one dispatch processes the layers of every camera
+    with a new depth image, uploaded with one write_texture per layer. The points of
+    all cameras share one set of buffers, points_per_output_buffer per camera one
+    after another, and each camera has its own DepthOutputBuffers over its part, so
+    cameras without a new image keep their points and are drawn and culled on their own.
+
+    With compact_vertices the position buffer holds float16x4 and the tex coord and
+    normal buffers are minimal placeholders that are neither written nor drawn.
+
+    Every output buffer set has draw_indirect arguments. With drop_invalid_points the
+    kernel appends only points with a valid depth, in no particular order, and counts
+    them there; otherwise the count is fixed at points_per_output_buffer.
+
+    With drop_invalid_points the depth grid of every camera can also be subsampled
+    by a level-of-detail stride (set_lod_strides), which shrinks the dispatch and the
+    number of points drawn.
     """
     
     def __init__(self, device: wgpu.GPUDevice, options: DepthProcessorOptions):
@@ -50,11 +82,22 @@ class DepthProcessor:
         self.pipeline: wgpu.GPUComputePipeline = None
         self.input_buffers: list[DepthInputBuffers] = []
         self.output_buffers: list[DepthOutputBuffers] = []
+        # One per camera, built with the buffers they bind
+        self.compute_bind_groups: list[wgpu.GPUBindGroup] = []
+        self.camera_count = len(options.camera_params)
+        self.points_per_output_buffer = options.width * options.height
+        # Batched mode: points appended per camera, and the layers the next dispatch processes
+        self.point_counts_buffer: wgpu.GPUBuffer | None = None
+        self.layers_buffer: wgpu.GPUBuffer | None = None
+        # Level-of-detail stride of every camera, 1 processes every pixel
+        self.lod_strides: list[int] = [1] * self.camera_count
+        self._lod_emitted_at = 0.0
         self.fps_counter = FPSCounter(console=options.console, name="Depth Processor")
         self.fps_counter.start()
 
         # Load the compute shader
-        shader_path = os.path.join(os.path.dirname(__file__), 'shaders', 'depth-to-point-cloud.wgsl')
+        shader_name = 'depth-to-point-cloud-batched.wgsl' if options.batched else 'depth-to-point-cloud.wgsl'
+        shader_path = os.path.join(os.path.dirname(__file__), 'shaders', shader_name)
         with open(shader_path, 'r') as f:
             compute_shader_code = f.read()
             
@@ -68,19 +111,114 @@ class DepthProcessor:
                 "entry_point": "main",
                 "constants": {
                     "calculate_normals": 0, # Set to 1 to enable normal calculation in shader
+                    "compact_vertices": int(options.compact_vertices),
+                    "drop_invalid_points": int(options.drop_invalid_points),
                 },
             }
         )
 
-        self._create_buffers()
+        if options.batched:
+            self._create_batched_buffers()
+        else:
+            self._create_buffers()
+
+    def _camera_to_world(self, camera_index: int) -> np.ndarray:
+        """Camera pose for the shader, identity when the points stay in camera space."""
+        if self.options.camera_poses is None:
+            return np.eye(4, dtype=np.float32)
+        return transform_params_to_matrix(derive_transform_from_extrinsics(self.options.camera_poses[camera_index]))
+
+    def _position_buffer_size(self, point_count: int) -> int:
+        return point_count * (8 if self.options.compact_vertices else 16) # vec4<f16> or vec4<f32>
+
+    def _attribute_buffer_size(self, point_count: int) -> int:
+        # Still bound to the compute shader, so one vec4<f32> when unused
+        return 16 if self.options.compact_vertices else point_count * 16 # vec4<f32>
+
+    def _create_draw_args_buffer(self, point_count: int, first_point: int = 0) -> wgpu.GPUBuffer:
+        """draw_indirect arguments (vertex_count, instance_count, first_vertex, first_instance)."""
+        draw_args_buffer = self.device.create_buffer(
+            size=16,
+            usage=wgpu.BufferUsage.STORAGE | wgpu.BufferUsage.INDIRECT | wgpu.BufferUsage.COPY_DST | wgpu.BufferUsage.COPY_SRC
+        )
+        self.device.queue.write_buffer(draw_args_buffer, 0, np.array([point_count, 1, first_point, 0], dtype=np.uint32))
+        return draw_args_buffer
+
+    def _create_batched_buffers(self):
+        """Create the texture arrays, the shared output buffers and the per-camera parameters of batched mode."""
+        width, height, cameras = self.options.width, self.options.height, self.camera_count
+        point_count = self.points_per_output_buffer * cameras
+
+        depth_texture = self.device.create_texture(
+            size=(width, height, cameras), format="r16uint",
+            usage=wgpu.TextureUsage.TEXTURE_BINDING | wgpu.TextureUsage.COPY_DST
+        )
+        xy_lookup_texture = self.device.create_texture(
+            size=(width, height, cameras), format="rg32float",
+            usage=wgpu.TextureUsage.TEXTURE_BINDING | wgpu.TextureUsage.COPY_DST
+        )
+        self.device.queue.write_texture(
+            {"texture": xy_lookup_texture},
+            np.stack(self.options.xy_lookup_tables[:cameras]).astype(np.float32).tobytes(),
+            {"bytes_per_row": width * 8, "rows_per_image": height},
+            (width, height, cameras)
+        )
+        self.input_buffers.append(DepthInputBuffers(depth_texture, xy_lookup_texture))
+
+        usage = wgpu.BufferUsage.STORAGE | wgpu.BufferUsage.VERTEX | wgpu.BufferUsage.COPY_SRC
+        position_buffer = self.device.create_buffer(size=self._position_buffer_size(point_count), usage=usage)
+        tex_coord_buffer = self.device.create_buffer(size=self._attribute_buffer_size(point_count), usage=usage)
+        normal_buffer = self.device.create_buffer(size=self._attribute_buffer_size(point_count), usage=usage)
+
+        # Storage array of the uniform struct, one per layer
+        camera_params_buffer = self.device.create_buffer(
+            size=208 * cameras, # Must match shader uniform struct size
+            usage=wgpu.BufferUsage.STORAGE | wgpu.BufferUsage.COPY_DST
+        )
+        self.device.queue.write_buffer(camera_params_buffer, 0, np.concatenate([
+            self._camera_params_array(self.options.camera_params[i], self._camera_to_world(i))
+            for i in range(cameras)
+        ]))
+
+        self.point_counts_buffer = self.device.create_buffer(
+            size=4 * cameras,
+            usage=wgpu.BufferUsage.STORAGE | wgpu.BufferUsage.COPY_SRC | wgpu.BufferUsage.COPY_DST
+        )
+        self.layers_buffer = self.device.create_buffer(
+            size=4 * cameras,
+            usage=wgpu.BufferUsage.STORAGE | wgpu.BufferUsage.COPY_DST
+        )
+
+        # Until a camera's first dispatch it has no valid points to draw
+        initial_count = 0 if self.options.drop_invalid_points else self.points_per_output_buffer
+        self.output_buffers = [
+            DepthOutputBuffers(
+                position_buffer, tex_coord_buffer, normal_buffer, camera_params_buffer,
+                self._create_draw_args_buffer(initial_count, first_point=i * self.points_per_output_buffer),
+            )
+            for i in range(cameras)
+        ]
+        self.compute_bind_groups = [self.device.create_bind_group(
+            layout=self.pipeline.get_bind_group_layout(0),
+            entries=[
+                {"binding": 0, "resource": depth_texture.create_view(dimension="2d-array")},
+                {"binding": 1, "resource": xy_lookup_texture.create_view(dimension="2d-array")},
+                {"binding": 2, "resource": {"buffer": position_buffer}},
+                {"binding": 3, "resource": {"buffer": tex_coord_buffer}},
+                {"binding": 4, "resource": {"buffer": normal_buffer}},
+                {"binding": 5, "resource": {"buffer": camera_params_buffer}},
+                {"binding": 6, "resource": {"buffer": self.point_counts_buffer}},
+                {"binding": 7, "resource": {"buffer": self.layers_buffer}},
+            ]
+        )]
 
     def _create_buffers(self):
         """Create and initialize all necessary input and output buffers and textures."""
         width, height, camera_params, xy_lookup_tables = self.options.width, self.options.height, self.options.camera_params, self.options.xy_lookup_tables
         pixel_count = width * height
 
-        # Create buffers for up to 4 cameras
-        for i in range(4):
+        # One set of buffers per camera
+        for i in range(self.camera_count):
             intrinsics = camera_params[i]
             xy_lookup_table = xy_lookup_tables[i]
             
@@ -99,31 +237,57 @@ class DepthProcessor:
             
             # --- Create Output Storage Buffers ---
             position_buffer = self.device.create_buffer(
-                size=pixel_count * 16, # vec4<f32>
+                size=self._position_buffer_size(pixel_count),
                 usage=wgpu.BufferUsage.STORAGE | wgpu.BufferUsage.VERTEX | wgpu.BufferUsage.COPY_SRC
             )
             tex_coord_buffer = self.device.create_buffer(
-                size=pixel_count * 16, # vec4<f32>
+                size=self._attribute_buffer_size(pixel_count),
                 usage=wgpu.BufferUsage.STORAGE | wgpu.BufferUsage.VERTEX | wgpu.BufferUsage.COPY_SRC
             )
             normal_buffer = self.device.create_buffer(
-                size=pixel_count * 16, # vec4<f32>
+                size=self._attribute_buffer_size(pixel_count),
                 usage=wgpu.BufferUsage.STORAGE | wgpu.BufferUsage.VERTEX | wgpu.BufferUsage.COPY_SRC
             )
             
             # --- Create and write camera parameters uniform buffer ---
             camera_params_buffer = self.device.create_buffer(
-                size=144, # Must match shader uniform struct size
+                size=208, # Must match shader uniform struct size
                 usage=wgpu.BufferUsage.UNIFORM | wgpu.BufferUsage.COPY_DST
             )
-            self._write_camera_params(camera_params_buffer, intrinsics)
+            self._write_camera_params(camera_params_buffer, intrinsics, self._camera_to_world(i))
             
             self.output_buffers.append(DepthOutputBuffers(
-                position_buffer, tex_coord_buffer, normal_buffer, camera_params_buffer
+                position_buffer, tex_coord_buffer, normal_buffer, camera_params_buffer,
+                self._create_draw_args_buffer(pixel_count),
             ))
 
-    def _write_camera_params(self, buffer: wgpu.GPUBuffer, intrinsics: CameraModel):
-        """Populate the uniform buffer with camera intrinsic parameters."""
+        self._create_bind_groups()
+
+    def _create_bind_groups(self):
+        """Create the compute bind group of every camera; rebuild whenever the buffers are recreated."""
+        layout = self.pipeline.get_bind_group_layout(0)
+        self.compute_bind_groups = [
+            self.device.create_bind_group(
+                layout=layout,
+                entries=[
+                    {"binding": 0, "resource": input_buffer.depth_texture.create_view()},
+                    {"binding": 1, "resource": input_buffer.xy_lookup_texture.create_view()},
+                    {"binding": 2, "resource": {"buffer": output_buffer.position_buffer}},
+                    {"binding": 3, "resource": {"buffer": output_buffer.tex_coord_buffer}},
+                    {"binding": 4, "resource": {"buffer": output_buffer.normal_buffer}},
+                    {"binding": 5, "resource": {"buffer": output_buffer.camera_params_buffer}},
+                    {"binding": 6, "resource": {"buffer": output_buffer.draw_args_buffer}},
+                ]
+            )
+            for input_buffer, output_buffer in zip(self.input_buffers, self.output_buffers)
+        ]
+
+    def _write_camera_params(self, buffer: wgpu.GPUBuffer, intrinsics: CameraModel, camera_to_world: np.ndarray):
+        """Populate the uniform buffer with camera intrinsic parameters and the camera pose."""
+        self.device.queue.write_buffer(buffer, 0, self._camera_params_array(intrinsics, camera_to_world))
+
+    def _camera_params_array(self, intrinsics: CameraModel, camera_to_world: np.ndarray) -> np.ndarray:
+        """Camera parameters laid out like the shader's Uniforms struct."""
         width, height = self.options.width, self.options.height
         k = intrinsics.radial_coefficients
         p = intrinsics.tangential_coefficients
@@ -133,12 +297,13 @@ class DepthProcessor:
             width, height, width, height,                               # depth_dim, color_dim
             *intrinsics.focal_length, *intrinsics.principal_point,      # focal_length, principal_point
             1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1,             # depth_to_color_tf (identity)
-            0.001, 1.0, 0.0, 0.0,                                       # depth_scale, needs_projection, image_origin, padding
+            0.001, 1.0, 0.0, 1.0,                                       # depth_scale, needs_projection, image_origin, lod_stride
             k[0], k[1], p[0], p[1],                                     # color_distortion vec4[0]
             k[2], k[3], k[4], k[5],                                     # color_distortion vec4[1]
+            *camera_to_world.T.flatten(),                               # camera_to_world (column-major)
         ], dtype=np.float32)
 
-        self.device.queue.write_buffer(buffer, 0, params_array)
+        return params_array
 
     def _update_xy_table(self, xylt: np.ndarray, xy_lookup_texture: wgpu.GPUTexture):
         """Calculate and upload a pinhole camera model lookup table."""
@@ -152,13 +317,20 @@ class DepthProcessor:
         )
 
     def process_depth_data(self, camera_index: int, depth_data: np.ndarray):
-        """Run the compute shader for a given camera's depth data."""
+        """Run the compute shader for a given camera's depth data in its own submission."""
+        command_encoder = self.device.create_command_encoder()
+        self.record_depth_data(command_encoder, camera_index, depth_data)
+        self.device.queue.submit([command_encoder.finish()])
+
+    def record_depth_data(self, command_encoder: wgpu.GPUCommandEncoder, camera_index: int, depth_data: np.ndarray):
+        """Upload a camera's depth data and record its compute pass into command_encoder."""
+        if self.options.batched:
+            raise RuntimeError("A batched DepthProcessor processes whole rows with record_depth_batch")
         if self.pipeline is None or camera_index >= len(self.input_buffers):
             return
 
         width, height = self.options.width, self.options.height
         input_buffer = self.input_buffers[camera_index]
-        output_buffer = self.output_buffers[camera_index]
 
         # print(depth_data)
         
@@ -170,33 +342,92 @@ class DepthProcessor:
             (width, height, 1)
         )
         
-        # Create a bind group for the compute pass
-        compute_bind_group = self.device.create_bind_group(
-            layout=self.pipeline.get_bind_group_layout(0),
-            entries=[
-                {"binding": 0, "resource": input_buffer.depth_texture.create_view()},
-                {"binding": 1, "resource": input_buffer.xy_lookup_texture.create_view()},
-                {"binding": 2, "resource": {"buffer": output_buffer.position_buffer}},
-                {"binding": 3, "resource": {"buffer": output_buffer.tex_coord_buffer}},
-                {"binding": 4, "resource": {"buffer": output_buffer.normal_buffer}},
-                {"binding": 5, "resource": {"buffer": output_buffer.camera_params_buffer}},
-            ]
-        )
-        
-        # --- Execute Compute Pass ---
-        command_encoder = self.device.create_command_encoder()
+        compute_bind_group = self.compute_bind_groups[camera_index]
+
+        # --- Record Compute Pass ---
+        if self.options.drop_invalid_points:
+            # Restart the vertex_count the kernel appends to
+            command_encoder.clear_buffer(self.output_buffers[camera_index].draw_args_buffer, 0, 4)
         compute_pass = command_encoder.begin_compute_pass()
         compute_pass.set_pipeline(self.pipeline)
         compute_pass.set_bind_group(0, compute_bind_group)
         
-        workgroups_x = math.ceil(width / 16)
-        workgroups_y = math.ceil(height / 16)
+        stride = self.lod_strides[camera_index]
+        workgroups_x = math.ceil(width / stride / 16)
+        workgroups_y = math.ceil(height / stride / 16)
         compute_pass.dispatch_workgroups(workgroups_x, workgroups_y, 1)
         
         compute_pass.end()
+        self.fps_counter.increment()
+
+    def process_depth_batch(self, depth_frames: list[np.ndarray | None]):
+        """Run the batched compute shader for a row of depth images in its own submission."""
+        command_encoder = self.device.create_command_encoder()
+        self.record_depth_batch(command_encoder, depth_frames)
         self.device.queue.submit([command_encoder.finish()])
+
+    def record_depth_batch(self, command_encoder: wgpu.GPUCommandEncoder, depth_frames: list[np.ndarray | None]):
+        """
+        Upload a row of depth images, one per camera, and record the batched compute pass over them.
+
+        Cameras whose image is None are neither uploaded nor processed and keep their points.
+        """
+        if not self.options.batched:
+            raise RuntimeError("record_depth_batch needs a DepthProcessor created with batched=True")
+
+        width, height = self.options.width, self.options.height
+        layers = [i for i, depth_frame in enumerate(depth_frames[:self.camera_count]) if depth_frame is not None]
+        if not layers:
+            return
+        for i in layers:
+            self.device.queue.write_texture(
+                {"texture": self.input_buffers[0].depth_texture, "origin": (0, 0, i)},
+                depth_frames[i],
+                {"bytes_per_row": width * 2, "rows_per_image": height},
+                (width, height, 1)
+            )
+        self.device.queue.write_buffer(self.layers_buffer, 0, np.array(layers, dtype=np.uint32))
+
+        if self.options.drop_invalid_points:
+            for i in layers:
+                command_encoder.clear_buffer(self.point_counts_buffer, 4 * i, 4)
+        compute_pass = command_encoder.begin_compute_pass()
+        compute_pass.set_pipeline(self.pipeline)
+        compute_pass.set_bind_group(0, self.compute_bind_groups[0])
+        # Sized for the finest camera, the threads past a coarser camera's grid return early
+        stride = min(self.lod_strides[i] for i in layers)
+        compute_pass.dispatch_workgroups(math.ceil(width / stride / 16), math.ceil(height / stride / 16), len(layers))
+        compute_pass.end()
+        if self.options.drop_invalid_points:
+            # Each camera's vertex_count is the number of points appended to its part
+            for i in layers:
+                command_encoder.copy_buffer_to_buffer(self.point_counts_buffer, 4 * i, self.output_buffers[i].draw_args_buffer, 0, 4)
         self.fps_counter.increment()
 
+    def set_lod_strides(self, strides: list[int]):
+        """Set the level-of-detail stride of every camera, used from the next recorded dispatch on."""
+        if len(strides) != self.camera_count:
+            raise ValueError(f"Expected {self.camera_count} strides, got {len(strides)}")
+        if not self.options.drop_invalid_points and any(s != 1 for s in strides):
+            # The skipped pixels would keep their previous points
+            raise RuntimeError("Level-of-detail strides need a DepthProcessor created with drop_invalid_points=True")
+
+        for i, stride in enumerate(strides):
+            if stride == self.lod_strides[i]:
+                continue
+            # lod_stride is the 28th float of the camera's Uniforms
+            if self.options.batched:
+                buffer, offset = self.output_buffers[i].camera_params_buffer, 208 * i + 108
+            else:
+                buffer, offset = self.output_buffers[i].camera_params_buffer, 108
+            self.device.queue.write_buffer(buffer, offset, np.array([stride], dtype=np.float32))
+
+        now = time.monotonic()
+        if strides != self.lod_strides or now - self._lod_emitted_at >= 1.0:
+            self.fps_counter.emit_event("lod", {f"lod_stride_{i}": s for i, s in enumerate(strides)})
+            self._lod_emitted_at = now
+        self.lod_strides = list(strides)
+
     def get_output_buffers(self) -> list[DepthOutputBuffers]:
         """Return the list of output buffers containing the generated point cloud data."""
         return self.output_buffers
@@ -212,9 +443,14 @@ class DepthProcessor:
             ob.tex_coord_buffer.destroy()
             ob.normal_buffer.destroy()
             ob.camera_params_buffer.destroy()
+            ob.draw_args_buffer.destroy()
+        for buffer in [self.point_counts_buffer, self.layers_buffer]:
+            if buffer is not None:
+                buffer.destroy()
             
         self.input_buffers.clear()
         self.output_buffers.clear()
+        self.compute_bind_groups.clear()
     
     def set_metrics_callback(self, callback):
         if self.fps_counter:
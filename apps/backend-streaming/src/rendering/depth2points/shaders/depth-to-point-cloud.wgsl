@@ -1,11 +1,25 @@
 override calculate_normals: bool = false;
+// Positions as float16x4 (two u32) and no tex coords, instead of float32x4 positions and tex coords
+override compact_vertices: bool = false;
+// Append only points with a valid depth and count them in DrawArgs, instead of one point per pixel
+override drop_invalid_points: bool = false;
 
 @group(0) @binding(0) var InputImage: texture_2d<u32>;
 @group(0) @binding(1) var XYLookupTable: texture_2d<f32>;
-@group(0) @binding(2) var<storage, read_write> OutputPositionImage: array<vec4<f32>>;
+@group(0) @binding(2) var<storage, read_write> OutputPositionImage: array<vec2<u32>>;
 @group(0) @binding(3) var<storage, read_write> OutputTexCoordImage: array<vec4<f32>>;
 @group(0) @binding(4) var<storage, read_write> OutputNormalImage: array<vec4<f32>>;
 
+// Arguments of the point draw, vertex_count is reset before every dispatch
+struct DrawIndirectArgs {
+    vertex_count: atomic<u32>,
+    instance_count: u32,
+    first_vertex: u32,
+    first_instance: u32,
+};
+
+@group(0) @binding(6) var<storage, read_write> DrawArgs: DrawIndirectArgs;
+
 struct Uniforms {
     depth_dim: vec2<f32>,
     color_dim: vec2<f32>,
@@ -15,8 +29,11 @@ struct Uniforms {
     depth_scale: f32,
     needs_projection: f32,
     image_origin: f32,
-    padding: f32,
+    // Only every lod_stride-th pixel in both directions becomes a point, needs drop_invalid_points
+    lod_stride: f32,
     color_distortion: array<vec4<f32>, 2>,
+    // Camera pose applied to the unprojected points, identity when a PointcloudTransformer does it
+    camera_to_world: mat4x4<f32>,
 };
 
 @group(0) @binding(5) var<uniform> uniforms: Uniforms;
@@ -27,11 +44,11 @@ fn isValidDepth(value: f32) -> bool {
 
 @compute @workgroup_size(32, 32)
 fn main(@builtin(global_invocation_id) global_id: vec3<u32>) {
-    let texel = vec2<i32>(global_id.xy);
+    let texel = vec2<i32>(global_id.xy) * max(i32(uniforms.lod_stride), 1);
     let size = vec2<i32>(i32(uniforms.depth_dim.x), i32(uniforms.depth_dim.y));
 
     if (texel.x < size.x && texel.y < size.y) {
-        let index = u32(texel.y * size.x + texel.x);
+        let pixel_index = u32(texel.y * size.x + texel.x);
 
         let px = f32(texel.x);
         let py = f32(texel.y);
@@ -40,12 +57,25 @@ fn main(@builtin(global_invocation_id) global_id: vec3<u32>) {
         let xy = textureLoad(XYLookupTable, texel, 0).xy;
 
         let depth = uniforms.depth_scale * nd;
+        var index = pixel_index;
+        if (drop_invalid_points) {
+            if (!isValidDepth(depth)) {
+                return;
+            }
+            index = atomicAdd(&DrawArgs.vertex_count, 1u);
+        }
         // kinect depth images and lookup tables have their origin in the upper-left corner
         // therefore the coordinates will be computed in y-down/x-right semantics
         // also z-dimension does not correspond with opengl semantics
         // therefore, we negate the y-axis and the z-axis which effectively is a 180 deg rotation around the x-axis
         let xyz = vec4<f32>(xy.x * depth, -xy.y * depth, -depth, 1.0);
-        OutputPositionImage[index] = xyz;
+        let position = uniforms.camera_to_world * xyz;
+        if (compact_vertices) {
+            OutputPositionImage[index] = vec2<u32>(pack2x16float(position.xy), pack2x16float(position.zw));
+        } else {
+            OutputPositionImage[2u * index] = bitcast<vec2<u32>>(position.xy);
+            OutputPositionImage[2u * index + 1u] = bitcast<vec2<u32>>(position.zw);
+        }
 
         let centerPosition = xyz.xyz;
         //Extra option to calculate normals using a north,south,west,east crossing
@@ -82,6 +112,10 @@ fn main(@builtin(global_invocation_id) global_id: vec3<u32>) {
             }
         }
 
+        if (compact_vertices) {
+            return;
+        }
+
         if (uniforms.needs_projection > 0.0) {
             var trans: vec4<f32>;
 
@@ -0,0 +1,64 @@
+import unittest
+
+import numpy as np
+
+from rendering.depth2points.lod import LodSelector, point_footprint, select_stride
+
+
+def view_from(z: float) -> np.ndarray:
+    # Viewer on the z axis looking down -z
+    view = np.eye(4)
+    view[2, 3] = -z
+    return view.T.flatten()
+
+
+# 90 degree vertical field of view
+PROJECTION = np.diag([1.0, 1.0, -1.0, 0.0])
+PROJECTION[2, 3], PROJECTION[3, 2] = -0.1, -1.0
+PROJECTION = PROJECTION.T.flatten()
+
+
+class TestPointFootprint(unittest.TestCase):
+    def test_footprint_shrinks_with_distance_and_viewport(self):
+        anchor = np.zeros(3)
+
+        near = point_footprint(anchor, 0.004, view_from(2.0), PROJECTION, 960)
+        far = point_footprint(anchor, 0.004, view_from(8.0), PROJECTION, 960)
+        small = point_footprint(anchor, 0.004, view_from(2.0), PROJECTION, 240)
+
+        self.assertAlmostEqual(near, 0.004 * 480 / 2.0)
+        self.assertAlmostEqual(far, near / 4)
+        self.assertAlmostEqual(small, near / 4)
+
+    def test_anchor_behind_viewer_has_no_footprint(self):
+        self.assertIsNone(point_footprint(np.array([0.0, 0.0, 3.0]), 0.004, view_from(2.0), PROJECTION, 960))
+
+
+class TestSelectStride(unittest.TestCase):
+    def test_strides(self):
+        self.assertEqual(select_stride(1.5), 1)
+        self.assertEqual(select_stride(0.9), 1)
+        self.assertEqual(select_stride(0.5), 2)
+        self.assertEqual(select_stride(0.3), 2)
+        self.assertEqual(select_stride(0.2), 4)
+        self.assertEqual(select_stride(0.01), 4)
+        self.assertEqual(select_stride(None), 1)
+
+
+class TestLodSelector(unittest.TestCase):
+    def test_picks_level_per_camera(self):
+        # Both cameras look down -z, their anchors are 2m in front of them
+        near_camera = np.eye(4)
+        far_camera = np.eye(4)
+        far_camera[2, 3] = -2.0
+        selector = LodSelector([near_camera, far_camera], focal_lengths=[500.0, 500.0])
+
+        strides = selector.select(view_from(1.0), PROJECTION, viewport_height=960)
+
+        # Anchors 3m and 5m away: 0.64 and 0.384 pixels between neighbouring points
+        self.assertEqual(strides, [1, 2])
+        self.assertEqual(selector.select(view_from(1.0), PROJECTION, viewport_height=480), [2, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+import numpy as np
+import wgpu
+from rich.console import Console
+
+from rendering.depth2points.processor import DepthProcessor, DepthProcessorOptions
+from streaming.zenoh_cdr import CameraModel
+
+WIDTH, HEIGHT = 8, 4
+
+
+class TestLodStrides(unittest.TestCase):
+    def setUp(self):
+        adapter = wgpu.gpu.request_adapter_sync(force_fallback_adapter=True)
+        if adapter is None:
+            self.skipTest("No fallback adapter")
+        self.device = adapter.request_device_sync()
+
+    def create_processor(self, camera_count: int, batched: bool) -> DepthProcessor:
+        camera = CameraModel(
+            camera_model=1, image_width=WIDTH, image_height=HEIGHT,
+            focal_length=[5.0, 5.0], principal_point=[WIDTH / 2, HEIGHT / 2],
+            tangential_coefficients=[0.0, 0.0], radial_coefficients=[0.0] * 8,
+        )
+        processor = DepthProcessor(self.device, DepthProcessorOptions(
+            width=WIDTH, height=HEIGHT, camera_params=[camera] * camera_count,
+            xy_lookup_tables=[np.zeros((HEIGHT, WIDTH, 2), dtype=np.float32)] * camera_count,
+            console=Console(quiet=True), batched=batched, drop_invalid_points=True,
+        ))
+        self.addCleanup(processor.fps_counter.stop)
+        return processor
+
+    def test_one_stride_per_camera(self):
+        # Fewer cameras than the four of the default rig
+        for batched in (False, True):
+            with self.subTest(batched=batched):
+                processor = self.create_processor(2, batched)
+
+                self.assertEqual((processor.camera_count, len(processor.output_buffers)), (2, 2))
+                processor.set_lod_strides([1, 2])
+                self.assertEqual(processor.lod_strides, [1, 2])
+                with self.assertRaises(ValueError):
+                    processor.set_lod_strides([1, 1, 1, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import wgpu
+from typing import Callable
+
+RecordStage = Callable[[wgpu.GPUCommandEncoder], None]
+
+
+class FrameGraph:
+    """
+    The GPU work of one frame as ordered stages sharing a single command encoder.
+
+    Stages are added while the frame is assembled and recorded in that order by
+    submit, which ends the frame with one queue submission. Queue writes a stage makes
+    while recording (texture and uniform uploads) are applied before that submission,
+    so a stage can upload its inputs and record the pass that reads them.
+    """
+
+    def __init__(self, device: wgpu.GPUDevice):
+        self.device = device
+        self.stages: list[tuple[str, RecordStage]] = []
+
+    def add_stage(self, name: str, record: RecordStage):
+        self.stages.append((name, record))
+
+    def submit(self):
+        """Record every stage into one command encoder and submit it."""
+        if not self.stages:
+            return
+        command_encoder = self.device.create_command_encoder()
+        for name, record in self.stages:
+            command_encoder.push_debug_group(name)
+            record(command_encoder)
+            command_encoder.pop_debug_group()
+        self.device.queue.submit([command_encoder.finish()])
+        self.stages.clear()
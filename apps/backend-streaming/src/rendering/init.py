@@ -3,8 +3,14 @@ from rendering.grid.renderer import GridRenderer
 from rendering.pointcloud.renderer import PointCloudRenderer
 from rendering.depth2points.processor import DepthProcessor, DepthProcessorOptions
 from rendering.pointcloud_transformer.transformer import PointcloudTransformer, PointcloudTransformerOptions
+from rendering.pointcloud_transformer.extrinsics_utils import derive_transform_from_extrinsics, transform_params_to_matrix
+from rendering.culling.culler import PointCuller, camera_bounds
+from rendering.depth2points.lod import LodSelector
+import wgpu
 from wgpu import gpu
-from rendering.renderer import Renderer
+from rendering.renderer import Renderer, world_point_buffers
+from rendering.readback import FrameReadback
+from rendering.yuv.converter import YuvConverter
 
 def init_wgpu(state: GlobalState):
     if state.canvas is None:
@@ -13,13 +19,26 @@ def init_wgpu(state: GlobalState):
     device = adapter.request_device_sync(required_limits=None)
     context = state.canvas.get_context("wgpu")
     render_texture_format = context.get_preferred_format(device.adapter)
-    context.configure(
-        device=device,
-        format=render_texture_format,
-    )
+    if state.gpu_yuv_conversion:
+        if not state.persistent_readback:
+            raise ValueError("GPU YUV conversion requires persistent readback")
+        # The converter samples the rendered frame
+        context.configure(
+            device=device,
+            format=render_texture_format,
+            usage=wgpu.TextureUsage.RENDER_ATTACHMENT | wgpu.TextureUsage.TEXTURE_BINDING,
+        )
+        state.set_yuv_converter(YuvConverter(device, render_texture_format))
+    else:
+        context.configure(
+            device=device,
+            format=render_texture_format,
+        )
     state.set_device(device)
     state.set_context(context)
     state.set_render_format(render_texture_format)
+    if state.persistent_readback:
+        state.set_frame_readback(FrameReadback(device))
     state.set_renderer(Renderer(state))
 
 def init_grid_renderer(state: GlobalState):
@@ -44,6 +63,9 @@ def init_pointcloud_transformer(state: GlobalState):
         raise ValueError("Camera descriptions are not initialized")
     if state.depth_processor is None:
         raise ValueError("Depth processor is not initialized")
+    if state.fused_depth_to_world:
+        state.console.log("Depth processor applies the camera poses, skipping the pointcloud transformer")
+        return
     state.set_pointcloud_transformer(PointcloudTransformer(state.device, PointcloudTransformerOptions(
         camera_sensors=state.camera_descriptions,
         input_buffers=[b.position_buffer for b in state.depth_processor.output_buffers],
@@ -72,6 +94,14 @@ def init_depth_processor(state: GlobalState):
         raise ValueError("Device is not initialized")
     if state.depth_xylt is None:
         raise ValueError("Depth XY lookup tables are not initialized")
+    if state.pointcloud_options is None:
+        raise ValueError("Pointcloud options are not initialized")
+    if state.batched_depth_processing and not state.fused_depth_to_world:
+        raise ValueError("Batched depth processing writes one output buffer set and needs fused_depth_to_world")
+    if state.pointcloud_options.compact_vertices and not state.fused_depth_to_world:
+        raise ValueError("Compact vertices can not be read by the pointcloud transformer and need fused_depth_to_world")
+    if state.point_lod and not state.drop_invalid_points:
+        raise ValueError("Level-of-detail strides leave stale points behind without drop_invalid_points")
     
     state.set_depth_processor(DepthProcessor(state.device, DepthProcessorOptions(
         width=state.camera_descriptions[0].depth_parameters.image_width,
@@ -79,4 +109,56 @@ def init_depth_processor(state: GlobalState):
         camera_params=[x.depth_parameters for x in state.camera_descriptions][:state.depth_camera_count],
         xy_lookup_tables=state.depth_xylt,
         console=state.console,
-    )))
\ No newline at end of file
+        camera_poses=(
+            [x.camera_pose for x in state.camera_descriptions][:state.depth_camera_count]
+            if state.fused_depth_to_world else None
+        ),
+        batched=state.batched_depth_processing,
+        compact_vertices=state.pointcloud_options.compact_vertices,
+        drop_invalid_points=state.drop_invalid_points,
+    )))
+
+    if state.point_lod:
+        depth_sensors = state.camera_descriptions[:state.depth_camera_count]
+        state.set_lod_selector(LodSelector(
+            camera_to_world=[transform_params_to_matrix(derive_transform_from_extrinsics(x.camera_pose)) for x in depth_sensors],
+            focal_lengths=[x.depth_parameters.focal_length[1] for x in depth_sensors],
+        ))
+        state.console.log("Depth grids are subsampled by the projected point footprint")
+
+def init_point_culler(state: GlobalState):
+    """Initialize the point culler, after the depth processor and pointcloud transformer."""
+    if state.console is None:
+        raise ValueError("Console is not initialized")
+    if state.culling_options is None:
+        return
+    if state.device is None:
+        raise ValueError("Device is not initialized")
+    if state.camera_descriptions is None:
+        raise ValueError("Camera descriptions are not initialized")
+    if state.depth_xylt is None:
+        raise ValueError("Depth XY lookup tables are not initialized")
+    if state.depth_processor is None:
+        raise ValueError("Depth processor is not initialized")
+    if state.pointcloud_options is None:
+        raise ValueError("Pointcloud options are not initialized")
+
+    options = state.culling_options
+    bounds = [
+        camera_bounds(
+            state.depth_xylt[i],
+            transform_params_to_matrix(derive_transform_from_extrinsics(state.camera_descriptions[i].camera_pose)),
+            options.max_camera_depth,
+        )
+        for i in range(state.depth_camera_count)
+    ]
+    state.set_point_culler(PointCuller(
+        state.device,
+        options,
+        world_point_buffers(state),
+        bounds,
+        state.depth_processor.points_per_output_buffer,
+        compact_vertices=state.pointcloud_options.compact_vertices,
+    ))
+    state.console.log(f"Culling points beyond {options.far_distance}m, region of interest: "
+                      f"{options.roi_min} to {options.roi_max}")
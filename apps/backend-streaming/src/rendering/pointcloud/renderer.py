@@ -13,6 +13,8 @@ import os
 class PointCloudRendererOptions:
     """Configuration options for the point cloud renderer."""
     enable_blending: bool
+    # float16x4 positions as the only vertex attribute, needs a DepthProcessor with compact_vertices
+    compact_vertices: bool
 
 
 def create_pointcloud_options(options: dict[str, Any] | None = None) -> PointCloudRendererOptions:
@@ -22,6 +24,7 @@ def create_pointcloud_options(options: dict[str, Any] | None = None) -> PointClo
     
     return PointCloudRendererOptions(
         enable_blending=options.get('enable_blending', True),
+        compact_vertices=options.get('compact_vertices', False),
     )
 
 # --------------------------------------------------------------------------------------------------
@@ -108,16 +111,25 @@ class PointCloudRenderer:
                 "alpha": {"src_factor": "one", "dst_factor": "one-minus-src-alpha", "operation": "add"},
             }
 
+        if self.options.compact_vertices:
+            vertex_entry_point = "main_compact"
+            vertex_buffers = [
+                {"array_stride": 8, "step_mode": "vertex", "attributes": [{"format": "float16x4", "offset": 0, "shader_location": 0}]}, # Position
+            ]
+        else:
+            vertex_entry_point = "main"
+            vertex_buffers = [
+                {"array_stride": 16, "step_mode": "vertex", "attributes": [{"format": "float32x4", "offset": 0, "shader_location": 0}]}, # Position
+                {"array_stride": 16, "step_mode": "vertex", "attributes": [{"format": "float32x4", "offset": 0, "shader_location": 1}]}, # Normal
+                {"array_stride": 16, "step_mode": "vertex", "attributes": [{"format": "float32x4", "offset": 0, "shader_location": 2}]}, # Tex Coords
+            ]
+
         self.pipeline = self.device.create_render_pipeline(
             layout=pipeline_layout,
             vertex={
                 "module": vertex_module,
-                "entry_point": "main",
-                "buffers": [
-                    {"array_stride": 16, "step_mode": "vertex", "attributes": [{"format": "float32x4", "offset": 0, "shader_location": 0}]}, # Position
-                    {"array_stride": 16, "step_mode": "vertex", "attributes": [{"format": "float32x4", "offset": 0, "shader_location": 1}]}, # Normal
-                    {"array_stride": 16, "step_mode": "vertex", "attributes": [{"format": "float32x4", "offset": 0, "shader_location": 2}]}, # Tex Coords
-                ],
+                "entry_point": vertex_entry_point,
+                "buffers": vertex_buffers,
             },
             fragment={
                 "module": fragment_module,
@@ -177,13 +189,20 @@ class PointCloudRenderer:
 
 
     def render(self, command_encoder, render_pass, point_cloud_buffers: list[DepthOutputBuffers], pixel_count: int):
-        """Record rendering commands for the point clouds."""
+        """Record rendering commands for the point clouds; pixel_count is drawn for buffers without draw arguments."""
         render_pass.set_pipeline(self.pipeline)
         render_pass.set_bind_group(0, self.bind_group)
         
         # Iterate and draw the point cloud for each buffer set provided.
         for buffers in point_cloud_buffers:
             render_pass.set_vertex_buffer(0, buffers.position_buffer)
-            render_pass.set_vertex_buffer(1, buffers.normal_buffer)
-            render_pass.set_vertex_buffer(2, buffers.tex_coord_buffer)
-            render_pass.draw(pixel_count)
+            if not self.options.compact_vertices:
+                render_pass.set_vertex_buffer(1, buffers.normal_buffer)
+                render_pass.set_vertex_buffer(2, buffers.tex_coord_buffer)
+            if buffers.index_buffer is not None:
+                render_pass.set_index_buffer(buffers.index_buffer, wgpu.IndexFormat.uint32)
+                render_pass.draw_indexed_indirect(buffers.draw_args_buffer, 0)
+            elif buffers.draw_args_buffer is not None:
+                render_pass.draw_indirect(buffers.draw_args_buffer, 0)
+            else:
+                render_pass.draw(pixel_count)
@@ -26,6 +26,16 @@ fn main(
     @location(1) normal: vec4<f32>,
     @location(2) textureCoords: vec4<f32>
 ) -> VertexOutput {
+    return shade_point(position, normal, textureCoords);
+}
+
+// Compact vertex layout: float16x4 positions only, without normals and tex coords
+@vertex
+fn main_compact(@location(0) position: vec4<f32>) -> VertexOutput {
+    return shade_point(position, vec4<f32>(0.0, 0.0, 0.0, 0.0), vec4<f32>(0.0, 0.0, 0.0, 0.0));
+}
+
+fn shade_point(position: vec4<f32>, normal: vec4<f32>, textureCoords: vec4<f32>) -> VertexOutput {
     var output: VertexOutput;
     
     // Skip rendering points with zero depth (invalid points)
@@ -1,6 +1,8 @@
 import math
 from dataclasses import dataclass, field
 
+import numpy as np
+
 from streaming.zenoh_cdr import CameraModel, CameraSensor, RigidTransform
 
 @dataclass
@@ -66,3 +68,20 @@ def create_normalized_transform_params(
         padding=padding or 0.0,
     )
 
+def transform_params_to_matrix(params: TransformParams) -> np.ndarray:
+    """
+    4x4 camera-to-world matrix (column vectors) doing what pointcloud-transform.wgsl does per point.
+
+    That shader rotates by the conjugate quaternion, built into a mat3x3 from rows
+    written as columns, and then adds the translation; without valid extrinsics it
+    only translates.
+    """
+    matrix = np.eye(4, dtype=np.float32)
+    matrix[:3, 3] = params.translation
+    if math.sqrt(sum(c * c for c in params.rotation)) <= 0.001:
+        return matrix
+    x, y, z, w = normalize_quaternion([-params.rotation[0], -params.rotation[1], -params.rotation[2], params.rotation[3]])
+    matrix[:3, 0] = [1.0 - 2.0 * (y * y + z * z), 2.0 * (x * y - w * z), 2.0 * (x * z + w * y)]
+    matrix[:3, 1] = [2.0 * (x * y + w * z), 1.0 - 2.0 * (x * x + z * z), 2.0 * (y * z - w * x)]
+    matrix[:3, 2] = [2.0 * (x * z - w * y), 2.0 * (y * z + w * x), 1.0 - 2.0 * (x * x + y * y)]
+    return matrix
@@ -24,6 +24,7 @@ class TransformBuffers:
     input_buffer: wgpu.GPUBuffer
     output_buffer: wgpu.GPUBuffer
     transform_params_buffer: wgpu.GPUBuffer
+    compute_bind_group: wgpu.GPUBindGroup
 
 @dataclass
 class CameraBuffer:
@@ -87,6 +88,11 @@ class PointcloudTransformer:
                 input_buffer=self.options.input_buffers[i],
                 output_buffer=created_buffers["output_buffer"],
                 transform_params_buffer=created_buffers["transform_params_buffer"],
+                compute_bind_group=self._create_bind_group(
+                    input_buffer=self.options.input_buffers[i],
+                    output_buffer=created_buffers["output_buffer"],
+                    transform_params_buffer=created_buffers["transform_params_buffer"],
+                ),
             )
 
             self._write_transform_params(
@@ -117,6 +123,22 @@ class PointcloudTransformer:
         )
         return {"output_buffer": output_buffer, "transform_params_buffer": transform_params_buffer}
 
+    def _create_bind_group(
+        self,
+        input_buffer: wgpu.GPUBuffer,
+        output_buffer: wgpu.GPUBuffer,
+        transform_params_buffer: wgpu.GPUBuffer,
+    ) -> wgpu.GPUBindGroup:
+        """Creates the compute bind group of a single camera, built once with its buffers."""
+        return self.device.create_bind_group(
+            layout=self.pipeline.get_bind_group_layout(0),
+            entries=[
+                {"binding": 0, "resource": {"buffer": input_buffer}},
+                {"binding": 1, "resource": {"buffer": output_buffer}},
+                {"binding": 2, "resource": {"buffer": transform_params_buffer}},
+            ],
+        )
+
     def _write_transform_params(self, buffer: wgpu.GPUBuffer, params: TransformParams):
         """Writes the transform parameters (rotation, translation) to a GPU buffer."""
         transform_array = np.array([
@@ -127,25 +149,21 @@ class PointcloudTransformer:
         self.device.queue.write_buffer(buffer, 0, transform_array)
 
     def _transform_pointcloud(self, camera_index: int):
-        """Internal method to run the compute pass for a single camera."""
-        buffers = self._camera_buffers[camera_index].buffers
-        
+        """Internal method to run the compute pass for a single camera in its own submission."""
         command_encoder = self.device.create_command_encoder()
-        compute_bind_group = self.device.create_bind_group(
-            layout=self.pipeline.get_bind_group_layout(0),
-            entries=[
-                {"binding": 0, "resource": {"buffer": buffers.input_buffer}},
-                {"binding": 1, "resource": {"buffer": buffers.output_buffer}},
-                {"binding": 2, "resource": {"buffer": buffers.transform_params_buffer}},
-            ],
-        )
+        self.record_single(command_encoder, camera_index)
+        self.device.queue.submit([command_encoder.finish()])
+
+    def record_single(self, command_encoder: wgpu.GPUCommandEncoder, camera_index: int):
+        """Records the transform compute pass for a single camera into command_encoder."""
+        buffers = self._camera_buffers[camera_index].buffers
+
         compute_pass = command_encoder.begin_compute_pass()
         compute_pass.set_pipeline(self.pipeline)
-        compute_pass.set_bind_group(0, compute_bind_group)
+        compute_pass.set_bind_group(0, buffers.compute_bind_group)
         workgroups = (self.pixel_count + 63) // 64  # Ceiling division
         compute_pass.dispatch_workgroups(workgroups, 1, 1)
         compute_pass.end()
-        self.device.queue.submit([command_encoder.finish()])
         self.fps_counter.increment()
 
     def process_single(self, camera_index: int):
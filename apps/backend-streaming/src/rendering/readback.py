@@ -0,0 +1,136 @@
+import numpy as np
+import wgpu
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class ReadbackSlot:
+    """A staging buffer and the numpy array its frame is copied into."""
+    buffer: wgpu.GPUBuffer
+    size: tuple[int, int]
+    bytes_per_row: int
+    frame: np.ndarray
+    # Layout a buffer copy was recorded with, None for texture copies
+    layout: Any = None
+    # Set from the submission of the copy until the frame was collected
+    promise: wgpu.GPUPromise | None = None
+
+
+class FrameReadback:
+    """
+    Reads the rendered frames back through a ring of persistent MAP_READ staging buffers.
+
+    The copy of frame N is recorded into the frame's submission and its buffer mapped
+    asynchronously right after. The frame is only collected, copied into the slot's
+    reusable numpy array and unmapped, after frame N+1 was submitted, so the GPU
+    copies frame N while frame N+1 is recorded and the wait is normally over by then.
+    latest() never waits; an array it returns is rewritten `slots` frames later.
+
+    Frames are either RGBA textures (record_copy), collected as (height, width, 4)
+    arrays, or buffers the frame was converted into on the GPU (record_buffer_copy),
+    collected as flat byte arrays together with the layout they were recorded with.
+    """
+
+    def __init__(self, device: wgpu.GPUDevice, slots: int = 3):
+        if slots < 2:
+            raise ValueError("At least two slots are needed to read back one frame while the next renders")
+        self.device = device
+        self.slots: list[ReadbackSlot | None] = [None] * slots
+        self.next_slot = 0
+        # Slot whose copy was submitted but not collected yet
+        self.pending_slot: int | None = None
+        # Frame and layout of the most recently collected slot, replaced as one
+        self.latest_frame: tuple[np.ndarray, Any] | None = None
+        self.copy_recorded = False
+
+    def _ensure_slot(self, index: int, size: tuple[int, int], bytes_per_row: int, shape: tuple[int, ...]) -> ReadbackSlot:
+        """Return the slot, (re)created for frames of size."""
+        slot = self.slots[index]
+        if slot is not None and slot.size == size and slot.frame.shape == shape:
+            return slot
+        if slot is not None:
+            slot.buffer.destroy()
+        slot = ReadbackSlot(
+            buffer=self.device.create_buffer(
+                size=bytes_per_row * size[1],
+                usage=wgpu.BufferUsage.MAP_READ | wgpu.BufferUsage.COPY_DST,
+            ),
+            size=size,
+            bytes_per_row=bytes_per_row,
+            frame=np.empty(shape, dtype=np.uint8),
+        )
+        self.slots[index] = slot
+        return slot
+
+    def record_copy(self, command_encoder: wgpu.GPUCommandEncoder, texture: wgpu.GPUTexture):
+        """Record the copy of the rendered texture (4 bytes per pixel) into the next staging buffer."""
+        width, height, _ = texture.size
+        bytes_per_row = (width * 4 + 255) & ~255 # copy_texture_to_buffer needs 256 byte aligned rows
+        slot = self._ensure_slot(self.next_slot, (width, height), bytes_per_row, (height, width, 4))
+        slot.layout = None
+        command_encoder.copy_texture_to_buffer(
+            {"texture": texture},
+            {"buffer": slot.buffer, "bytes_per_row": slot.bytes_per_row, "rows_per_image": height},
+            (width, height, 1),
+        )
+        self.copy_recorded = True
+
+    def record_buffer_copy(self, command_encoder: wgpu.GPUCommandEncoder, buffer: wgpu.GPUBuffer, size: int, layout: Any):
+        """Record the copy of the first size bytes (a multiple of 4) of buffer into the next staging buffer."""
+        slot = self._ensure_slot(self.next_slot, (size, 1), size, (size,))
+        slot.layout = layout
+        command_encoder.copy_buffer_to_buffer(buffer, 0, slot.buffer, 0, size)
+        self.copy_recorded = True
+
+    def submitted(self):
+        """Call after the submission holding the copy: map its buffer and collect the previous frame."""
+        if not self.copy_recorded:
+            return
+        self.copy_recorded = False
+        slot = self.slots[self.next_slot]
+        previous = self.pending_slot
+        slot.promise = slot.buffer.map_async(wgpu.MapMode.READ)
+        self.pending_slot = self.next_slot
+        self.next_slot = (self.next_slot + 1) % len(self.slots)
+        if previous is not None:
+            self._collect(previous)
+
+    def collect(self):
+        """Wait for the pending frame and publish it."""
+        if self.pending_slot is not None:
+            self._collect(self.pending_slot)
+            self.pending_slot = None
+
+    def _collect(self, index: int):
+        slot = self.slots[index]
+        if slot is None or slot.promise is None:
+            return
+        slot.promise.sync_wait()
+        slot.promise = None
+        mapped = np.frombuffer(slot.buffer.read_mapped(copy=False), dtype=np.uint8)
+        if slot.layout is not None:
+            np.copyto(slot.frame, mapped)
+        else:
+            width, height = slot.size
+            np.copyto(slot.frame, mapped.reshape(height, slot.bytes_per_row)[:, :width * 4].reshape(height, width, 4))
+        slot.buffer.unmap()
+        self.latest_frame = (slot.frame, slot.layout)
+
+    def latest(self) -> np.ndarray | None:
+        """The most recently collected frame, without waiting."""
+        latest_frame = self.latest_frame
+        return None if latest_frame is None else latest_frame[0]
+
+    def latest_with_layout(self) -> tuple[np.ndarray, Any] | None:
+        """The most recently collected frame and the layout its copy was recorded with, without waiting."""
+        return self.latest_frame
+
+    def destroy(self):
+        """Clean up the staging buffers."""
+        self.collect()
+        for slot in self.slots:
+            if slot is not None:
+                slot.buffer.destroy()
+        self.slots = [None] * len(self.slots)
+        self.latest_frame = None
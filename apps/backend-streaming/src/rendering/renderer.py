@@ -1,9 +1,16 @@
 from rendering.depth2points.processor import DepthOutputBuffers
+from rendering.frame_graph import FrameGraph
+from rendering.yuv.converter import yuv420_video_frame
 import wgpu
 from typing import Callable, Any
 from dataclasses import dataclass
 from core.state import GlobalState
 import numpy as np
+import av
+from queue import Empty
+
+# How long render_frame waits for a new row before drawing the previous one again
+ROW_WAIT_SECONDS = 0.1
 
 @dataclass
 class RenderResources:
@@ -12,13 +19,14 @@ class RenderResources:
 
 
 def create_render_resources(state: GlobalState) -> RenderResources:
-    # Cache for depth texture to avoid recreating it every frame if size hasn't changed
+    # Cache for depth texture and its view to avoid recreating them every frame if size hasn't changed
     cached_depth_texture = None
+    cached_depth_view = None
     cached_size = None
     
     def create_render_pass_descriptor() -> dict[str, Any]:
         """Create render pass descriptor for each frame."""
-        nonlocal cached_depth_texture, cached_size
+        nonlocal cached_depth_texture, cached_depth_view, cached_size
         
         if state.context is None:
             raise RuntimeError("Context is not initialized")
@@ -38,6 +46,7 @@ def create_render_resources(state: GlobalState) -> RenderResources:
                 format=wgpu.TextureFormat.depth24plus,
                 usage=wgpu.TextureUsage.RENDER_ATTACHMENT,
             )
+            cached_depth_view = cached_depth_texture.create_view()
             cached_size = current_size
         
         return {
@@ -50,7 +59,7 @@ def create_render_resources(state: GlobalState) -> RenderResources:
                 }
             ],
             "depth_stencil_attachment": {
-                "view": cached_depth_texture.create_view(),
+                "view": cached_depth_view,
                 "depth_clear_value": 1.0,
                 "depth_load_op": wgpu.LoadOp.clear,
                 "depth_store_op": wgpu.StoreOp.store,
@@ -62,6 +71,24 @@ def create_render_resources(state: GlobalState) -> RenderResources:
     )
 
 
+def world_point_buffers(state: GlobalState) -> list[DepthOutputBuffers]:
+    """The buffer sets holding world-space points, from the transformer when there is one."""
+    pointcloud_buffers = state.depth_processor.get_output_buffers()
+    if state.pointcloud_transformer is None:
+        return pointcloud_buffers
+    pointcloud_position_buffers = state.pointcloud_transformer.output_buffers
+    return [
+        DepthOutputBuffers(
+            position_buffer=pointcloud_position_buffers[i],
+            normal_buffer=b.normal_buffer,
+            tex_coord_buffer=b.tex_coord_buffer,
+            camera_params_buffer=b.camera_params_buffer,
+            draw_args_buffer=b.draw_args_buffer,
+        )
+        for i, b in enumerate(pointcloud_buffers)
+    ]
+
+
 class Renderer:
     def __init__(self, state: GlobalState):
         self.state: GlobalState = state
@@ -71,87 +98,193 @@ class Renderer:
         self.color_camera_count: int = state.color_camera_count
         self.depth_camera_count: int = state.depth_camera_count
         self.canvas: Any = None
+        # Generation of the frame whose points each depth camera's output buffers hold
+        self.depth_generations: list[int | None] = [None] * state.depth_camera_count
+        # Frames the current frame graph uploads, by tetris buffer index, released once it is submitted
+        self.uploaded_frames: list[tuple[int, np.ndarray]] = []
+        # Read back frame next_video_frame() last converted
+        self.video_frame_source: tuple[np.ndarray, Any] | None = None
         if state.camera_descriptions and len(state.camera_descriptions) > 0:
             depth_params = state.camera_descriptions[0].depth_parameters
             self.pixel_count: int = depth_params.image_width * depth_params.image_height
         else:
             self.pixel_count: int = 0
 
-    def update_images(self):
-        images = self.state.display_queues.get()
-        if images is None or len(images) != self.depth_camera_count + self.color_camera_count:
-            return
+    def update_images(self, frame_graph: FrameGraph) -> list[int]:
+        """Add upload and compute stages for the cameras with a new frame in the latest row and return those cameras."""
+        if self.state.display_rows is None:
+            return []
+        try:
+            # Always the freshest complete row; waiting a little paces the loop to the cameras
+            row = self.state.display_rows.get_latest(timeout=ROW_WAIT_SECONDS)
+        except Empty:
+            return []
+        if len(row.images) != self.depth_camera_count + self.color_camera_count:
+            return []
         if self.state.depth_processor is None:
-            return
-        if self.state.pointcloud_transformer is None:
-            return
-        for i in range(self.depth_camera_count):
-            self.state.depth_processor.process_depth_data(i, images[self.color_camera_count + i])
-        self.state.pointcloud_transformer.process_all()
+            return []
+        depth_processor = self.state.depth_processor
+        pointcloud_transformer = self.state.pointcloud_transformer
+        # Cameras whose frame did not change, or whose stream stopped, keep the points
+        # already in their output buffers
+        changed = [
+            i for i in range(self.depth_camera_count)
+            if not row.missing[self.color_camera_count + i]
+            and row.generations[self.color_camera_count + i] != self.depth_generations[i]
+        ]
+        for i in changed:
+            self.depth_generations[i] = row.generations[self.color_camera_count + i]
+            self.uploaded_frames.append((self.color_camera_count + i, row.images[self.color_camera_count + i]))
+        if depth_processor.options.batched:
+            # One dispatch over the layers of the changed cameras
+            if changed:
+                images = [row.images[self.color_camera_count + i] if i in changed else None for i in range(self.depth_camera_count)]
+                frame_graph.add_stage("depth", lambda encoder: depth_processor.record_depth_batch(encoder, images))
+            return changed
+        for i in changed:
+            image = row.images[self.color_camera_count + i]
+            frame_graph.add_stage(
+                f"depth {i}",
+                lambda encoder, i=i, image=image: depth_processor.record_depth_data(encoder, i, image),
+            )
+            # Without a transformer the depth processor already wrote world-space points
+            if pointcloud_transformer is not None:
+                frame_graph.add_stage(
+                    f"transform {i}",
+                    lambda encoder, i=i: pointcloud_transformer.record_single(encoder, i),
+                )
+        return changed
 
     def render_frame(self):
         if (self.state.remote_camera is None or 
             self.state.device is None or 
             self.state.depth_processor is None or
             self.state.grid_renderer is None or
-            self.state.pointcloud_transformer is None or
             self.state.pointcloud_renderer is None):
             return
 
         view_matrix = self.state.remote_camera.get_view_matrix()
         projection_matrix = self.state.remote_camera.get_projection_matrix()
 
-        self.update_images()
-
-        try:
-            command_encoder = self.state.device.create_command_encoder()
-            render_pass = command_encoder.begin_render_pass(
-                **self.render_resources.create_render_pass_descriptor()
+        if self.state.lod_selector is not None and self.state.canvas is not None:
+            # Cameras whose frame did not change keep their points at the previous level
+            strides = self.state.lod_selector.select(
+                view_matrix, projection_matrix, self.state.canvas.get_physical_size()[1],
             )
+            self.state.depth_processor.set_lod_strides(strides)
 
-            pointcloud_buffers = self.state.depth_processor.get_output_buffers()
-            pointcloud_position_buffers = self.state.pointcloud_transformer.output_buffers
-
-            final_pointcloud_buffers: list[DepthOutputBuffers] = [
-                DepthOutputBuffers(
-                    position_buffer=pointcloud_position_buffers[i],
-                    normal_buffer=b.normal_buffer,
-                    tex_coord_buffer=b.tex_coord_buffer,
-                    camera_params_buffer=b.camera_params_buffer
-                )
-                for i, b in enumerate(pointcloud_buffers)
-            ]
-            
-            # Update camera matrices
-            self.state.grid_renderer.update_camera(
-                view_matrix=view_matrix,
-                projection_matrix=projection_matrix
-            )
-            self.state.pointcloud_renderer.update_camera(
-                view_matrix=view_matrix,
-                projection_matrix=projection_matrix
+        # Depth upload, depth-to-points, transform and render share one submission
+        frame_graph = FrameGraph(self.state.device)
+        changed = self.update_images(frame_graph)
+        point_culler = self.state.point_culler
+        if point_culler is not None:
+            # Filled by the cull stage, which is recorded before the render stage;
+            # there is one culled buffer set per depth camera
+            point_cloud_buffers: list[DepthOutputBuffers] = []
+            frame_graph.add_stage(
+                "cull",
+                lambda encoder: point_cloud_buffers.extend(
+                    point_culler.record(encoder, view_matrix, projection_matrix, changed)
+                ),
             )
+        else:
+            point_cloud_buffers = world_point_buffers(self.state)
+        frame_graph.add_stage(
+            "render",
+            lambda encoder: self._record_render(encoder, view_matrix, projection_matrix, point_cloud_buffers),
+        )
+        frame_readback = self.state.frame_readback
+        if frame_readback is not None:
+            frame_graph.add_stage("readback", self._record_readback)
 
-            # Render grid and pointcloud
-            self.state.grid_renderer.render(command_encoder, render_pass)
-            
-            self.state.pointcloud_renderer.render(
-                command_encoder,
-                render_pass,
-                final_pointcloud_buffers,
-                self.pixel_count
-            )
-            
-            render_pass.end()
-            self.state.device.queue.submit([command_encoder.finish()])
-            
+        try:
+            frame_graph.submit()
+            if frame_readback is not None:
+                # Maps this frame and publishes the previous one, whose copy is done by now
+                frame_readback.submitted()
         except Exception as e:
             print(f"Error during frame rendering: {e}")
+        finally:
+            # The queue writes of the upload stages copied the frames, their decoders can reuse them
+            for buffer_index, frame in self.uploaded_frames:
+                self.state.release_frame(buffer_index, frame)
+            self.uploaded_frames.clear()
+
+    def _record_readback(self, command_encoder: wgpu.GPUCommandEncoder):
+        texture = self.state.context.get_current_texture()
+        if self.state.yuv_converter is None:
+            self.state.frame_readback.record_copy(command_encoder, texture)
+            return
+        planes_buffer, layout = self.state.yuv_converter.record(command_encoder, texture)
+        self.state.frame_readback.record_buffer_copy(command_encoder, planes_buffer, layout.size, layout)
+
+    def _record_render(
+        self,
+        command_encoder: wgpu.GPUCommandEncoder,
+        view_matrix: np.ndarray,
+        projection_matrix: np.ndarray,
+        point_cloud_buffers: list[DepthOutputBuffers],
+    ):
+        render_pass = command_encoder.begin_render_pass(
+            **self.render_resources.create_render_pass_descriptor()
+        )
+
+        # Update camera matrices
+        self.state.grid_renderer.update_camera(
+            view_matrix=view_matrix,
+            projection_matrix=projection_matrix
+        )
+        self.state.pointcloud_renderer.update_camera(
+            view_matrix=view_matrix,
+            projection_matrix=projection_matrix
+        )
+
+        # Render grid and pointcloud
+        self.state.grid_renderer.render(command_encoder, render_pass)
+
+        self.state.pointcloud_renderer.render(
+            command_encoder,
+            render_pass,
+            point_cloud_buffers,
+            self.state.depth_processor.points_per_output_buffer
+        )
+
+        render_pass.end()
 
     def draw_frame(self) -> np.ndarray | None:
+        if self.state.frame_readback is not None:
+            # The frame last read back by the render loop, never waits for the GPU
+            latest = self.state.frame_readback.latest_with_layout()
+            if latest is None or latest[1] is not None:
+                # Read back as YUV planes, see next_video_frame()
+                return None
+            return latest[0]
         if self.state.canvas is None:
             return None
         return np.asarray(self.state.canvas.draw())
 
+    def next_video_frame(self) -> av.VideoFrame | None:
+        """The frame rendered since the last call as a yuv420p VideoFrame, None if there is no new one."""
+        frame_readback = self.state.frame_readback
+        if frame_readback is not None:
+            latest = frame_readback.latest_with_layout()
+            if latest is None or latest is self.video_frame_source:
+                return None
+            self.video_frame_source = latest
+            data, layout = latest
+            if layout is not None:
+                # Planes converted on the GPU need no swscale pass
+                return yuv420_video_frame(data, layout)
+            rgba = data
+        elif self.state.canvas is not None:
+            rgba = np.asarray(self.state.canvas.draw())
+        else:
+            return None
+        return av.VideoFrame.from_ndarray(rgba, format="rgba").reformat(
+            format="yuv420p",
+            dst_color_range=1,
+            dst_colorspace=1,
+        )
+
     def resize(self, canvas: Any):
         self.canvas: Any = canvas
\ No newline at end of file
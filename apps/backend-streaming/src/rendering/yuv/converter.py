@@ -0,0 +1,183 @@
+from dataclasses import dataclass
+from typing import Literal
+import numpy as np
+import wgpu
+import av
+import os
+import math
+
+YuvMatrix = Literal["bt601", "bt709"]
+
+# Limited range (Y 16..235, U/V 16..240) rows for 0..255 RGB: coefficients of R, G, B and offset
+YUV_MATRICES: dict[YuvMatrix, np.ndarray] = {
+    "bt601": np.array([
+        [0.256788, 0.504129, 0.097906, 16.0],
+        [-0.148223, -0.290993, 0.439216, 128.0],
+        [0.439216, -0.367788, -0.071427, 128.0],
+    ], dtype=np.float32),
+    "bt709": np.array([
+        [0.182586, 0.614231, 0.062007, 16.0],
+        [-0.100644, -0.338572, 0.439216, 128.0],
+        [0.439216, -0.398942, -0.040274, 128.0],
+    ], dtype=np.float32),
+}
+
+# --------------------------------------------------------------------------------------------------
+# Plane Layout
+# --------------------------------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Yuv420Layout:
+    """Where the Y, U and V planes of a frame are in the converter's output buffer (bytes)."""
+    width: int
+    height: int
+    y_stride: int
+    chroma_stride: int
+    u_offset: int
+    v_offset: int
+    size: int
+
+
+def yuv420_layout(width: int, height: int) -> Yuv420Layout:
+    """Plane layout for a frame; rows are padded to the 8x2 pixel blocks the shader writes."""
+    y_stride = (width + 7) & ~7
+    chroma_stride = y_stride // 2
+    y_rows = (height + 1) & ~1
+    chroma_rows = y_rows // 2
+    u_offset = y_stride * y_rows
+    v_offset = u_offset + chroma_stride * chroma_rows
+    return Yuv420Layout(
+        width=width,
+        height=height,
+        y_stride=y_stride,
+        chroma_stride=chroma_stride,
+        u_offset=u_offset,
+        v_offset=v_offset,
+        size=v_offset + chroma_stride * chroma_rows,
+    )
+
+
+def yuv420_video_frame(data: np.ndarray, layout: Yuv420Layout) -> av.VideoFrame:
+    """Build a yuv420p VideoFrame from the planes in data, copying rows without swscale."""
+    frame = av.VideoFrame(layout.width, layout.height, "yuv420p")
+    chroma_width, chroma_height = (layout.width + 1) // 2, (layout.height + 1) // 2
+    planes = [
+        (layout.width, layout.height, 0, layout.y_stride),
+        (chroma_width, chroma_height, layout.u_offset, layout.chroma_stride),
+        (chroma_width, chroma_height, layout.v_offset, layout.chroma_stride),
+    ]
+    for plane, (width, height, offset, stride) in zip(frame.planes, planes):
+        source = data[offset:offset + stride * height].reshape(height, stride)[:, :width]
+        target = np.frombuffer(plane, dtype=np.uint8).reshape(-1, plane.line_size)[:height, :width]
+        np.copyto(target, source)
+    return frame
+
+
+def copy_video_frame(frame: av.VideoFrame) -> av.VideoFrame:
+    """Copy of frame with its own planes, for a consumer that modifies the frames it gets."""
+    copy = av.VideoFrame(frame.width, frame.height, frame.format.name)
+    for source_plane, target_plane in zip(frame.planes, copy.planes):
+        row_bytes = min(source_plane.line_size, target_plane.line_size)
+        source = np.frombuffer(source_plane, dtype=np.uint8).reshape(-1, source_plane.line_size)
+        target = np.frombuffer(target_plane, dtype=np.uint8).reshape(-1, target_plane.line_size)
+        np.copyto(target[:, :row_bytes], source[:, :row_bytes])
+    copy.pts = frame.pts
+    if frame.time_base is not None:
+        copy.time_base = frame.time_base
+    copy.color_range = frame.color_range
+    copy.colorspace = frame.colorspace
+    return copy
+
+# --------------------------------------------------------------------------------------------------
+# YUV Converter Class
+# --------------------------------------------------------------------------------------------------
+
+class YuvConverter:
+    """
+    Converts the rendered RGBA frame into planar YUV 4:2:0 with a compute pass.
+
+    Y is converted per pixel and U and V from the mean color of each 2x2 block,
+    with the limited range matrix given. The planes end up one after another in a
+    storage buffer (see Yuv420Layout) that is read back instead of the RGBA frame.
+
+    Texels of an sRGB frame format are encoded back to sRGB before the conversion,
+    so the stored bytes are converted like the CPU conversion of the read back frame
+    did. The frame texture needs TEXTURE_BINDING usage.
+    """
+
+    def __init__(self, device: wgpu.GPUDevice, frame_format: str, matrix: YuvMatrix = "bt709"):
+        self.device = device
+        self.frame_format = frame_format
+        self.matrix = matrix
+        self.layout: Yuv420Layout | None = None
+        self.planes_buffer: wgpu.GPUBuffer | None = None
+        self.bind_group: wgpu.GPUBindGroup | None = None
+        self.texture: wgpu.GPUTexture | None = None
+
+        shader_path = os.path.join(os.path.dirname(__file__), 'shaders', 'rgba-to-yuv420.wgsl')
+        with open(shader_path, 'r') as f:
+            compute_module = self.device.create_shader_module(code=f.read())
+
+        self.pipeline = self.device.create_compute_pipeline(
+            layout='auto',
+            compute={"module": compute_module, "entry_point": "main"},
+        )
+
+        self.uniform_buffer = self.device.create_buffer(
+            size=80, # Must match shader uniform struct size
+            usage=wgpu.BufferUsage.UNIFORM | wgpu.BufferUsage.COPY_DST
+        )
+
+    def _ensure_resources(self, texture: wgpu.GPUTexture):
+        """(Re)create the planes buffer and bind group when the frame texture or its size changes."""
+        width, height, _ = texture.size
+        if texture is self.texture and self.layout is not None and (self.layout.width, self.layout.height) == (width, height):
+            return
+
+        layout = yuv420_layout(width, height)
+        if self.layout != layout:
+            if self.planes_buffer is not None:
+                self.planes_buffer.destroy()
+            self.planes_buffer = self.device.create_buffer(
+                size=layout.size,
+                usage=wgpu.BufferUsage.STORAGE | wgpu.BufferUsage.COPY_SRC
+            )
+            params = np.zeros(20, dtype=np.float32)
+            params[0:8].view(np.uint32)[:] = [
+                width, height,
+                layout.y_stride // 4, layout.chroma_stride // 4, layout.u_offset // 4, layout.v_offset // 4,
+                int(self.frame_format.endswith("-srgb")), 0,
+            ]
+            params[8:20] = YUV_MATRICES[self.matrix].flatten()
+            self.device.queue.write_buffer(self.uniform_buffer, 0, params)
+            self.layout = layout
+
+        self.bind_group = self.device.create_bind_group(
+            layout=self.pipeline.get_bind_group_layout(0),
+            entries=[
+                {"binding": 0, "resource": texture.create_view()},
+                {"binding": 1, "resource": {"buffer": self.planes_buffer}},
+                {"binding": 2, "resource": {"buffer": self.uniform_buffer}},
+            ]
+        )
+        self.texture = texture
+
+    def record(self, command_encoder: wgpu.GPUCommandEncoder, texture: wgpu.GPUTexture) -> tuple[wgpu.GPUBuffer, Yuv420Layout]:
+        """Record the conversion of texture and return the buffer the planes are written to and their layout."""
+        self._ensure_resources(texture)
+        width, height, _ = texture.size
+        compute_pass = command_encoder.begin_compute_pass()
+        compute_pass.set_pipeline(self.pipeline)
+        compute_pass.set_bind_group(0, self.bind_group)
+        compute_pass.dispatch_workgroups(math.ceil(width / 64), math.ceil(height / 16), 1)
+        compute_pass.end()
+        return self.planes_buffer, self.layout
+
+    def destroy(self):
+        """Clean up all GPU resources created by this class."""
+        if self.planes_buffer is not None:
+            self.planes_buffer.destroy()
+        self.uniform_buffer.destroy()
+        self.planes_buffer = None
+        self.bind_group = None
+        self.texture = None
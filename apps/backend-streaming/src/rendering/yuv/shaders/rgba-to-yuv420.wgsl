@@ -0,0 +1,82 @@
+// Planar 8-bit Y, U and V of a rendered frame, one invocation per 8x2 block of pixels
+@group(0) @binding(0) var Frame: texture_2d<f32>;
+@group(0) @binding(1) var<storage, read_write> Planes: array<u32>;
+
+struct Params {
+    size: vec2<u32>,
+    // Row strides and plane offsets in u32 words
+    y_stride: u32,
+    chroma_stride: u32,
+    u_offset: u32,
+    v_offset: u32,
+    // 1 when Frame is sRGB, its texels are then encoded back to the stored values
+    encode_srgb: u32,
+    padding: u32,
+    // RGB coefficients (0..255 input) and offset of Y, U and V
+    y_row: vec4<f32>,
+    u_row: vec4<f32>,
+    v_row: vec4<f32>,
+};
+
+@group(0) @binding(2) var<uniform> params: Params;
+
+fn linear_to_srgb(linear: vec3<f32>) -> vec3<f32> {
+    let low = linear * 12.92;
+    let high = 1.055 * pow(linear, vec3<f32>(1.0 / 2.4)) - 0.055;
+    return select(high, low, linear <= vec3<f32>(0.0031308));
+}
+
+fn load_rgb(x: i32, y: i32) -> vec3<f32> {
+    // Blocks overhanging the frame repeat its last column and row
+    let texel = min(vec2<i32>(x, y), vec2<i32>(params.size) - vec2<i32>(1, 1));
+    var rgb = textureLoad(Frame, texel, 0).rgb;
+    if (params.encode_srgb == 1u) {
+        rgb = linear_to_srgb(rgb);
+    }
+    return rgb * 255.0;
+}
+
+fn convert(rgb: vec3<f32>, row: vec4<f32>) -> f32 {
+    return (dot(rgb, row.xyz) + row.w) / 255.0;
+}
+
+@compute @workgroup_size(8, 8)
+fn main(@builtin(global_invocation_id) global_id: vec3<u32>) {
+    let x0 = i32(global_id.x * 8u);
+    let y0 = i32(global_id.y * 2u);
+    if (x0 >= i32(params.size.x) || y0 >= i32(params.size.y)) {
+        return;
+    }
+
+    var rgb: array<array<vec3<f32>, 8>, 2>;
+    for (var row = 0; row < 2; row++) {
+        for (var column = 0; column < 8; column++) {
+            rgb[row][column] = load_rgb(x0 + column, y0 + row);
+        }
+    }
+
+    for (var row = 0; row < 2; row++) {
+        let base = u32(y0 + row) * params.y_stride + global_id.x * 2u;
+        for (var word = 0; word < 2; word++) {
+            let c = word * 4;
+            Planes[base + u32(word)] = pack4x8unorm(vec4<f32>(
+                convert(rgb[row][c], params.y_row),
+                convert(rgb[row][c + 1], params.y_row),
+                convert(rgb[row][c + 2], params.y_row),
+                convert(rgb[row][c + 3], params.y_row),
+            ));
+        }
+    }
+
+    // Chroma from the mean of each 2x2 block
+    var u = vec4<f32>();
+    var v = vec4<f32>();
+    for (var i = 0; i < 4; i++) {
+        let mean = (rgb[0][2 * i] + rgb[0][2 * i + 1] + rgb[1][2 * i] + rgb[1][2 * i + 1]) * 0.25;
+        u[i] = convert(mean, params.u_row);
+        v[i] = convert(mean, params.v_row);
+    }
+    let chroma_index = global_id.y * params.chroma_stride + global_id.x;
+    Planes[params.u_offset + chroma_index] = pack4x8unorm(u);
+    Planes[params.v_offset + chroma_index] = pack4x8unorm(v);
+}
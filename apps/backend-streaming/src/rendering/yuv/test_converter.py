@@ -0,0 +1,115 @@
+import unittest
+from fractions import Fraction
+
+import av
+import numpy as np
+import wgpu
+
+from rendering.yuv.converter import YuvConverter, copy_video_frame, yuv420_layout, yuv420_video_frame
+
+
+class TestYuv420Layout(unittest.TestCase):
+    def test_aligned_size(self):
+        layout = yuv420_layout(1280, 960)
+
+        self.assertEqual((layout.y_stride, layout.chroma_stride), (1280, 640))
+        self.assertEqual(layout.u_offset, 1280 * 960)
+        self.assertEqual(layout.v_offset, 1280 * 960 + 640 * 480)
+        self.assertEqual(layout.size, 1280 * 960 * 3 // 2)
+
+    def test_odd_size_is_padded_to_word_aligned_blocks(self):
+        layout = yuv420_layout(641, 481)
+
+        self.assertEqual((layout.y_stride, layout.chroma_stride), (648, 324))
+        self.assertEqual(layout.u_offset, 648 * 482)
+        self.assertEqual(layout.v_offset, 648 * 482 + 324 * 241)
+        for value in (layout.chroma_stride, layout.u_offset, layout.v_offset, layout.size):
+            self.assertEqual(value % 4, 0)
+
+
+class TestYuv420VideoFrame(unittest.TestCase):
+    def test_copies_planes_without_padding(self):
+        layout = yuv420_layout(13, 7)
+        data = np.zeros(layout.size, dtype=np.uint8)
+        y = np.arange(13 * 7, dtype=np.uint8).reshape(7, 13)
+        u = np.full((4, 7), 100, dtype=np.uint8)
+        v = np.full((4, 7), 200, dtype=np.uint8)
+        data[:layout.u_offset].reshape(-1, layout.y_stride)[:7, :13] = y
+        data[layout.u_offset:layout.v_offset].reshape(-1, layout.chroma_stride)[:4, :7] = u
+        data[layout.v_offset:].reshape(-1, layout.chroma_stride)[:4, :7] = v
+
+        frame = yuv420_video_frame(data, layout)
+
+        self.assertEqual((frame.width, frame.height, frame.format.name), (13, 7, "yuv420p"))
+        planes = [
+            np.frombuffer(plane, dtype=np.uint8).reshape(-1, plane.line_size)[:height, :width]
+            for plane, (width, height) in zip(frame.planes, [(13, 7), (7, 4), (7, 4)])
+        ]
+        np.testing.assert_array_equal(planes[0], y)
+        np.testing.assert_array_equal(planes[1], u)
+        np.testing.assert_array_equal(planes[2], v)
+
+
+class TestCopyVideoFrame(unittest.TestCase):
+    def test_copy_has_its_own_planes_and_attributes(self):
+        rgba = np.random.default_rng(0).integers(0, 256, (8, 14, 4), dtype=np.uint8)
+        frame = av.VideoFrame.from_ndarray(rgba, format="rgba").reformat(format="yuv420p")
+        frame.pts = 3000
+        frame.time_base = Fraction(1, 90000)
+
+        copy = copy_video_frame(frame)
+        # What aiortc's encoders do to the frames they get
+        copy.pict_type = av.video.frame.PictureType.I
+        np.frombuffer(copy.planes[0], dtype=np.uint8)[:] = 0
+
+        self.assertIsNot(copy, frame)
+        self.assertEqual((copy.pts, copy.time_base), (3000, Fraction(1, 90000)))
+        self.assertEqual(frame.pict_type, av.video.frame.PictureType.NONE)
+        self.assertTrue(np.any(frame.to_ndarray()[:8]))
+        np.testing.assert_array_equal(copy.to_ndarray()[8:], frame.to_ndarray()[8:])
+
+
+class TestYuvConverter(unittest.TestCase):
+    def setUp(self):
+        adapter = wgpu.gpu.request_adapter_sync(force_fallback_adapter=True)
+        if adapter is None:
+            self.skipTest("No fallback adapter")
+        self.device = adapter.request_device_sync()
+
+    def convert(self, rgba: np.ndarray, frame_format: str) -> av.VideoFrame:
+        height, width, _ = rgba.shape
+        texture = self.device.create_texture(
+            size=(width, height, 1),
+            format=frame_format,
+            usage=wgpu.TextureUsage.TEXTURE_BINDING | wgpu.TextureUsage.COPY_DST,
+        )
+        self.device.queue.write_texture({"texture": texture}, rgba, {"bytes_per_row": width * 4}, (width, height, 1))
+        converter = YuvConverter(self.device, frame_format)
+        command_encoder = self.device.create_command_encoder()
+        planes_buffer, layout = converter.record(command_encoder, texture)
+        self.device.queue.submit([command_encoder.finish()])
+        data = np.frombuffer(self.device.queue.read_buffer(planes_buffer), dtype=np.uint8)
+        converter.destroy()
+        texture.destroy()
+        return yuv420_video_frame(data, layout)
+
+    def test_matches_swscale(self):
+        # Odd width for the padded rows; the chroma of an odd last row is scaled by swscale
+        rgba = np.random.default_rng(0).integers(0, 256, (36, 50, 4), dtype=np.uint8)
+        # The box filter of AREA is the shader's 2x2 mean; the default bilinear filter also
+        # weighs in the neighbouring blocks
+        expected = av.VideoFrame.from_ndarray(rgba, format="rgba").reformat(
+            format="yuv420p", dst_color_range=1, dst_colorspace=1, interpolation="AREA",
+        )
+        # The stored bytes of an sRGB frame are converted like those of a linear one
+        for frame_format in ("rgba8unorm", "rgba8unorm-srgb"):
+            with self.subTest(frame_format=frame_format):
+                frame = self.convert(rgba, frame_format)
+                for plane, expected_plane, (width, height) in zip(frame.planes, expected.planes, [(50, 36), (25, 18), (25, 18)]):
+                    actual = np.frombuffer(plane, dtype=np.uint8).reshape(-1, plane.line_size)[:height, :width]
+                    reference = np.frombuffer(expected_plane, dtype=np.uint8).reshape(-1, expected_plane.line_size)[:height, :width]
+                    self.assertLessEqual(np.abs(actual.astype(int) - reference).max(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+Compares parse_video_stream_message with pycdr2's VideoStreamMessage.deserialize.
+
+Payload sizes: a raw 320x288 uint16 depth frame (an upper bound for a Zdepth frame)
+and a 2048x1536 H.264 keyframe at roughly 2 bits per pixel.
+
+Usage (from apps/backend-streaming/src): python -m streaming.bench_zenoh_cdr
+"""
+import time
+from typing import Callable
+
+from streaming.zenoh_cdr import VideoStreamMessage, parse_video_stream_message
+from streaming.test_zenoh_cdr import create_message
+
+PAYLOADS = {
+    "depth 320x288": 320 * 288 * 2,
+    "h264 2048x1536": 2048 * 1536 // 4,
+}
+
+
+def measure(extract_image: Callable[[bytes], object], data: bytes, seconds: float = 1.0) -> float:
+    """Return messages per second for a function producing the payload the decoders queue."""
+    count = 0
+    began = time.perf_counter()
+    while time.perf_counter() - began < seconds:
+        extract_image(data)
+        count += 1
+    return count / (time.perf_counter() - began)
+
+
+def fast_image(data: bytes) -> memoryview:
+    return parse_video_stream_message(data).image
+
+
+def pycdr2_image(data: bytes) -> bytes:
+    # What the decoder handlers did before: deserialize, then copy the image into bytes
+    return bytes(VideoStreamMessage.deserialize(data).image)
+
+
+def main():
+    for name, size in PAYLOADS.items():
+        data = create_message("camera01", bytes(size)).serialize()
+        fast = measure(fast_image, data)
+        reference = measure(pycdr2_image, data)
+        print(f"{name} ({size} bytes): parse_video_stream_message {fast:10.1f} msg/s | "
+              f"pycdr2 deserialize + bytes() {reference:8.1f} msg/s | {fast / reference:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,18 @@
 from core.state import GlobalState
 from streaming.camera_stream_decoder import start_camera_stream
+from streaming.decoder_mp4 import nal_unit_queues, set_mp4_queue_policy
+from streaming.decoder_zdepth import zdepth_raw_queues, set_zdepth_queue_policy
 
 def start_camera_streams(state: GlobalState):
     state.console.log("Starting camera streams...")
+    state.console.log(f"Ingest queue policy: {state.ingest_policy}")
+    set_mp4_queue_policy(state.ingest_policy)
+    set_zdepth_queue_policy(state.ingest_policy)
+    # Same order as the tetris buffer: color cameras first, then depth cameras
+    state.set_ingest_queues(
+        nal_unit_queues[:state.color_camera_count] + zdepth_raw_queues[:state.depth_camera_count]
+    )
+
     _1 = start_camera_stream(state, 1)
     _2 = start_camera_stream(state, 2)
     _3 = start_camera_stream(state, 3)
@@ -1,22 +1,30 @@
 import av
 import numpy as np
 import threading
-from queue import Queue, Empty, Full
+from queue import Empty, Full
 from typing import Tuple
 from tetris_buffer.sorted_buffer import SortedBufferEntry
 from tetris_buffer.engine import TetrisEngine
-from streaming.zenoh_cdr import VideoStreamMessage
+from streaming.zenoh_cdr import VideoStreamMessage, stamp_ns
+from streaming.ingest_queue import IngestQueue, QueuePolicy, is_h264_keyframe
 from core.shutdown import is_shutdown_requested
 
 # --- Global Variables ---
-# Queues carry tuples: (payload_bytes, ts_ns)
-nal_unit_queues: list[Queue[Tuple[bytes, int]]] = [
-    Queue(maxsize=100),
-    Queue(maxsize=100),
-    Queue(maxsize=100),
-    Queue(maxsize=100),
+# Queues carry tuples: (payload_view, ts_ns)
+nal_unit_queues: list[IngestQueue[Tuple[memoryview, int]]] = [
+    IngestQueue("drop_oldest", capacity=100, is_keyframe=is_h264_keyframe),
+    IngestQueue("drop_oldest", capacity=100, is_keyframe=is_h264_keyframe),
+    IngestQueue("drop_oldest", capacity=100, is_keyframe=is_h264_keyframe),
+    IngestQueue("drop_oldest", capacity=100, is_keyframe=is_h264_keyframe),
 ]
 
+def set_mp4_queue_policy(policy: QueuePolicy):
+    """Recreate the NAL unit queues with the given policy. Call before the decoder threads start."""
+    nal_unit_queues[:] = [
+        IngestQueue(policy, capacity=100, is_keyframe=is_h264_keyframe)
+        for _ in nal_unit_queues
+    ]
+
 def mp4_decoder_unit_handler_factory(index: int):
     return lambda video_message: mp4_decoder_unit_handler(index, video_message)
 
@@ -24,11 +32,9 @@ def mp4_decoder_unit_handler_factory(index: int):
 def mp4_decoder_unit_handler(index: int, msg: VideoStreamMessage):
     """Callback function executed when a NAL unit is received via Zenoh."""
     try:
-        payload = bytes(msg.image)
-        ts_ns = msg.header.stamp.nanosec
-        nal_unit_queues[index].put((payload, ts_ns), block=False)
-    except Full:
-        pass
+        payload = msg.image  # memoryview into the Zenoh payload, no copy
+        ts_ns = stamp_ns(msg.header.stamp)
+        nal_unit_queues[index].put((payload, ts_ns))
     except Exception as e:
         print(f"Error in zenoh_callback: {e}")
 
@@ -48,7 +54,7 @@ def mp4_decoder_thread(buffer: TetrisEngine[np.ndarray], index: int):
 
         while not is_shutdown_requested():
             try:
-                nal_unit, ts_ns = nal_unit_queue.get(block=True, timeout=0.1)
+                nal_unit, ts_ns = nal_unit_queue.get(timeout=0.1)
                 packets = codec_context.parse(nal_unit)
 
                 if not packets:
@@ -0,0 +1,123 @@
+import multiprocessing as mp
+import threading
+import weakref
+import numpy as np
+from multiprocessing.shared_memory import SharedMemory
+from queue import Empty, Full
+from rich.console import Console
+from tetris_buffer.engine import TetrisEngine
+from tetris_buffer.sorted_buffer import SortedBufferEntry
+from streaming.ingest_queue import IngestQueue
+from streaming.decoder_worker import BYTES_PER_PIXEL, DecoderKind, decoded_frame, decoder_process_main, map_slots
+from core.shutdown import is_shutdown_requested
+
+# Decoded frames of one camera that can be referenced downstream at once. With every
+# slot taken the worker drops decoded frames until one is released, so this only has
+# to cover the frames waiting for a row, the row being delivered and the one rendered.
+MAX_SLOTS_IN_FLIGHT = 8
+
+
+class ProcessDecoder:
+    """
+    Runs the decoder of one camera in a worker process.
+
+    A feeder thread moves payloads from the camera's IngestQueue (so the queue policy
+    still applies) to the worker, and a collector thread wraps the decoded frames as
+    numpy views of the shared memory slots and inserts them into the tetris buffer,
+    so frames are never copied on the way back. Like DepthFramePool, the consumer
+    hands a frame back with release once it is done with it, and its slot goes back
+    to the worker. A frame dropped with a row on the way is never released; its slot
+    goes back when the view inserted into the tetris buffer is garbage collected.
+
+    Used instead of the decoder threads when GlobalState.decoder_backend is "process".
+    Slots are sized for max_width x max_height, the camera's actual resolution, and
+    there are at most MAX_SLOTS_IN_FLIGHT of them, fewer for a smaller tetris buffer.
+    """
+
+    def __init__(
+        self,
+        kind: DecoderKind,
+        name: str,
+        ingest_queue: IngestQueue[tuple[memoryview, int]],
+        buffer: TetrisEngine[np.ndarray],
+        buffer_index: int,
+        max_width: int,
+        max_height: int,
+        slot_count: int | None = None,
+    ):
+        self.kind = kind
+        self.name = name
+        self.ingest_queue = ingest_queue
+        self.buffer = buffer
+        self.buffer_index = buffer_index
+        if slot_count is None:
+            slot_count = min(buffer.max_buffer_size, MAX_SLOTS_IN_FLIGHT)
+        self.slot_count = slot_count
+        self.slot_bytes = max_width * max_height * BYTES_PER_PIXEL[kind]
+        self.console = Console()
+
+        # Spawn instead of fork, the parent already runs threads and a GPU device
+        context = mp.get_context("spawn")
+        self.shm = SharedMemory(create=True, size=self.slot_count * self.slot_bytes)
+        self.slots = map_slots(self.shm, self.slot_count, self.slot_bytes)
+        # Per slot, returns it to the worker once, on release or when its frame is collected
+        self.leases: list[weakref.finalize | None] = [None] * self.slot_count
+        self.payloads = context.Queue(maxsize=8)
+        self.descriptors = context.Queue()
+        self.free_slots = context.SimpleQueue()
+        for slot in range(self.slot_count):
+            self.free_slots.put(slot)
+        self.stop_event = context.Event()
+        self.process = context.Process(
+            target=decoder_process_main,
+            args=(kind, name, self.shm.name, self.slot_count, self.slot_bytes,
+                  self.payloads, self.descriptors, self.free_slots, self.stop_event),
+            name=f"decoder-{name}",
+            daemon=True,
+        )
+
+    def start(self):
+        self.process.start()
+        threading.Thread(target=self._feed, daemon=True).start()
+        threading.Thread(target=self._collect, daemon=True).start()
+
+    def _feed(self):
+        while not is_shutdown_requested():
+            try:
+                payload, ts_ns = self.ingest_queue.get(timeout=0.5)
+            except Empty:
+                continue
+            try:
+                # The payload is a view into the Zenoh sample, copy it for pickling
+                self.payloads.put((bytes(payload), ts_ns), timeout=0.5)
+            except Full:
+                continue
+        self.stop_event.set()
+
+    def release(self, frame: np.ndarray):
+        """Hand the slot of a frame the collector inserted back to the worker. Other arrays are ignored."""
+        for lease in self.leases:
+            if lease is not None and (leased := lease.peek()) is not None and leased[0] is frame:
+                # Runs at most once, a later release or the frame's collection does nothing
+                lease()
+                return
+
+    def _collect(self):
+        processed_frames = 0
+        while not is_shutdown_requested():
+            try:
+                slot, ts_ns, width, height = self.descriptors.get(timeout=0.1)
+            except Empty:
+                continue
+            frame = decoded_frame(self.kind, self.slots[slot], width, height)
+            self.leases[slot] = weakref.finalize(frame, self.free_slots.put, slot)
+            # At exit the worker is gone, nothing to hand the slot to
+            self.leases[slot].atexit = False
+            self.buffer.insert(self.buffer_index, SortedBufferEntry(frame, ts_ns))
+            del frame
+            processed_frames += 1
+
+        self.process.join(timeout=1.0)
+        self.console.log(f"Decoder process {self.name} stopped. Processed {processed_frames} frames.")
+        # Frames may still be referenced downstream, so only unlink; the mapping goes with the process
+        self.shm.unlink()
@@ -0,0 +1,132 @@
+"""
+Code that runs inside the decoder worker processes of streaming.decoder_process.
+
+Spawned workers import this module fresh, so it only depends on numpy and the codecs.
+"""
+import multiprocessing as mp
+import numpy as np
+from multiprocessing.shared_memory import SharedMemory
+from queue import Empty
+from typing import Literal
+from rich.console import Console
+
+DecoderKind = Literal["zdepth", "h264"]
+
+# Bytes per pixel of the decoded frames: uint16 depth, bgr24 color
+BYTES_PER_PIXEL: dict[DecoderKind, int] = {"zdepth": 2, "h264": 3}
+
+
+def decoded_frame(kind: DecoderKind, slot: np.ndarray, width: int, height: int) -> np.ndarray:
+    """View of a decoded frame inside a uint8 slot, shaped like the thread decoders' output."""
+    nbytes = width * height * BYTES_PER_PIXEL[kind]
+    if kind == "zdepth":
+        return slot[:nbytes].view(np.uint16).reshape(height, width)
+    return slot[:nbytes].reshape(height, width, 3)
+
+
+def map_slots(shm: SharedMemory, slot_count: int, slot_bytes: int) -> list[np.ndarray]:
+    return [
+        np.ndarray((slot_bytes,), dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+        for slot in range(slot_count)
+    ]
+
+
+def decoder_process_main(
+    kind: DecoderKind,
+    name: str,
+    shm_name: str,
+    slot_count: int,
+    slot_bytes: int,
+    payloads: "mp.Queue[tuple[bytes, int]]",
+    descriptors: "mp.Queue[tuple[int, int, int, int]]",
+    free_slots: "mp.SimpleQueue[int]",
+    stop: "mp.Event",
+):
+    """
+    Decodes payloads into shared memory slots and reports (slot, ts_ns, width, height).
+
+    The parent owns the slots: it hands free slot numbers to the worker through
+    free_slots and takes them back once nothing references the decoded frame anymore.
+    free_slots is a SimpleQueue, written without a feeder thread, so a slot is free
+    for the worker as soon as the parent's put returns.
+    Frames decoded while no slot is free are dropped; depth frames are still decoded
+    into a scratch buffer so the P-frame chain stays intact.
+    """
+    console = Console()
+    shm = SharedMemory(name=shm_name)
+    slots = map_slots(shm, slot_count, slot_bytes)
+    decode = _zdepth_decoder(slot_bytes) if kind == "zdepth" else _h264_decoder()
+    console.log(f"Decoder process {name} started.")
+
+    while not stop.is_set():
+        try:
+            payload, ts_ns = payloads.get(timeout=0.1)
+        except Empty:
+            continue
+        try:
+            for slot, width, height in decode(payload, slots, free_slots):
+                descriptors.put((slot, ts_ns, width, height))
+        except Exception as e:
+            console.log(f"Error in decoder process {name}: {e}")
+
+    del slots
+    shm.close()
+    console.log(f"Decoder process {name} exiting.")
+
+
+def _take_free_slot(free_slots: "mp.SimpleQueue[int]") -> int | None:
+    # The worker is the only reader, so a non-empty queue can not be emptied in between
+    if free_slots.empty():
+        return None
+    return free_slots.get()
+
+
+def _zdepth_decoder(slot_bytes: int):
+    import pyzdepth
+
+    console = Console()
+    decompressor = pyzdepth.DepthCompressor()
+    scratch = np.empty(slot_bytes // 2, dtype=np.uint16)
+    result_names = {0: "FileTruncated", 1: "WrongFormat", 2: "Corrupted", 4: "BadDimensions"}
+
+    def decode(payload: bytes, slots: list[np.ndarray], free_slots: "mp.SimpleQueue[int]"):
+        result, width, height = decompressor.PeekDimensions(payload)
+        if result != 5:
+            return
+        if width * height * 2 > slot_bytes:
+            console.log(f"Depth frame {width}x{height} does not fit a {slot_bytes} byte slot")
+            return
+        slot = _take_free_slot(free_slots)
+        out = scratch[:width * height] if slot is None else decoded_frame("zdepth", slots[slot], width, height)
+        result, width, height = decompressor.DecompressInto(payload, out)
+        if result != 5:
+            if result != 3:  # MissingPFrame is expected until the next keyframe
+                console.log(f"Decompression error: {result_names.get(result, f'Unknown({result})')} ({result})")
+            if slot is not None:
+                free_slots.put(slot)
+            return
+        if slot is not None:
+            yield slot, width, height
+
+    return decode
+
+
+def _h264_decoder():
+    import av
+
+    codec_context = av.CodecContext.create('h264', 'r')
+
+    def decode(payload: bytes, slots: list[np.ndarray], free_slots: "mp.SimpleQueue[int]"):
+        for packet in codec_context.parse(payload):
+            for frame in codec_context.decode(packet):
+                img = frame.to_ndarray(format='bgr24')
+                height, width = img.shape[:2]
+                if img.nbytes > slots[0].nbytes:
+                    continue
+                slot = _take_free_slot(free_slots)
+                if slot is None:
+                    continue
+                np.copyto(decoded_frame("h264", slots[slot], width, height), img)
+                yield slot, width, height
+
+    return decode
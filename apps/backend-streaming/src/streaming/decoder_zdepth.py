@@ -1,23 +1,68 @@
 import numpy as np
 import time
 import threading
-from queue import Queue, Empty, Full
+import weakref
+from queue import Empty
 from rich.console import Console
 import pyzdepth
 from tetris_buffer.engine import TetrisEngine
 from tetris_buffer.sorted_buffer import SortedBufferEntry
-from streaming.zenoh_cdr import VideoStreamMessage
+from streaming.zenoh_cdr import VideoStreamMessage, stamp_ns
+from streaming.ingest_queue import IngestQueue, QueuePolicy, is_zdepth_keyframe
 from core.shutdown import is_shutdown_requested
 
 # --- Global Variables ---
 # raw queue carries (payload, ts_ns)
-zdepth_raw_queues: list[Queue[tuple[bytes, int]]] = [
-    Queue(maxsize=100),
-    Queue(maxsize=100),
-    Queue(maxsize=100),
-    Queue(maxsize=100),
+zdepth_raw_queues: list[IngestQueue[tuple[memoryview, int]]] = [
+    IngestQueue("drop_oldest", capacity=100, is_keyframe=is_zdepth_keyframe),
+    IngestQueue("drop_oldest", capacity=100, is_keyframe=is_zdepth_keyframe),
+    IngestQueue("drop_oldest", capacity=100, is_keyframe=is_zdepth_keyframe),
+    IngestQueue("drop_oldest", capacity=100, is_keyframe=is_zdepth_keyframe),
 ]
 
+def set_zdepth_queue_policy(policy: QueuePolicy):
+    """Recreate the raw queues with the given policy. Call before the decoder threads start."""
+    zdepth_raw_queues[:] = [
+        IngestQueue(policy, capacity=100, is_keyframe=is_zdepth_keyframe)
+        for _ in zdepth_raw_queues
+    ]
+
+class DepthFramePool:
+    """Reuses decoded depth frames that the consumer has handed back with release.
+
+    The renderer releases a frame once it has uploaded it. A frame that never gets
+    there, with a row the TetrisEngine or the display channel dropped, is not released
+    and is garbage collected like any array, so acquire allocates a new frame whenever
+    none of the right size has been returned. At most max_frames returned frames are kept.
+    """
+    def __init__(self, max_frames: int = 64):
+        self.max_frames = max_frames
+        self.free: list[np.ndarray] = []
+        # Frames handed out and not released yet; entries go away with their frames
+        self.leased: weakref.WeakValueDictionary[int, np.ndarray] = weakref.WeakValueDictionary()
+        # The decoder thread acquires, the render thread releases
+        self.lock = threading.Lock()
+
+    def acquire(self, width: int, height: int) -> np.ndarray:
+        with self.lock:
+            for i, frame in enumerate(self.free):
+                if frame.shape == (height, width):
+                    del self.free[i]
+                    break
+            else:
+                frame = np.empty((height, width), dtype=np.uint16)
+            self.leased[id(frame)] = frame
+        return frame
+
+    def release(self, frame: np.ndarray):
+        """Return a frame from acquire; it may be overwritten from then on. Other arrays are ignored."""
+        with self.lock:
+            # Also makes a second release of the same frame a no-op
+            if self.leased.pop(id(frame), None) is not frame:
+                return
+            if len(self.free) < self.max_frames:
+                self.free.append(frame)
+
 def zdepth_decoder_unit_handler_factory(index: int):
     return lambda video_message: zdepth_decoder_unit_handler(index, video_message)
 
@@ -25,16 +70,16 @@ def zdepth_decoder_unit_handler_factory(index: int):
 def zdepth_decoder_unit_handler(index: int, msg: VideoStreamMessage):
     """Callback function executed when a Zdepth unit is received via Zenoh."""
     try:
-        payload = bytes(msg.image)
-        ts_ns = msg.header.stamp.nanosec
-        zdepth_raw_queues[index].put((payload, ts_ns), block=False)
-    except Full:
-        pass
+        payload = msg.image  # memoryview into the Zenoh payload, no copy
+        ts_ns = stamp_ns(msg.header.stamp)
+        zdepth_raw_queues[index].put((payload, ts_ns))
     except Exception as e:
         print(f"Error in zdepth zenoh_callback: {e}")
 
 # --- Decoder Thread ---
-def zdepth_decoder_thread(buffer: TetrisEngine[np.ndarray], depth_buffer_offset: int, index: int):
+def zdepth_decoder_thread(
+    buffer: TetrisEngine[np.ndarray], depth_buffer_offset: int, index: int, frame_pool: DepthFramePool,
+):
     """Thread function to decode z-depth frames using pyzdepth."""
     global zdepth_raw_queues
     console = Console()
@@ -48,7 +93,12 @@ def zdepth_decoder_thread(buffer: TetrisEngine[np.ndarray], depth_buffer_offset:
     while not is_shutdown_requested():
         try:
             payload, ts_ns = zdepth_raw_queue.get(timeout=0.5)
-            result, width, height, depth_bytes = decompressor.Decompress(payload)
+            result, width, height = decompressor.PeekDimensions(payload)
+            if result == 5:
+                decoded = frame_pool.acquire(width, height)
+                result, width, height = decompressor.DecompressInto(payload, decoded)
+                if result != 5:
+                    frame_pool.release(decoded)
             
             # Success is 5 in DepthResult
             if result != 5:
@@ -61,18 +111,11 @@ def zdepth_decoder_thread(buffer: TetrisEngine[np.ndarray], depth_buffer_offset:
                     console.log(f"[zdepth {index}] Decompression error: {result_name} ({result})")
                     continue
             
-            if width <= 0 or height <= 0 or depth_bytes is None:
-                console.log(f"[zdepth {index}] Invalid dimensions or null depth_bytes")
+            if width <= 0 or height <= 0:
+                console.log(f"[zdepth {index}] Invalid dimensions")
                 continue
 
-            decoded = np.frombuffer(depth_bytes, dtype=np.uint16, count=width * height).reshape((height, width))
-            if decoded is None:
-                continue
-            try:
-                # zdepth_decoded_queue.put((decoded, ts_ns), timeout=0.1)
-                buffer.insert(depth_buffer_offset + index, SortedBufferEntry(decoded, ts_ns))
-            except Full:
-                pass
+            buffer.insert(depth_buffer_offset + index, SortedBufferEntry(decoded, ts_ns))
         except Empty:
             continue
         except Exception as e:
@@ -0,0 +1,100 @@
+import threading
+from queue import Empty
+from typing import Generic, NamedTuple, TypeVar
+
+T = TypeVar("T")
+
+
+class FrameRingStats(NamedTuple):
+    capacity: int
+    occupancy: int
+    pushed: int
+    popped: int
+    dropped: int
+
+
+class FrameRing(Generic[T]):
+    """
+    Bounded single-producer/single-consumer ring buffer, dropping the oldest item when full.
+
+    The Zenoh callback of a camera is the only producer and its decoder thread the only
+    consumer. Slots are preallocated and each side only writes its own sequence counter,
+    so neither put nor get takes a lock. When the ring is full the producer overwrites
+    the oldest slot; the consumer notices the overrun from the sequence numbers, skips
+    ahead and counts the skipped items as dropped, so the freshest frames survive.
+    A single Event wakes the consumer when it waits on an empty ring.
+
+    With overwrite=False the ring keeps the old items instead and put rejects the
+    newest one, which is how the previous queue.Queue(maxsize) ingest behaved.
+    """
+
+    def __init__(self, capacity: int, overwrite: bool = True):
+        if capacity <= 0:
+            raise ValueError("Capacity must be a positive number.")
+        self.capacity = capacity
+        self.overwrite = overwrite
+        # Each slot holds (sequence, item) so the consumer can detect overwritten slots
+        self._slots: list[tuple[int, T] | None] = [None] * capacity
+        self._write_seq = 0  # written by the producer only
+        self._read_seq = 0  # written by the consumer only
+        self._dropped = 0  # written by the consumer only
+        self._rejected = 0  # written by the producer only
+        self._event = threading.Event()
+
+    def __len__(self) -> int:
+        return min(self._write_seq - self._read_seq, self.capacity)
+
+    def put(self, item: T) -> bool:
+        """Publish an item without blocking. Returns False if it was rejected because the ring is full."""
+        seq = self._write_seq
+        if not self.overwrite and seq - self._read_seq >= self.capacity:
+            self._rejected += 1
+            return False
+        self._slots[seq % self.capacity] = (seq, item)
+        self._write_seq = seq + 1
+        if not self._event.is_set():
+            self._event.set()
+        return True
+
+    def get_nowait(self) -> T:
+        """Return the oldest available item or raise queue.Empty."""
+        while True:
+            write_seq = self._write_seq
+            read_seq = self._read_seq
+            if read_seq >= write_seq:
+                raise Empty
+            if write_seq - read_seq > self.capacity:
+                # The producer lapped us, skip the overwritten items
+                self._dropped += write_seq - self.capacity - read_seq
+                read_seq = write_seq - self.capacity
+            slot = self._slots[read_seq % self.capacity]
+            if slot is None or slot[0] != read_seq:
+                # Overwritten between reading the counters and the slot, retry
+                self._read_seq = read_seq
+                continue
+            self._read_seq = read_seq + 1
+            return slot[1]
+
+    def get(self, timeout: float | None = None) -> T:
+        """Return the oldest available item, waiting up to timeout seconds. Raises queue.Empty."""
+        try:
+            return self.get_nowait()
+        except Empty:
+            pass
+        self._event.clear()
+        # Re-check after clearing so a put between the two calls is not missed
+        try:
+            return self.get_nowait()
+        except Empty:
+            pass
+        self._event.wait(timeout)
+        return self.get_nowait()
+
+    def stats(self) -> FrameRingStats:
+        return FrameRingStats(
+            capacity=self.capacity,
+            occupancy=len(self),
+            pushed=self._write_seq + self._rejected,
+            popped=self._read_seq - self._dropped,
+            dropped=self._dropped + self._rejected,
+        )
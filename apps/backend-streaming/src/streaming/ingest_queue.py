@@ -0,0 +1,148 @@
+from typing import Callable, Generic, Literal, NamedTuple, TypeVar
+from queue import Empty
+from streaming.frame_ring import FrameRing
+
+T = TypeVar("T")
+
+# fifo:        decode everything in order, reject new frames while the queue is full
+# drop_oldest: decode in order, overwrite the oldest frame while the queue is full
+# latest_only: skip ahead to the newest keyframe, and shed frames until the next
+#              keyframe once the queue overflowed
+QueuePolicy = Literal["fifo", "drop_oldest", "latest_only"]
+QUEUE_POLICIES: tuple[QueuePolicy, ...] = ("fifo", "drop_oldest", "latest_only")
+
+
+class IngestQueueStats(NamedTuple):
+    policy: QueuePolicy
+    occupancy: int
+    received: int
+    delivered: int
+    dropped_full: int  # rejected or overwritten because the queue was full
+    superseded: int  # skipped because a newer keyframe was available (latest_only)
+    awaiting_keyframe: int  # shed because their reference frame was lost (latest_only)
+
+
+class IngestQueue(Generic[T]):
+    """
+    Per-camera queue between a Zenoh callback and its decoder thread.
+
+    The storage is a FrameRing, so put never blocks. With latest_only the consumer
+    drains the ring on every get and jumps to the newest keyframe it finds, keeping
+    only the frames after it. Zdepth and H.264 predicted frames can only be decoded
+    after the frame before them, so frames are never skipped in the middle of a
+    chain: if the ring overflowed and no keyframe is available, everything is shed
+    until the next keyframe arrives instead of feeding the decoder frames it would
+    reject as MissingPFrame.
+    """
+
+    def __init__(self, policy: QueuePolicy, capacity: int, is_keyframe: Callable[[T], bool]):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self.policy = policy
+        self.is_keyframe = is_keyframe
+        self.ring = FrameRing[T](capacity, overwrite=policy != "fifo")
+        # Consumer-side state for latest_only
+        self._pending: list[T] = []  # decodable frames following the last delivered keyframe
+        self._needs_keyframe = False
+        self._ring_dropped = 0
+        self._delivered = 0
+        self._superseded = 0
+        self._awaiting_keyframe = 0
+
+    def __len__(self) -> int:
+        return len(self.ring) + len(self._pending)
+
+    def put(self, item: T) -> bool:
+        return self.ring.put(item)
+
+    def get(self, timeout: float | None = None) -> T:
+        """Return the next frame to decode, waiting up to timeout seconds. Raises queue.Empty."""
+        if self.policy == "latest_only":
+            item = self._get_latest(timeout)
+        else:
+            item = self.ring.get(timeout)
+        self._delivered += 1
+        return item
+
+    def _drain(self) -> list[T]:
+        items = []
+        while True:
+            try:
+                items.append(self.ring.get_nowait())
+            except Empty:
+                return items
+
+    def _get_latest(self, timeout: float | None) -> T:
+        pending, self._pending = self._pending, []
+        if pending:
+            fresh = self._drain()
+        else:
+            fresh = [self.ring.get(timeout)] + self._drain()
+
+        # The ring overwrote frames between the pending ones and the fresh ones,
+        # which breaks the chain: only a fresh keyframe can be decoded now
+        ring_dropped = self.ring.stats().dropped
+        if ring_dropped != self._ring_dropped:
+            self._ring_dropped = ring_dropped
+            self._needs_keyframe = True
+            self._superseded += len(pending)
+            pending = []
+
+        items = pending + fresh
+        if len(items) == 1 and not self._needs_keyframe:
+            return items[0]
+
+        for i in range(len(items) - 1, -1, -1):
+            if self.is_keyframe(items[i]):
+                if self._needs_keyframe:
+                    self._awaiting_keyframe += i
+                else:
+                    self._superseded += i
+                self._needs_keyframe = False
+                self._pending = items[i + 1:]
+                return items[i]
+
+        if self._needs_keyframe:
+            self._awaiting_keyframe += len(items)
+            raise Empty
+
+        # The chain is intact but there is no keyframe to jump to, keep decoding in order
+        self._pending = items[1:]
+        return items[0]
+
+    def stats(self) -> IngestQueueStats:
+        ring_stats = self.ring.stats()
+        return IngestQueueStats(
+            policy=self.policy,
+            occupancy=ring_stats.occupancy,
+            received=ring_stats.pushed,
+            delivered=self._delivered,
+            dropped_full=ring_stats.dropped,
+            superseded=self._superseded,
+            awaiting_keyframe=self._awaiting_keyframe,
+        )
+
+
+def is_zdepth_keyframe(item: tuple[memoryview, int]) -> bool:
+    """Zdepth header: magic byte 202, then flags with bit 0 set for keyframes."""
+    payload = item[0]
+    return len(payload) >= 2 and payload[0] == 202 and (payload[1] & 1) != 0
+
+
+# Parameter sets and headers precede the first slice, so the NAL units that decide
+# whether an access unit is an IDR frame sit at its very start
+_H264_KEYFRAME_SCAN_BYTES = 1024
+_H264_IDR_SLICE = 5
+_H264_SPS = 7
+
+
+def is_h264_keyframe(item: tuple[memoryview, int]) -> bool:
+    """Annex B access unit containing an SPS or an IDR slice."""
+    head = bytes(item[0][:_H264_KEYFRAME_SCAN_BYTES])
+    start = head.find(b"\x00\x00\x01")
+    while start != -1 and start + 3 < len(head):
+        nal_unit_type = head[start + 3] & 0x1F
+        if nal_unit_type == _H264_IDR_SLICE or nal_unit_type == _H264_SPS:
+            return True
+        start = head.find(b"\x00\x00\x01", start + 3)
+    return False
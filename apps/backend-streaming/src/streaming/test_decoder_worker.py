@@ -0,0 +1,62 @@
+import multiprocessing as mp
+import unittest
+from multiprocessing.shared_memory import SharedMemory
+from queue import Empty
+
+import numpy as np
+import pyzdepth
+
+from streaming.decoder_worker import decoded_frame, decoder_process_main, map_slots
+
+
+class TestZdepthDecoderProcess(unittest.TestCase):
+    def test_decodes_into_shared_memory_slots(self):
+        width, height, slot_count = 64, 48, 2
+        slot_bytes = width * height * 2
+        frames = [np.full((height, width), 1000 + i * 10, dtype=np.uint16) for i in range(4)]
+        compressor = pyzdepth.DepthCompressor()
+        payloads = [bytes(compressor.Compress(width, height, frame.tobytes(), i == 0)[1]) for i, frame in enumerate(frames)]
+
+        context = mp.get_context("spawn")
+        shm = SharedMemory(create=True, size=slot_count * slot_bytes)
+        slots = map_slots(shm, slot_count, slot_bytes)
+        payload_queue, descriptors, free_slots = context.Queue(), context.Queue(), context.SimpleQueue()
+        stop = context.Event()
+        process = context.Process(
+            target=decoder_process_main,
+            args=("zdepth", "test", shm.name, slot_count, slot_bytes, payload_queue, descriptors, free_slots, stop),
+            daemon=True,
+        )
+        process.start()
+        try:
+            for slot in range(slot_count):
+                free_slots.put(slot)
+            for ts_ns, payload in enumerate(payloads[:3]):
+                payload_queue.put((payload, ts_ns))
+
+            # Only two slots: the third frame is decoded but dropped
+            received = [descriptors.get(timeout=30) for _ in range(slot_count)]
+            self.assertEqual([r[1] for r in received], [0, 1])
+            for slot, ts_ns, w, h in received:
+                self.assertEqual((w, h), (width, height))
+                np.testing.assert_array_equal(decoded_frame("zdepth", slots[slot], w, h), frames[ts_ns])
+
+            with self.assertRaises(Empty):
+                descriptors.get(timeout=1)
+
+            # The dropped frame still advanced the P-frame chain
+            free_slots.put(received[0][0])
+            payload_queue.put((payloads[3], 3))
+            slot, ts_ns, w, h = descriptors.get(timeout=30)
+            self.assertEqual((slot, ts_ns), (received[0][0], 3))
+            np.testing.assert_array_equal(decoded_frame("zdepth", slots[slot], w, h), frames[3])
+        finally:
+            stop.set()
+            process.join(timeout=10)
+            del slots
+            shm.close()
+            shm.unlink()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import threading
+import unittest
+from queue import Empty
+
+from streaming.frame_ring import FrameRing
+
+
+class TestFrameRing(unittest.TestCase):
+    def test_fifo_order(self):
+        ring = FrameRing[int](capacity=4)
+        for i in range(3):
+            ring.put(i)
+
+        self.assertEqual([ring.get_nowait() for _ in range(3)], [0, 1, 2])
+        with self.assertRaises(Empty):
+            ring.get_nowait()
+
+    def test_drops_oldest_when_full(self):
+        ring = FrameRing[int](capacity=3)
+        for i in range(8):
+            ring.put(i)
+
+        self.assertEqual(len(ring), 3)
+        self.assertEqual([ring.get_nowait() for _ in range(3)], [5, 6, 7])
+
+        stats = ring.stats()
+        self.assertEqual(stats.pushed, 8)
+        self.assertEqual(stats.popped, 3)
+        self.assertEqual(stats.dropped, 5)
+        self.assertEqual(stats.occupancy, 0)
+
+    def test_rejects_newest_when_full_without_overwrite(self):
+        ring = FrameRing[int](capacity=3, overwrite=False)
+        accepted = [ring.put(i) for i in range(5)]
+
+        self.assertEqual(accepted, [True, True, True, False, False])
+        self.assertEqual([ring.get_nowait() for _ in range(3)], [0, 1, 2])
+        self.assertTrue(ring.put(5))
+        self.assertEqual(ring.get_nowait(), 5)
+        stats = ring.stats()
+        self.assertEqual((stats.pushed, stats.popped, stats.dropped), (6, 4, 2))
+
+    def test_get_times_out_when_empty(self):
+        ring = FrameRing[int](capacity=2)
+        with self.assertRaises(Empty):
+            ring.get(timeout=0.01)
+
+    def test_get_wakes_up_on_put(self):
+        ring = FrameRing[str](capacity=2)
+        timer = threading.Timer(0.05, ring.put, args=("frame",))
+        timer.start()
+        self.assertEqual(ring.get(timeout=2), "frame")
+        timer.join()
+
+    def test_concurrent_producer_keeps_order_and_accounts_for_every_item(self):
+        ring = FrameRing[int](capacity=16)
+        item_count = 50000
+        received: list[int] = []
+
+        def produce():
+            for i in range(item_count):
+                ring.put(i)
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        while producer.is_alive() or len(ring) > 0:
+            try:
+                received.append(ring.get(timeout=0.01))
+            except Empty:
+                pass
+        producer.join()
+
+        self.assertEqual(received, sorted(received))
+        self.assertEqual(received[-1], item_count - 1)
+        stats = ring.stats()
+        self.assertEqual(stats.popped, len(received))
+        self.assertEqual(stats.popped + stats.dropped, item_count)
+
+
+if __name__ == "__main__":
+    unittest.main()
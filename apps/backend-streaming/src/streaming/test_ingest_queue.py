@@ -0,0 +1,113 @@
+import unittest
+from queue import Empty
+
+from streaming.ingest_queue import IngestQueue, is_h264_keyframe, is_zdepth_keyframe
+
+
+# Test frames are strings, keyframes start with K and predicted frames with P
+def is_keyframe(item: str) -> bool:
+    return item.startswith("K")
+
+
+def drain(queue: IngestQueue[str]) -> list[str]:
+    items = []
+    while True:
+        try:
+            items.append(queue.get(timeout=0))
+        except Empty:
+            if len(queue) == 0:
+                return items
+
+
+class TestIngestQueue(unittest.TestCase):
+    def test_fifo_rejects_newest_when_full(self):
+        queue = IngestQueue("fifo", capacity=3, is_keyframe=is_keyframe)
+        accepted = [queue.put(f"P{i}") for i in range(5)]
+
+        self.assertEqual(accepted, [True, True, True, False, False])
+        self.assertEqual(drain(queue), ["P0", "P1", "P2"])
+        stats = queue.stats()
+        self.assertEqual((stats.received, stats.delivered, stats.dropped_full), (5, 3, 2))
+
+    def test_drop_oldest_keeps_newest_when_full(self):
+        queue = IngestQueue("drop_oldest", capacity=3, is_keyframe=is_keyframe)
+        for i in range(5):
+            queue.put(f"P{i}")
+
+        self.assertEqual(drain(queue), ["P2", "P3", "P4"])
+        stats = queue.stats()
+        self.assertEqual((stats.received, stats.delivered, stats.dropped_full), (5, 3, 2))
+
+    def test_latest_only_delivers_in_order_when_keeping_up(self):
+        queue = IngestQueue("latest_only", capacity=4, is_keyframe=is_keyframe)
+        delivered = []
+        for name in ["K0", "P1", "P2"]:
+            queue.put(name)
+            delivered.append(queue.get(timeout=0))
+
+        self.assertEqual(delivered, ["K0", "P1", "P2"])
+        self.assertEqual(queue.stats().superseded, 0)
+
+    def test_latest_only_jumps_to_newest_keyframe(self):
+        queue = IngestQueue("latest_only", capacity=8, is_keyframe=is_keyframe)
+        for name in ["K0", "P1", "K2", "P3", "P4"]:
+            queue.put(name)
+
+        # Frames after the keyframe are still decodable and follow in order
+        self.assertEqual(drain(queue), ["K2", "P3", "P4"])
+        stats = queue.stats()
+        self.assertEqual((stats.delivered, stats.superseded, stats.awaiting_keyframe), (3, 2, 0))
+
+    def test_latest_only_without_keyframe_keeps_the_chain(self):
+        queue = IngestQueue("latest_only", capacity=8, is_keyframe=is_keyframe)
+        queue.put("K0")
+        self.assertEqual(queue.get(timeout=0), "K0")
+        for name in ["P1", "P2", "P3"]:
+            queue.put(name)
+
+        self.assertEqual(drain(queue), ["P1", "P2", "P3"])
+
+    def test_latest_only_waits_for_keyframe_after_overflow(self):
+        queue = IngestQueue("latest_only", capacity=3, is_keyframe=is_keyframe)
+        for name in ["K0", "P1", "P2", "P3", "P4"]:
+            queue.put(name)
+
+        # K0 and P1 were overwritten, so P2..P4 cannot be decoded
+        self.assertEqual(drain(queue), [])
+        queue.put("P5")
+        self.assertEqual(drain(queue), [])
+        queue.put("K6")
+        queue.put("P7")
+        self.assertEqual(drain(queue), ["K6", "P7"])
+
+        stats = queue.stats()
+        self.assertEqual(stats.dropped_full, 2)
+        self.assertEqual(stats.awaiting_keyframe, 4)
+        self.assertEqual(stats.delivered, 2)
+        self.assertEqual(stats.received, stats.delivered + stats.dropped_full + stats.superseded + stats.awaiting_keyframe)
+
+    def test_rejects_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            IngestQueue("newest", capacity=3, is_keyframe=is_keyframe)
+
+
+class TestKeyframeDetection(unittest.TestCase):
+    def test_zdepth(self):
+        self.assertTrue(is_zdepth_keyframe((memoryview(bytes([202, 1, 0, 0])), 0)))
+        self.assertFalse(is_zdepth_keyframe((memoryview(bytes([202, 0, 0, 0])), 0)))
+        self.assertFalse(is_zdepth_keyframe((memoryview(bytes([7, 1, 0, 0])), 0)))
+        self.assertFalse(is_zdepth_keyframe((memoryview(b""), 0)))
+
+    def test_h264(self):
+        sps_pps_idr = b"\x00\x00\x00\x01\x67\x42" + b"\x00\x00\x00\x01\x68\xce" + b"\x00\x00\x01\x65\x88"
+        idr_only = b"\x00\x00\x00\x01\x65\x88\x84"
+        non_idr = b"\x00\x00\x00\x01\x09\xf0" + b"\x00\x00\x00\x01\x41\x9a"
+
+        self.assertTrue(is_h264_keyframe((memoryview(sps_pps_idr), 0)))
+        self.assertTrue(is_h264_keyframe((memoryview(idr_only), 0)))
+        self.assertFalse(is_h264_keyframe((memoryview(non_idr), 0)))
+        self.assertFalse(is_h264_keyframe((memoryview(b""), 0)))
+
+
+if __name__ == "__main__":
+    unittest.main()
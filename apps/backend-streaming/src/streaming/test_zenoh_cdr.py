@@ -0,0 +1,89 @@
+import dataclasses
+import unittest
+
+from pycdr2._support import Endianness
+
+from streaming.zenoh_cdr import (
+    Header,
+    Quaternion,
+    RigidTransform,
+    Time,
+    Vector3,
+    VideoStreamMessage,
+    parse_video_stream_message,
+    stamp_ns,
+)
+
+
+def create_message(frame_id: str, image: bytes) -> VideoStreamMessage:
+    return VideoStreamMessage(
+        header=Header(stamp=Time(sec=1712, nanosec=123456789), frame_id=frame_id),
+        pose=RigidTransform(
+            translation=Vector3(x=0.25, y=-1.5, z=2.0),
+            rotation=Quaternion(x=0.1, y=0.2, z=0.3, w=0.9),
+        ),
+        camera_focal_length=[504.5, 504.25],
+        camera_principal_point=[160.5, 144.5],
+        camera_radial_distortion=[0.5, -0.25, 0.125],
+        camera_tangential_distortion=[0.0625, -0.03125],
+        image_bytes=len(image),
+        image=image,
+    )
+
+
+class TestParseVideoStreamMessage(unittest.TestCase):
+    def assert_matches_pycdr2(self, data: bytes):
+        parsed = parse_video_stream_message(data)
+        expected = VideoStreamMessage.deserialize(data)
+
+        self.assertIsInstance(parsed.image, memoryview)
+        self.assertEqual(bytes(parsed.image), bytes(expected.image))
+        self.assertEqual(dataclasses.replace(parsed, image=expected.image), expected)
+
+    def test_matches_pycdr2_for_all_encapsulations(self):
+        for frame_id in ["", "c", "cam", "camera01", "depth_camera_frame"]:
+            message = create_message(frame_id, bytes(range(256)) * 3)
+            for endianness in [Endianness.Little, Endianness.Big]:
+                for use_version_2 in [False, True]:
+                    with self.subTest(frame_id=frame_id, endianness=endianness, use_version_2=use_version_2):
+                        data = message.serialize(endianness=endianness, use_version_2=use_version_2)
+                        self.assert_matches_pycdr2(data)
+
+    def test_empty_image(self):
+        self.assert_matches_pycdr2(create_message("cam", b"").serialize())
+
+    def test_image_is_a_view_of_the_payload(self):
+        data = bytearray(create_message("cam", b"\x01\x02\x03\x04").serialize())
+        parsed = parse_video_stream_message(data)
+
+        data[-4] = 0xFF
+
+        self.assertEqual(bytes(parsed.image), b"\xff\x02\x03\x04")
+
+    def test_accepts_memoryview(self):
+        data = create_message("cam", b"abc").serialize()
+        parsed = parse_video_stream_message(memoryview(data))
+        self.assertEqual(bytes(parsed.image), b"abc")
+
+    def test_rejects_truncated_payload(self):
+        data = create_message("cam", b"abcdef").serialize()
+        with self.assertRaises(ValueError):
+            parse_video_stream_message(data[:-1])
+
+    def test_rejects_unknown_encapsulation(self):
+        data = bytearray(create_message("cam", b"abc").serialize())
+        data[1] = 0x0A
+        with self.assertRaises(ValueError):
+            parse_video_stream_message(data)
+
+
+class TestStampNs(unittest.TestCase):
+    def test_counts_past_second_boundaries(self):
+        before = stamp_ns(Time(sec=1712, nanosec=999_000_000))
+        after = stamp_ns(Time(sec=1713, nanosec=1_000_000))
+        self.assertEqual(after - before, 2_000_000)
+        self.assertEqual(stamp_ns(Time(sec=1712, nanosec=123456789)), 1712_123456789)
+
+
+if __name__ == "__main__":
+    unittest.main()
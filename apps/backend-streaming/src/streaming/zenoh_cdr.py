@@ -1,3 +1,4 @@
+import struct
 from dataclasses import dataclass
 from pycdr2 import IdlStruct
 from pycdr2.types import int32, uint32, float64, float32, sequence, uint8, uint16, uint64, array
@@ -10,6 +11,14 @@ class Time(IdlStruct, typename="Time"):
     nanosec: uint32
 
 
+NANOSECONDS_PER_SECOND = 1_000_000_000
+
+
+def stamp_ns(stamp: Time) -> int:
+    """A header stamp in nanoseconds, counting on past the second boundaries nanosec wraps at."""
+    return stamp.sec * NANOSECONDS_PER_SECOND + stamp.nanosec
+
+
 @dataclass
 class Header(IdlStruct, typename="Header"):
     stamp: Time
@@ -49,8 +58,79 @@ class VideoStreamMessage(IdlStruct, typename="VideoStreamMessage"):
     image: sequence[uint8]
 
 
-def parse_video_stream_message(data: bytes) -> VideoStreamMessage:
-    return VideoStreamMessage.deserialize(data)
+# Encapsulation identifier -> (struct byte order, max alignment). XCDR2 caps the
+# alignment of 8-byte primitives at 4.
+_CDR_ENCAPSULATIONS = {
+    0x0000: (">", 8),  # CDR_BE
+    0x0001: ("<", 8),  # CDR_LE
+    0x0006: (">", 4),  # CDR2_BE
+    0x0007: ("<", 4),  # CDR2_LE
+}
+
+# header.stamp.sec, header.stamp.nanosec, header.frame_id length
+_VIDEO_STREAM_HEAD = {e: struct.Struct(e + "iII") for e in "<>"}
+# pose (7 x float64), focal length, principal point, radial and tangential distortion (9 x float32)
+_VIDEO_STREAM_BODY = {e: struct.Struct(e + "7d9f") for e in "<>"}
+# image_bytes (uint64)
+_VIDEO_STREAM_IMAGE_BYTES = {e: struct.Struct(e + "Q") for e in "<>"}
+# image sequence length
+_VIDEO_STREAM_IMAGE_LENGTH = {e: struct.Struct(e + "I") for e in "<>"}
+
+_CDR_HEADER_SIZE = 4
+
+
+def _cdr_align(offset: int, alignment: int) -> int:
+    """Align an absolute offset; CDR alignment is relative to the end of the encapsulation header."""
+    relative = offset - _CDR_HEADER_SIZE
+    return _CDR_HEADER_SIZE + ((relative + alignment - 1) & ~(alignment - 1))
+
+
+def parse_video_stream_message(data: bytes | memoryview) -> VideoStreamMessage:
+    """Parse a VideoStreamMessage without copying its image payload.
+
+    Unlike VideoStreamMessage.deserialize, which turns the image sequence into a Python
+    list, only the fixed-size fields are unpacked and `image` is returned as a
+    memoryview slice of `data`. The view keeps `data` alive for as long as it is used.
+    """
+    buffer = memoryview(data)
+    if len(buffer) < _CDR_HEADER_SIZE:
+        raise ValueError("CDR payload is shorter than its encapsulation header")
+    encapsulation = _CDR_ENCAPSULATIONS.get((buffer[0] << 8) | buffer[1])
+    if encapsulation is None:
+        raise ValueError(f"Unsupported CDR encapsulation 0x{buffer[0]:02x}{buffer[1]:02x}")
+    endian, max_alignment = encapsulation
+
+    offset = _CDR_HEADER_SIZE
+    sec, nanosec, frame_id_length = _VIDEO_STREAM_HEAD[endian].unpack_from(buffer, offset)
+    offset += _VIDEO_STREAM_HEAD[endian].size
+    # The string length includes the trailing NUL
+    frame_id = bytes(buffer[offset:offset + max(frame_id_length - 1, 0)]).decode()
+    offset = _cdr_align(offset + frame_id_length, max_alignment)
+
+    body = _VIDEO_STREAM_BODY[endian].unpack_from(buffer, offset)
+    offset = _cdr_align(offset + _VIDEO_STREAM_BODY[endian].size, max_alignment)
+
+    (image_bytes,) = _VIDEO_STREAM_IMAGE_BYTES[endian].unpack_from(buffer, offset)
+    offset += _VIDEO_STREAM_IMAGE_BYTES[endian].size
+
+    (image_length,) = _VIDEO_STREAM_IMAGE_LENGTH[endian].unpack_from(buffer, offset)
+    offset += _VIDEO_STREAM_IMAGE_LENGTH[endian].size
+    if offset + image_length > len(buffer):
+        raise ValueError(f"CDR image sequence of {image_length} bytes exceeds the payload")
+
+    return VideoStreamMessage(
+        header=Header(stamp=Time(sec=sec, nanosec=nanosec), frame_id=frame_id),
+        pose=RigidTransform(
+            translation=Vector3(x=body[0], y=body[1], z=body[2]),
+            rotation=Quaternion(x=body[3], y=body[4], z=body[5], w=body[6]),
+        ),
+        camera_focal_length=list(body[7:9]),
+        camera_principal_point=list(body[9:11]),
+        camera_radial_distortion=list(body[11:14]),
+        camera_tangential_distortion=list(body[14:16]),
+        image_bytes=image_bytes,
+        image=buffer[offset:offset + image_length],
+    )
 
 
 class CameraModelType(IntEnum):
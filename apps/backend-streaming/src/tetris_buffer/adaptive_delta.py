@@ -0,0 +1,69 @@
+import numpy as np
+
+
+class AdaptiveDelta:
+    """
+    Online estimate of per-stream timestamp offsets and of the matching window.
+
+    Offsets are what the TetrisEngine subtracts from a stream's index values before
+    matching, so constant clock offsets between cameras do not eat into the window.
+    Every completed row moves each stream's offset by an EWMA step towards the
+    distance of its entry from the row mean, and tracks the remaining jitter the same
+    way. The mean offset stays where it started, so corrected index values do not
+    wander off.
+
+    Every `interval` inserts the window is retuned against a target completion rate,
+    where 1.0 means every inserted entry ended up in a row: below the target it
+    widens, so offsets larger than the window can still be learned, and above it it
+    shrinks towards a multiple of the largest jitter.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        initial_delta: int,
+        min_delta: int,
+        max_delta: int,
+        initial_offsets: list[int] | None = None,
+        target_completion: float = 0.9,
+        alpha: float = 0.05,
+        jitter_factor: float = 4.0,
+        interval: int = 120,
+    ):
+        self.size = size
+        self.delta = initial_delta
+        self.min_delta = min_delta
+        self.max_delta = max_delta
+        self.target_completion = target_completion
+        self.alpha = alpha
+        self.jitter_factor = jitter_factor
+        self.interval = interval
+        self.offsets = np.zeros(size) if initial_offsets is None else np.array(initial_offsets, dtype=np.float64)
+        self.jitter = np.zeros(size)
+        self.completion = 1.0
+        self._inserts = 0
+        self._rows = 0
+
+    def observe_row(self, row_values: np.ndarray):
+        """Update the estimates from the raw index values of a completed row."""
+        # Relative to one entry: stamps in nanoseconds are too large for float64 to hold exactly
+        residuals = (row_values - row_values[0]) - self.offsets
+        residuals -= residuals.mean()
+        self.offsets += self.alpha * residuals
+        self.jitter += self.alpha * (np.abs(residuals) - self.jitter)
+        self._rows += 1
+
+    def observe_insert(self) -> bool:
+        """Count an insert. Returns True when the window was retuned."""
+        self._inserts += 1
+        if self._inserts < self.interval:
+            return False
+        self.completion = self._rows * self.size / self._inserts
+        if self.completion < self.target_completion:
+            self.delta = min(self.max_delta, int(self.delta * 1.25) + 1)
+        else:
+            floor = max(self.min_delta, int(self.jitter_factor * self.jitter.max()))
+            self.delta = max(floor, int(self.delta * 0.9))
+        self._inserts = 0
+        self._rows = 0
+        return True
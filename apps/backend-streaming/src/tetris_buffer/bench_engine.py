@@ -0,0 +1,273 @@
+"""
+Compares TetrisEngine with the engine and SortedBuffer it started from.
+
+The baseline looks up the entry closest to the inserted one in every buffer on
+every insert. TetrisEngine skips the lookups while a buffer is empty, which no
+row can complete, and otherwise takes the closest entry on either side in every
+buffer and picks the row with the smallest spread from those.
+
+Every stream produces 30 fps frames with up to 3ms of timestamp jitter, and
+frames arrive in random order across streams. Reports the best time per insert
+of a few runs and the number of Python lines executed per insert, counted with
+sys.settrace.
+Python lines are what contends for the GIL with the decoder threads; numpy
+work inside a single line counts once.
+
+The lock contention figures come from 8 producer threads inserting at 120 fps
+each next to 2 threads that only spin, standing in for decoders holding the
+GIL, and report how long inserts wait for TetrisEngine.buffer_lock and hold it.
+
+Usage (from apps/backend-streaming/src): python -m tetris_buffer.bench_engine
+"""
+import random
+import sys
+import time
+from threading import Event, Lock, Thread
+from typing import Callable
+
+from tetris_buffer.engine import TetrisEngine, TetrisEngineState
+from tetris_buffer.sorted_buffer import RemoveResult, SortedBufferEntry, SortedBufferGetResult
+
+FRAME_NS = 33_333_333
+JITTER_NS = 3_000_000
+DELTA_NS = 10_000_000
+FRAMES = 3000
+CONTENTION_STREAMS = 8
+CONTENTION_FPS = 120
+CONTENTION_SECONDS = 3
+# Best of, against scheduling noise
+REPEATS = 5
+
+
+class BaselineSortedBuffer:
+    """SortedBuffer before the array('q') rework: a descending list searched recursively."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.array: list[SortedBufferEntry] = []
+
+    def __len__(self):
+        return len(self.array)
+
+    def _location_of(self, e_index_val: int, start: int, end: int) -> int:
+        pivot = start + (end - start) // 2
+        if pivot >= len(self.array) or self.array[pivot].index_value == e_index_val:
+            return pivot
+        if end - start <= 1:
+            return pivot if self.array[pivot].index_value < e_index_val else pivot + 1
+        if self.array[pivot].index_value > e_index_val:
+            return self._location_of(e_index_val, pivot + 1, end)
+        else:
+            return self._location_of(e_index_val, start, pivot)
+
+    def insert(self, e: SortedBufferEntry) -> int:
+        location = self._location_of(e.index_value, 0, len(self.array))
+        self.array.insert(location, e)
+        if len(self.array) > self.max_size:
+            self.array.pop()
+        return location
+
+    def get(self, index_value: int, delta: int) -> SortedBufferGetResult | None:
+        loc = self._location_of(index_value, 0, len(self.array))
+        res = None
+        for i in [loc, loc - 1, loc + 1]:
+            if 0 <= i < len(self.array):
+                item = self.array[i]
+                item_delta = abs(item.index_value - index_value)
+                if item_delta <= delta:
+                    if res is None or res.delta > item_delta:
+                        res = SortedBufferGetResult(result=item, delta=item_delta, index=i)
+        return res
+
+    def remove(self, index: int, delete_lower_index_values: bool) -> RemoveResult:
+        if delete_lower_index_values:
+            removed_count = len(self.array) - index
+            del self.array[index:len(self.array)]
+            return RemoveResult(count=removed_count)
+        else:
+            self.array.pop(index)
+            return RemoveResult(count=1)
+
+
+class BaselineTetrisEngine:
+    """TetrisEngine before the backlog: one get per buffer around the inserted entry."""
+
+    def __init__(self, size, max_buffer_size, max_index_value_delta, on_complete_row,
+                 remove_lower_index_values_on_complete_row):
+        self.buffer_lock = Lock()
+        self.size = size
+        self.max_index_value_delta = max_index_value_delta
+        self.on_complete_row = on_complete_row
+        self.remove_lower_index_values_on_complete_row = remove_lower_index_values_on_complete_row
+        self.buffers = [BaselineSortedBuffer(max_buffer_size) for _ in range(size)]
+        self.state = TetrisEngineState(size)
+
+    def _check_complete_row(self, e_index_value: int):
+        row_result: list[SortedBufferGetResult] = []
+        for buffer in self.buffers:
+            result = buffer.get(e_index_value, self.max_index_value_delta)
+            if result is None:
+                return
+            row_result.append(result)
+
+        for i, buffer in enumerate(self.buffers):
+            remove_result = buffer.remove(
+                row_result[i].index, self.remove_lower_index_values_on_complete_row
+            )
+            skipped = remove_result.count - 1
+            self.state.skipped["buffers"][i] += skipped
+            self.state.skipped["total"] += skipped
+
+        self.state.completed += 1
+        self.on_complete_row(row_result)
+
+    def insert(self, buffer_index: int, e: SortedBufferEntry) -> int:
+        if not 0 <= buffer_index < self.size:
+            raise ValueError("Invalid buffer index")
+        with self.buffer_lock:
+            index = self.buffers[buffer_index].insert(e)
+            self._check_complete_row(e.index_value)
+            return index
+
+    def get_state(self) -> TetrisEngineState:
+        return self.state
+
+
+def arrivals(streams: int, rng: random.Random) -> list[tuple[int, int]]:
+    frames = [
+        (stream, i * FRAME_NS + rng.randint(-JITTER_NS, JITTER_NS))
+        for i in range(FRAMES)
+        for stream in range(streams)
+    ]
+    # Streams deliver in order, but interleave randomly with each other
+    for i in range(len(frames) - 1, 0, -1):
+        if rng.random() < 0.5:
+            frames[i], frames[i - 1] = frames[i - 1], frames[i]
+    return frames
+
+
+def count_lines(run: Callable[[], None]) -> int:
+    lines = 0
+
+    def tracer(frame, event, arg):
+        nonlocal lines
+        if event == "line":
+            lines += 1
+        return tracer
+
+    sys.settrace(tracer)
+    try:
+        run()
+    finally:
+        sys.settrace(None)
+    return lines
+
+
+def run(engine_type: type, streams: int, buffer_size: int) -> tuple[float, float, int]:
+    """Return (microseconds per insert, Python lines per insert, completed rows)."""
+    frames = arrivals(streams, random.Random(streams))
+
+    def create():
+        return engine_type(
+            size=streams,
+            max_buffer_size=buffer_size,
+            max_index_value_delta=DELTA_NS,
+            on_complete_row=lambda row: None,
+            remove_lower_index_values_on_complete_row=True,
+        )
+
+    elapsed = float("inf")
+    for _ in range(REPEATS):
+        engine = create()
+        began = time.perf_counter()
+        for stream, ts in frames:
+            engine.insert(stream, SortedBufferEntry(None, ts))
+        elapsed = min(elapsed, time.perf_counter() - began)
+
+    traced = create()
+    lines = count_lines(lambda: [traced.insert(stream, SortedBufferEntry(None, ts)) for stream, ts in frames])
+    return elapsed / len(frames) * 1e6, lines / len(frames), engine.get_state().completed
+
+
+class TimedLock:
+    """A Lock that records how long each acquire waited and how long the lock was held."""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.waits: list[int] = []
+        self.holds: list[int] = []
+        self.acquired = 0
+
+    def __enter__(self):
+        began = time.perf_counter_ns()
+        self.lock.acquire()
+        self.acquired = time.perf_counter_ns()
+        self.waits.append(self.acquired - began)
+
+    def __exit__(self, *exc):
+        self.holds.append(time.perf_counter_ns() - self.acquired)
+        self.lock.release()
+
+
+def percentiles(samples: list[int]) -> str:
+    samples = sorted(samples)
+    return " ".join(
+        f"{name} {samples[int(q * (len(samples) - 1))] / 1e3:6.1f}us"
+        for name, q in [("p50", 0.5), ("p99", 0.99), ("max", 1.0)]
+    )
+
+
+def contention() -> tuple[TimedLock, int]:
+    """Return buffer_lock's timings and the completed rows with producers at camera rates."""
+    engine = TetrisEngine(
+        size=CONTENTION_STREAMS,
+        max_buffer_size=30,
+        max_index_value_delta=JITTER_NS * 2,
+        on_complete_row=lambda row: None,
+        remove_lower_index_values_on_complete_row=True,
+    )
+    lock = engine.buffer_lock = TimedLock()
+    stop = Event()
+
+    def spin():
+        while not stop.is_set():
+            pass
+
+    def produce(stream: int):
+        rng = random.Random(stream)
+        frame_ns = 1_000_000_000 // CONTENTION_FPS
+        began = time.perf_counter_ns()
+        for frame in range(CONTENTION_FPS * CONTENTION_SECONDS):
+            delay = began + frame * frame_ns - time.perf_counter_ns()
+            if delay > 0:
+                time.sleep(delay / 1e9)
+            engine.insert(stream, SortedBufferEntry(None, frame * frame_ns + rng.randint(-JITTER_NS // 3, JITTER_NS // 3)))
+
+    spinners = [Thread(target=spin) for _ in range(2)]
+    producers = [Thread(target=produce, args=(stream,)) for stream in range(CONTENTION_STREAMS)]
+    for thread in spinners + producers:
+        thread.start()
+    for producer in producers:
+        producer.join()
+    stop.set()
+    for spinner in spinners:
+        spinner.join()
+    return lock, engine.get_state().completed
+
+
+def main():
+    for streams in [4, 8, 16]:
+        for buffer_size in [30, 60, 300]:
+            new = run(TetrisEngine, streams, buffer_size)
+            old = run(BaselineTetrisEngine, streams, buffer_size)
+            print(f"{streams} streams, buffer {buffer_size:3}: "
+                  f"engine {new[0]:5.1f}us {new[1]:5.1f} lines/insert ({new[2]} rows) | "
+                  f"baseline {old[0]:5.1f}us {old[1]:5.1f} lines/insert ({old[2]} rows)")
+
+    lock, rows = contention()
+    print(f"{CONTENTION_STREAMS} producers at {CONTENTION_FPS} fps ({rows} rows): "
+          f"wait for buffer_lock {percentiles(lock.waits)} | held {percentiles(lock.holds)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Compares SortedBuffer with the previous list-based implementation.
+
+Each buffer is filled to its maximum size with jittered, mostly increasing
+timestamps (33ms frames, up to 5ms jitter), then insert, get and remove are timed
+separately. Insert keeps the buffer full, so it includes dropping the oldest entry;
+remove deletes a single entry from the middle and re-inserts it.
+
+Usage (from apps/backend-streaming/src): python -m tetris_buffer.bench_sorted_buffer
+"""
+import random
+import time
+from typing import Callable
+
+from tetris_buffer.sorted_buffer import SortedBuffer, SortedBufferEntry
+from tetris_buffer.test_sorted_buffer import ListSortedBuffer
+
+SIZES = [30, 300, 3000]
+FRAME_NS = 33_000_000
+JITTER_NS = 5_000_000
+OPERATIONS = 20000
+
+
+def timestamps(count: int, rng: random.Random) -> list[int]:
+    return [i * FRAME_NS + rng.randint(-JITTER_NS, JITTER_NS) for i in range(count)]
+
+
+def measure(operation: Callable[[int], None]) -> float:
+    """Return operations per second."""
+    began = time.perf_counter()
+    for i in range(OPERATIONS):
+        operation(i)
+    return OPERATIONS / (time.perf_counter() - began)
+
+
+def run(create: Callable[[int], object], size: int) -> tuple[float, float, float]:
+    rng = random.Random(size)
+    buffer = create(size)
+    for ts in timestamps(size, rng):
+        buffer.insert(SortedBufferEntry(None, ts))
+
+    incoming = timestamps(size + OPERATIONS, rng)[size:]
+    insert = measure(lambda i: buffer.insert(SortedBufferEntry(None, incoming[i])))
+
+    newest = incoming[-1]
+    queries = [newest - rng.randint(0, size - 1) * FRAME_NS for _ in range(OPERATIONS)]
+    get = measure(lambda i: buffer.get(queries[i], JITTER_NS))
+
+    def remove(i: int):
+        result = buffer.get(queries[i], FRAME_NS)
+        buffer.remove(result.index, False)
+        buffer.insert(result.result)
+
+    return insert, get, measure(remove)
+
+
+def main():
+    for size in SIZES:
+        new = run(SortedBuffer, size)
+        old = run(ListSortedBuffer, size)
+        print(f"size {size:5}: " + " | ".join(
+            f"{name} {n / 1000:7.1f}k ops/s (list {o / 1000:6.1f}k, {n / o:.1f}x)"
+            for name, n, o in zip(["insert", "get", "remove"], new, old)
+        ))
+
+
+if __name__ == "__main__":
+    main()
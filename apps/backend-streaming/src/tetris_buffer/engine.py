@@ -1,21 +1,76 @@
+from collections import deque
 from typing import TypeVar, Generic, Callable
-from threading import Lock
+from threading import Condition, Lock
+import time
+import numpy as np
 from .sorted_buffer import (
     SortedBuffer,
     SortedBufferEntry,
     SortedBufferGetResult,
 )
+from .adaptive_delta import AdaptiveDelta
+from .row_channel import ROW_DELIVERY_POLICIES, RowDeliveryPolicy
 
 T = TypeVar("T")
 
+# Distance of a buffer without a candidate on that side, larger than any real spread
+NO_CANDIDATE = np.iinfo(np.int64).max // 8
+
 
 class TetrisEngineState(Generic[T]):
     def __init__(self, size: int):
         self.skipped = {"total": 0, "buffers": [0] * size}
         self.completed = 0
+        # Index values of the last completed row and their max pairwise delta after offsets
+        self.last_row: list[int | None] | None = None
+        self.last_row_spread = 0
+        # Rows emitted after the partial row deadline, and reused and missing entries per buffer
+        self.partial = 0
+        self.reused = [0] * size
+        self.missing = [0] * size
+        # Completed rows dropped because too many were waiting for delivery
+        self.dropped_rows = 0
 
 
 class TetrisEngine(Generic[T]):
+    """
+    Collects entries of several streams and emits rows of entries with matching index values.
+
+    Every stream has a SortedBuffer. While any buffer is empty an insert cannot
+    complete a row and does no matching. Otherwise each buffer is asked for its
+    closest entries at or below and above the new entry, and of the rows these allow
+    within max_index_value_delta the one with the smallest spread is taken.
+
+    buffer_lock covers an insert and the matching after it, with one lock for all
+    streams: an insert that cannot complete a row only adds its entry, and the
+    matching reads one or two entries per buffer, so the lock is held for a few
+    microseconds (see bench_engine's lock contention figures). Per-stream locks were
+    measured as well and only added acquisitions without shortening the waits, since
+    under the GIL a wait is mostly for the holder to be scheduled again.
+    Completed rows are queued in order
+    and on_complete_row runs after the lock is released, on the first inserting thread
+    that finds no other thread delivering, so a slow consumer holds up at most the
+    thread that delivers and never the inserts of the other streams. At most
+    max_pending_rows (default max_buffer_size) rows wait for delivery, since each holds
+    an entry of every stream; pending_row_policy says what happens to the rest, like
+    RowChannel: drop_oldest_row and coalesce_to_latest drop the oldest waiting rows,
+    block makes inserting threads wait for the delivering one after releasing the
+    lock, so at most one row per waiting producer is queued beyond the bound.
+
+    With an AdaptiveDelta, each buffer's estimated offset is subtracted from its index
+    values before matching, and max_index_value_delta follows the adaptive window.
+
+    With a partial_row_deadline (nanoseconds of clock time), an entry that has waited
+    that long for a complete row gets a partial one instead: every buffer contributes
+    its closest entry within max_index_value_delta, and a buffer without one reuses
+    the entry of its last row if that arrived at most staleness_budget ago. Reused
+    results have fresh set to False and index -1, unless the row they were taken
+    with was dropped before delivery: then they are new to the consumer and stay
+    fresh, so a result with fresh False is always one the consumer already got. A buffer with nothing young enough
+    to reuse is missing from the row: its result is None, so a stream that stops does
+    not hold up the rows of the others.
+    """
+
     def __init__(
         self,
         size: int,
@@ -23,8 +78,24 @@ class TetrisEngine(Generic[T]):
         max_index_value_delta: int,
         on_complete_row: Callable[[list[SortedBufferGetResult[T]]], None],
         remove_lower_index_values_on_complete_row: bool,
+        adaptive_delta: AdaptiveDelta | None = None,
+        partial_row_deadline: int | None = None,
+        staleness_budget: int = 0,
+        clock: Callable[[], int] = time.monotonic_ns,
+        max_pending_rows: int | None = None,
+        pending_row_policy: RowDeliveryPolicy = "drop_oldest_row",
     ):
+        if pending_row_policy not in ROW_DELIVERY_POLICIES:
+            raise ValueError(f"Unknown row delivery policy: {pending_row_policy}")
         self.buffer_lock = Lock()
+        self.delivery_lock = Lock()
+        self.pending_rows: deque[list[SortedBufferGetResult[T]]] = deque()
+        # Guards pending_rows and wakes producers waiting for space under the block policy
+        self.pending_space = Condition(Lock())
+        self.pending_row_policy = pending_row_policy
+        self.max_pending_rows = max_buffer_size if max_pending_rows is None else max_pending_rows
+        if pending_row_policy == "coalesce_to_latest":
+            self.max_pending_rows = 1
         self.size = size
         self.max_buffer_size = max_buffer_size
         self.max_index_value_delta = max_index_value_delta
@@ -33,35 +104,183 @@ class TetrisEngine(Generic[T]):
             remove_lower_index_values_on_complete_row
         )
         self.buffers = [SortedBuffer[T](max_buffer_size) for _ in range(size)]
+        # Buffers without entries; while there is one no complete row can exist
+        self.empty = set(range(size))
+        self.adaptive_delta = adaptive_delta
+        self.offsets = [0] * size
+        if adaptive_delta is not None:
+            self.max_index_value_delta = adaptive_delta.delta
+            self.offsets = np.rint(adaptive_delta.offsets).astype(np.int64).tolist()
+        self.partial_row_deadline = partial_row_deadline
+        self.staleness_budget = staleness_budget
+        self.clock = clock
+        # Entry of each buffer's last row and the clock time it arrived, for partial rows
+        self.last_entries: list[SortedBufferEntry[T] | None] = [None] * size
+        self.last_arrivals = [0] * size
         self.state = TetrisEngineState[T](size)
         self.fps_counter = None # Attached only to be accesed by webrtc server
 
-    def _check_complete_row(self, e_index_value: int):
-        row_result: List[SortedBufferGetResult[T]] = []
-        for buffer in self.buffers:
-            result = buffer.get(e_index_value, self.max_index_value_delta)
+    def _find_row(self, e_index_value: int) -> list[SortedBufferGetResult[T]] | None:
+        """
+        The row around e_index_value with the smallest spread, None if a buffer has no candidate.
+
+        Index values are compared after subtracting each buffer's offset, e_index_value
+        is already corrected. Per buffer only the closest entry at or below e_index_value
+        and the closest one above it can be part of the best row, so the row is fixed
+        by how far the window reaches below (a) and above (b) e_index_value: sorting
+        buffers by their distance below and taking suffix maxima of the distances above
+        gives a + b for every split.
+        """
+        below: list[SortedBufferGetResult[T] | None] = []
+        above: list[SortedBufferGetResult[T] | None] = []
+        choice = False
+        for buffer, offset in zip(self.buffers, self.offsets):
+            lower, upper = buffer.neighbours(e_index_value + offset, self.max_index_value_delta)
+            if lower is None:
+                # Most inserts cannot complete a row
+                if upper is None:
+                    return None
+            elif upper is not None:
+                choice = True
+            below.append(lower)
+            above.append(upper)
+        if not choice:
+            # Every buffer has a single candidate
+            return [upper if lower is None else lower for lower, upper in zip(below, above)]
+
+        below_reach = [NO_CANDIDATE if r is None else r.delta for r in below]
+        order = sorted(range(self.size), key=below_reach.__getitem__)
+        above_reach = [0] * (self.size + 1)
+        for k in range(self.size - 1, -1, -1):
+            upper = above[order[k]]
+            above_reach[k] = max(above_reach[k + 1], NO_CANDIDATE if upper is None else upper.delta)
+        # Last minimum: on equal spread take the entry below, like SortedBuffer.get
+        split = min(
+            range(self.size + 1),
+            key=lambda k: ((below_reach[order[k - 1]] if k > 0 else 0) + above_reach[k], -k),
+        )
+
+        row = above
+        for i in order[:split]:
+            row[i] = below[i]
+        return row
+
+    def _check_complete_row(self, buffer_index: int, e_index_value: int, now: int):
+        """Remove the best row around the new entry from the buffers and queue it for delivery."""
+        e_index_value -= self.offsets[buffer_index]
+        row = None if self.empty else self._find_row(e_index_value)
+        if row is not None:
+            self._take_row(row, e_index_value)
+        elif self.partial_row_deadline is not None:
+            self._check_partial_row(now)
+
+    def _check_partial_row(self, now: int):
+        overdue = [
+            index_value - offset
+            for buffer, offset in zip(self.buffers, self.offsets)
+            if (index_value := buffer.lowest_arrived_by(now - self.partial_row_deadline)) is not None
+        ]
+        if not overdue:
+            return
+        # Around the oldest overdue entry, so later frames still get their own rows
+        e_index_value = min(overdue)
+        row: list[SortedBufferGetResult[T]] = []
+        for i, (buffer, offset) in enumerate(zip(self.buffers, self.offsets)):
+            result = buffer.get(e_index_value + offset, self.max_index_value_delta)
             if result is None:
-                return
-            row_result.append(result)
+                last_entry = self.last_entries[i]
+                if last_entry is None or now - self.last_arrivals[i] > self.staleness_budget:
+                    result = SortedBufferGetResult(result=None, delta=0, index=-1, fresh=False)
+                else:
+                    result = SortedBufferGetResult(
+                        result=last_entry,
+                        delta=abs(last_entry.index_value - offset - e_index_value),
+                        index=-1,
+                        fresh=False,
+                    )
+            row.append(result)
+        self._take_row(row, e_index_value)
 
-        for i, buffer in enumerate(self.buffers):
-            remove_result = buffer.remove(
-                row_result[i].index, self.remove_lower_index_values_on_complete_row
-            )
-            skipped = remove_result.count - 1
+    def _take_row(self, row: list[SortedBufferGetResult[T]], e_index_value: int):
+        """Remove the fresh entries of row from their buffers and queue it for delivery."""
+        partial = False
+        for i, (buffer, result) in enumerate(zip(self.buffers, row)):
+            if not result.fresh:
+                partial = True
+                if result.result is None:
+                    self.state.missing[i] += 1
+                else:
+                    self.state.reused[i] += 1
+                continue
+            if self.partial_row_deadline is not None:
+                self.last_entries[i] = result.result
+                self.last_arrivals[i] = buffer.arrival(result.index)
+            skipped = buffer.remove(result.index, self.remove_lower_index_values_on_complete_row).count - 1
             self.state.skipped["buffers"][i] += skipped
             self.state.skipped["total"] += skipped
+            if not buffer:
+                self.empty.add(i)
 
+        row_values = [None if r.result is None else r.result.index_value for r in row]
+        aligned_values = [value - offset for value, offset in zip(row_values, self.offsets) if value is not None]
         self.state.completed += 1
-        self.on_complete_row(row_result)
+        self.state.last_row = row_values
+        self.state.last_row_spread = max(aligned_values) - min(aligned_values)
+        if partial:
+            self.state.partial += 1
+        # Reused entries say nothing about the current skew
+        elif self.adaptive_delta is not None:
+            self.adaptive_delta.observe_row(np.array(row_values, dtype=np.int64))
+            self.offsets = np.rint(self.adaptive_delta.offsets).astype(np.int64).tolist()
+        self._queue_row(row)
+
+    def _queue_row(self, row: list[SortedBufferGetResult[T]]):
+        with self.pending_space:
+            if self.pending_row_policy != "block":
+                while len(self.pending_rows) >= self.max_pending_rows:
+                    dropped = self.pending_rows.popleft()
+                    self.state.dropped_rows += 1
+                    # Entries the next row reuses from the dropped one never reached the consumer
+                    following = self.pending_rows[0] if self.pending_rows else row
+                    for i, (old, new) in enumerate(zip(dropped, following)):
+                        if old.fresh and not new.fresh and new.result is not None:
+                            following[i] = new._replace(fresh=True)
+            self.pending_rows.append(row)
+
+    def _deliver_rows(self):
+        # Re-check after releasing: a row queued while we held the lock is ours to deliver
+        while self.pending_rows:
+            if not self.delivery_lock.acquire(blocking=False):
+                # The delivering thread picks up our rows as well
+                if self.pending_row_policy == "block":
+                    with self.pending_space:
+                        self.pending_space.wait_for(lambda: len(self.pending_rows) <= self.max_pending_rows)
+                return
+            try:
+                while True:
+                    with self.pending_space:
+                        if not self.pending_rows:
+                            break
+                        row = self.pending_rows.popleft()
+                        # Only the block policy has producers waiting for space
+                        if self.pending_row_policy == "block":
+                            self.pending_space.notify_all()
+                    self.on_complete_row(row)
+            finally:
+                self.delivery_lock.release()
 
     def insert(self, buffer_index: int, e: SortedBufferEntry[T]) -> int:
         if not 0 <= buffer_index < self.size:
             raise ValueError("Invalid buffer index")
         with self.buffer_lock:
-            index = self.buffers[buffer_index].insert(e)
-            self._check_complete_row(e.index_value)
-            return index
+            now = self.clock() if self.partial_row_deadline is not None else 0
+            location = self.buffers[buffer_index].insert(e, now)
+            self.empty.discard(buffer_index)
+            self._check_complete_row(buffer_index, e.index_value, now)
+            if self.adaptive_delta is not None and self.adaptive_delta.observe_insert():
+                self.max_index_value_delta = self.adaptive_delta.delta
+        self._deliver_rows()
+        return location
 
     def get_buffers(self) -> list[SortedBuffer[T]]:
         return self.buffers
@@ -72,7 +291,7 @@ class TetrisEngine(Generic[T]):
     def set_metrics_callback(self, callback):
         if self.fps_counter:
             self.fps_counter._metrics_callback = callback
-    
+
     def record_metrics(self, seconds: int):
         if self.fps_counter:
-            self.fps_counter.record_metrics(seconds)
\ No newline at end of file
+            self.fps_counter.record_metrics(seconds)
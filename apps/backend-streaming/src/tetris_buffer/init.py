@@ -2,10 +2,32 @@ from core.state import GlobalState
 from performance.fps_counter import FPSCounter
 from tetris_buffer.sorted_buffer import SortedBufferGetResult
 from tetris_buffer.engine import TetrisEngine
+from tetris_buffer.row_channel import DisplayRow, RowChannel
+from tetris_buffer.adaptive_delta import AdaptiveDelta
 import numpy as np
 import threading
 import time
 
+MAX_INDEX_VALUE_DELTA = 10 * 1000 * 1000 # 10ms
+MIN_ADAPTIVE_DELTA = 2 * 1000 * 1000 # 2ms
+MAX_ADAPTIVE_DELTA = 50 * 1000 * 1000 # 50ms
+
+def camera_timestamp_offsets(state: GlobalState) -> list[int]:
+    """
+    Offsets to subtract from each buffer's index values, from CameraSensor.timestamp_offset_ns.
+
+    Index values are full header stamps, so only the offsets relative to the first
+    camera matter.
+    """
+    size = state.color_camera_count + state.depth_camera_count
+    descriptions = state.camera_descriptions or []
+    cameras = list(range(state.color_camera_count)) + list(range(state.depth_camera_count))
+    if len(descriptions) < max(state.color_camera_count, state.depth_camera_count):
+        return [0] * size
+    reference = descriptions[0].timestamp_offset_ns
+    # Corrected stamp = stamp + timestamp_offset_ns, so the offset to subtract is its negation
+    return [reference - descriptions[camera].timestamp_offset_ns for camera in cameras]
+
 def init_tetris_buffer(state: GlobalState) -> TetrisEngine[np.ndarray]:
     state.console.log("Initializing tetris buffer...")
 
@@ -15,17 +37,52 @@ def init_tetris_buffer(state: GlobalState) -> TetrisEngine[np.ndarray]:
     fps_counter = FPSCounter(console=state.console, name="Tetris Buffer")
     fps_counter.start()
 
+    display_rows = RowChannel[DisplayRow](state.row_delivery_policy, capacity=10)
+    state.set_display_rows(display_rows)
+    state.console.log(f"Row delivery policy: {state.row_delivery_policy}")
+
+    size = state.color_camera_count + state.depth_camera_count
+    # Rows are delivered one at a time, so the generations need no lock. A result
+    # that is not fresh is the entry the previous delivered row had, even when rows
+    # were dropped in between, so its generation stays
+    generations = [0] * size
+
     def on_complete_row(row: list[SortedBufferGetResult[np.ndarray]]):
         fps_counter.increment()
-        state.display_queues.put([r.result.value for r in row])
+        for i, r in enumerate(row):
+            if r.fresh:
+                generations[i] += 1
+        display_rows.put(DisplayRow(
+            images=[None if r.result is None else r.result.value for r in row],
+            generations=list(generations),
+            missing=[r.result is None for r in row],
+        ))
+
+    adaptive_delta = None
+    if state.adaptive_index_delta:
+        adaptive_delta = AdaptiveDelta(
+            size=size,
+            initial_delta=MAX_INDEX_VALUE_DELTA,
+            min_delta=MIN_ADAPTIVE_DELTA,
+            max_delta=MAX_ADAPTIVE_DELTA,
+            initial_offsets=camera_timestamp_offsets(state),
+        )
+        state.console.log(f"Adaptive index delta, initial offsets: {adaptive_delta.offsets.tolist()}")
 
     tetris_engine = TetrisEngine(
-        size=state.color_camera_count + state.depth_camera_count,
+        size=size,
         max_buffer_size=30,
-        max_index_value_delta=10 * 1000 * 1000, # 10ms
+        max_index_value_delta=MAX_INDEX_VALUE_DELTA,
         on_complete_row=on_complete_row,
         remove_lower_index_values_on_complete_row=True,
+        adaptive_delta=adaptive_delta,
+        partial_row_deadline=state.partial_row_deadline_ns,
+        staleness_budget=state.staleness_budget_ns,
+        pending_row_policy=state.row_delivery_policy,
     )
+    if state.partial_row_deadline_ns is not None:
+        state.console.log(f"Partial rows after {state.partial_row_deadline_ns / 1e6:.0f}ms, "
+                          f"reusing entries up to {state.staleness_budget_ns / 1e6:.0f}ms old")
     
     # Attach the FPS counter to the engine for metrics recording
     tetris_engine.fps_counter = fps_counter
@@ -56,17 +113,44 @@ def init_tetris_buffer(state: GlobalState) -> TetrisEngine[np.ndarray]:
                 
                 state.console.log(f"Tetris Buffer Status:")
                 state.console.log(f"  Completed rows: {engine_state.completed}")
+                state.console.log(f"  Last row: {engine_state.last_row} (spread {engine_state.last_row_spread / 1e6:.2f}ms)")
+                state.console.log(f"  Partial rows: {engine_state.partial}, reused per buffer: {engine_state.reused}, "
+                                  f"missing per buffer: {engine_state.missing}")
+                state.console.log(f"  Rows dropped before delivery: {engine_state.dropped_rows}")
                 state.console.log(f"  Total skipped items: {engine_state.skipped['total']}")
                 state.console.log(f"  Skipped per buffer: {engine_state.skipped['buffers']}")
                 state.console.log(f"  Buffer sizes: {buffer_sizes}")
                 state.console.log(f"  Total buffered items: {total_buffered_items}")
                 state.console.log(f"  Max buffer size: {tetris_engine.max_buffer_size}")
+
+                state.console.log(f"  Index value delta: {tetris_engine.max_index_value_delta / 1e6:.2f}ms")
+                if adaptive_delta is not None:
+                    state.console.log(f"  Completion rate: {adaptive_delta.completion:.2f}")
+                    state.console.log(f"  Offsets (ms): {[round(o / 1e6, 2) for o in adaptive_delta.offsets]}")
+                    state.console.log(f"  Jitter (ms): {[round(j / 1e6, 2) for j in adaptive_delta.jitter]}")
+
+                row_stats = display_rows.stats()
+                state.console.log(f"  Rows produced/consumed/dropped: {row_stats.produced}/{row_stats.consumed}/{row_stats.dropped}")
+
+                ingest_stats = [queue.stats() for queue in state.ingest_queues or []]
+                if ingest_stats:
+                    state.console.log(f"  Ingest policy: {ingest_stats[0].policy}")
+                    state.console.log(f"  Ingest received/delivered: {[(s.received, s.delivered) for s in ingest_stats]}")
+                    state.console.log(f"  Ingest dropped (full/superseded/awaiting keyframe): "
+                                      f"{[(s.dropped_full, s.superseded, s.awaiting_keyframe) for s in ingest_stats]}")
                 
 
                 if hasattr(tetris_engine, 'fps_counter') and tetris_engine.fps_counter:
                     metrics_data = {
                         "completed_sets_total": engine_state.completed,
                         "skipped_items_total": engine_state.skipped['total'],
+                        "last_row_spread_ns": engine_state.last_row_spread,
+                        "partial_rows_total": engine_state.partial,
+                        "pending_rows_dropped_total": engine_state.dropped_rows,
+                        "rows_produced_total": row_stats.produced,
+                        "rows_consumed_total": row_stats.consumed,
+                        "rows_dropped_total": row_stats.dropped,
+                        "max_index_value_delta_ns": tetris_engine.max_index_value_delta,
                     }
                     
                     for i, size in enumerate(buffer_sizes):
@@ -76,6 +160,25 @@ def init_tetris_buffer(state: GlobalState) -> TetrisEngine[np.ndarray]:
                     if isinstance(skipped_buffers, list):
                         for i, skipped in enumerate(skipped_buffers):
                             metrics_data[f"skipped_items_buffer_{i}"] = skipped
+
+                    for i, reused in enumerate(engine_state.reused):
+                        metrics_data[f"reused_items_buffer_{i}"] = reused
+
+                    for i, missing in enumerate(engine_state.missing):
+                        metrics_data[f"missing_items_buffer_{i}"] = missing
+
+                    if adaptive_delta is not None:
+                        metrics_data["completion_rate"] = adaptive_delta.completion
+                        for i, (offset, jitter) in enumerate(zip(adaptive_delta.offsets, adaptive_delta.jitter)):
+                            metrics_data[f"offset_ns_{i}"] = int(offset)
+                            metrics_data[f"jitter_ns_{i}"] = int(jitter)
+
+                    for i, stats in enumerate(ingest_stats):
+                        metrics_data[f"ingest_received_{i}"] = stats.received
+                        metrics_data[f"ingest_delivered_{i}"] = stats.delivered
+                        metrics_data[f"ingest_dropped_full_{i}"] = stats.dropped_full
+                        metrics_data[f"ingest_superseded_{i}"] = stats.superseded
+                        metrics_data[f"ingest_awaiting_keyframe_{i}"] = stats.awaiting_keyframe
                     
                     tetris_engine.fps_counter.emit_event("buffer_status", metrics_data)
                     
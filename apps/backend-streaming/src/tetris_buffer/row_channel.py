@@ -0,0 +1,107 @@
+import threading
+from collections import deque
+from queue import Empty
+from typing import Generic, Literal, NamedTuple, TypeVar
+import numpy as np
+
+T = TypeVar("T")
+
+# block:              put waits while the channel is full
+# drop_oldest_row:    put drops the oldest undelivered row while the channel is full
+# coalesce_to_latest: only the newest undelivered row is kept
+RowDeliveryPolicy = Literal["block", "drop_oldest_row", "coalesce_to_latest"]
+ROW_DELIVERY_POLICIES: tuple[RowDeliveryPolicy, ...] = ("block", "drop_oldest_row", "coalesce_to_latest")
+
+
+class DisplayRow(NamedTuple):
+    """
+    A row for the renderer. A camera's generation only changes when its frame does.
+
+    A camera whose stream stopped is missing: its image is None and the renderer
+    keeps showing what it last drew for it.
+    """
+    images: list[np.ndarray | None]
+    generations: list[int]
+    missing: list[bool]
+
+
+class RowChannelStats(NamedTuple):
+    policy: RowDeliveryPolicy
+    occupancy: int
+    produced: int
+    consumed: int
+    dropped: int
+
+
+class RowChannel(Generic[T]):
+    """
+    Hands completed rows from the TetrisEngine to the renderer.
+
+    Only the block policy can make a producer wait, so with the other two a renderer
+    that falls behind the cameras sheds rows instead of stalling the decoder threads,
+    and latency stays bounded by the channel capacity.
+    """
+
+    def __init__(self, policy: RowDeliveryPolicy, capacity: int = 10):
+        if policy not in ROW_DELIVERY_POLICIES:
+            raise ValueError(f"Unknown row delivery policy: {policy}")
+        if capacity <= 0:
+            raise ValueError("Capacity must be a positive number.")
+        self.policy = policy
+        self.capacity = 1 if policy == "coalesce_to_latest" else capacity
+        self._rows: deque[T] = deque()
+        self._condition = threading.Condition()
+        self._produced = 0
+        self._consumed = 0
+        self._dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def put(self, row: T, timeout: float | None = None) -> bool:
+        """Add a row. Returns False if the block policy timed out waiting for space."""
+        with self._condition:
+            self._produced += 1
+            if len(self._rows) >= self.capacity:
+                if self.policy == "block":
+                    if not self._condition.wait_for(lambda: len(self._rows) < self.capacity, timeout):
+                        self._dropped += 1
+                        return False
+                else:
+                    self._rows.popleft()
+                    self._dropped += 1
+            self._rows.append(row)
+            self._condition.notify_all()
+            return True
+
+    def get(self, timeout: float | None = None) -> T:
+        """Return the oldest row, waiting up to timeout seconds. Raises queue.Empty."""
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._rows, timeout):
+                raise Empty
+            self._consumed += 1
+            row = self._rows.popleft()
+            self._condition.notify_all()
+            return row
+
+    def get_latest(self, timeout: float | None = None) -> T:
+        """Return the newest row and drop the older ones, waiting up to timeout seconds. Raises queue.Empty."""
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._rows, timeout):
+                raise Empty
+            self._consumed += 1
+            self._dropped += len(self._rows) - 1
+            row = self._rows.pop()
+            self._rows.clear()
+            self._condition.notify_all()
+            return row
+
+    def stats(self) -> RowChannelStats:
+        with self._condition:
+            return RowChannelStats(
+                policy=self.policy,
+                occupancy=len(self._rows),
+                produced=self._produced,
+                consumed=self._consumed,
+                dropped=self._dropped,
+            )
@@ -1,3 +1,5 @@
+from array import array
+from bisect import bisect_right
 from typing import List, TypeVar, Generic, NamedTuple
 
 T = TypeVar('T')
@@ -9,9 +11,12 @@ class SortedBufferEntry(NamedTuple):
 
 
 class SortedBufferGetResult(NamedTuple):
-    result: SortedBufferEntry[T]
+    # None for a stream missing from a TetrisEngine partial row
+    result: SortedBufferEntry[T] | None
     delta: int
     index: int
+    # False for an entry a TetrisEngine partial row reused from an earlier delivered row, or a missing one
+    fresh: bool = True
 
 
 class RemoveResult(NamedTuple):
@@ -19,48 +24,91 @@ class RemoveResult(NamedTuple):
 
 
 class SortedBuffer(Generic[T]):
+    """
+    Entries sorted by index_value, addressed newest (highest index_value) first.
+
+    Storage is ascending so the common case, a frame newer than everything buffered,
+    is an append. The index values live in a contiguous array('q') next to the entries
+    and are searched with bisect. Public indices (insert's return value, get's result
+    index and remove's argument) count from the newest entry, and an entry inserted
+    with an index_value already present is placed in front of the existing ones.
+
+    Each entry also keeps the clock time it was inserted at, if the caller passes one,
+    for TetrisEngine's partial row deadline.
+    """
+
     def __init__(self, max_size: int):
         self.max_size = max_size
-        self.array: List[SortedBufferEntry[T]] = []
+        self.index_values = array("q")  # ascending
+        self.entries: List[SortedBufferEntry[T]] = []  # same order as index_values
+        self.arrivals = array("q")  # same order as index_values
 
     def __len__(self):
-        return len(self.array)
-
-    def _location_of(self, e_index_val: int, start: int, end: int) -> int:
-        pivot = start + (end - start) // 2
-        if pivot >= len(self.array) or self.array[pivot].index_value == e_index_val:
-            return pivot
-        if end - start <= 1:
-            return pivot if self.array[pivot].index_value < e_index_val else pivot + 1
-        if self.array[pivot].index_value > e_index_val:
-            return self._location_of(e_index_val, pivot + 1, end)
-        else:
-            return self._location_of(e_index_val, start, pivot)
+        return len(self.entries)
 
-    def insert(self, e: SortedBufferEntry[T]) -> int:
-        location = self._location_of(e.index_value, 0, len(self.array))
-        self.array.insert(location, e)
-        if len(self.array) > self.max_size:
-            self.array.pop()
+    def insert(self, e: SortedBufferEntry[T], arrival: int = 0) -> int:
+        position = bisect_right(self.index_values, e.index_value)
+        location = len(self.entries) - position
+        self.index_values.insert(position, e.index_value)
+        self.entries.insert(position, e)
+        self.arrivals.insert(position, arrival)
+        if len(self.entries) > self.max_size:
+            # Drop the oldest entry
+            del self.index_values[0]
+            del self.entries[0]
+            del self.arrivals[0]
         return location
 
+    def neighbours(
+        self, index_value: int, delta: int
+    ) -> tuple[SortedBufferGetResult[T] | None, SortedBufferGetResult[T] | None]:
+        """The newest entry not above index_value and the oldest one above it, each only if within delta."""
+        count = len(self.entries)
+        position = bisect_right(self.index_values, index_value)
+        below = above = None
+        if position > 0 and index_value - self.index_values[position - 1] <= delta:
+            below = SortedBufferGetResult(
+                result=self.entries[position - 1],
+                delta=index_value - self.index_values[position - 1],
+                index=count - position,
+            )
+        if position < count and self.index_values[position] - index_value <= delta:
+            above = SortedBufferGetResult(
+                result=self.entries[position],
+                delta=self.index_values[position] - index_value,
+                index=count - 1 - position,
+            )
+        return below, above
+
     def get(self, index_value: int, delta: int) -> SortedBufferGetResult[T] | None:
-        loc = self._location_of(index_value, 0, len(self.array))
-        res = None
-        for i in [loc, loc - 1, loc + 1]:
-            if 0 <= i < len(self.array):
-                item = self.array[i]
-                item_delta = abs(item.index_value - index_value)
-                if item_delta <= delta:
-                    if res is None or res.delta > item_delta:
-                        res = SortedBufferGetResult(result=item, delta=item_delta, index=i)
-        return res
+        below, above = self.neighbours(index_value, delta)
+        # On equal distance the lower one wins
+        if above is None or (below is not None and below.delta <= above.delta):
+            return below
+        return above
+
+    def arrival(self, index: int) -> int:
+        """Clock time the entry at index was inserted at."""
+        return self.arrivals[len(self.entries) - 1 - index]
+
+    def lowest_arrived_by(self, time: int) -> int | None:
+        """Lowest index_value among the entries inserted at or before time, None if there is none."""
+        if not self.arrivals or min(self.arrivals) > time:
+            return None
+        for index_value, arrival in zip(self.index_values, self.arrivals):
+            if arrival <= time:
+                return index_value
+        return None
 
     def remove(self, index: int, delete_lower_index_values: bool) -> RemoveResult:
+        position = len(self.entries) - 1 - index
         if delete_lower_index_values:
-            removed_count = len(self.array) - index
-            del self.array[index:len(self.array)]
-            return RemoveResult(count=removed_count)
+            del self.index_values[:position + 1]
+            del self.entries[:position + 1]
+            del self.arrivals[:position + 1]
+            return RemoveResult(count=position + 1)
         else:
-            self.array.pop(index)
-            return RemoveResult(count=1)
\ No newline at end of file
+            del self.index_values[position]
+            del self.entries[position]
+            del self.arrivals[position]
+            return RemoveResult(count=1)
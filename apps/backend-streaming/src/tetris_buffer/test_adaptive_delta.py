@@ -0,0 +1,97 @@
+import random
+import unittest
+
+from tetris_buffer.adaptive_delta import AdaptiveDelta
+from tetris_buffer.engine import TetrisEngine
+from tetris_buffer.sorted_buffer import SortedBufferEntry
+
+MS = 1000 * 1000
+FRAME_NS = 33 * MS
+
+
+def run_streams(engine: TetrisEngine, offsets: list[int], jitter: int, frames: int, rng: random.Random, start: int = 0):
+    for frame in range(frames):
+        for stream, offset in enumerate(offsets):
+            index_value = start + frame * FRAME_NS + offset + rng.randint(-jitter, jitter)
+            engine.insert(stream, SortedBufferEntry(value=frame, index_value=index_value))
+
+
+def create_engine(adaptive_delta: AdaptiveDelta, rows: list) -> TetrisEngine:
+    return TetrisEngine[int](
+        size=adaptive_delta.size,
+        max_buffer_size=30,
+        max_index_value_delta=adaptive_delta.delta,
+        on_complete_row=rows.append,
+        remove_lower_index_values_on_complete_row=True,
+        adaptive_delta=adaptive_delta,
+    )
+
+
+class TestAdaptiveDelta(unittest.TestCase):
+    def test_learns_offsets_and_narrows_window(self):
+        offsets = [0, 4 * MS, -3 * MS]
+        adaptive_delta = AdaptiveDelta(size=3, initial_delta=10 * MS, min_delta=1 * MS, max_delta=50 * MS)
+        rows = []
+        engine = create_engine(adaptive_delta, rows)
+
+        run_streams(engine, offsets, jitter=MS // 4, frames=600, rng=random.Random(1))
+
+        mean = sum(offsets) / len(offsets)
+        for estimated, offset in zip(adaptive_delta.offsets, offsets):
+            self.assertAlmostEqual(estimated, offset - mean, delta=MS // 2)
+        self.assertLess(adaptive_delta.jitter.max(), MS // 2)
+        self.assertLess(engine.max_index_value_delta, 3 * MS)
+        self.assertLess(engine.get_state().last_row_spread, 2 * MS)
+        self.assertGreater(len(rows), 590)
+
+    def test_widens_window_for_offsets_beyond_it(self):
+        # 15ms apart, 18ms from the neighbouring frame: nothing matches a 5ms window
+        offsets = [0, 15 * MS]
+        adaptive_delta = AdaptiveDelta(size=2, initial_delta=5 * MS, min_delta=1 * MS, max_delta=40 * MS)
+        rows = []
+        engine = create_engine(adaptive_delta, rows)
+
+        run_streams(engine, offsets, jitter=MS // 4, frames=60, rng=random.Random(2))
+        self.assertEqual(len(rows), 0)
+        self.assertGreater(engine.max_index_value_delta, 5 * MS)
+
+        run_streams(engine, offsets, jitter=MS // 4, frames=1200, rng=random.Random(3))
+        self.assertAlmostEqual(adaptive_delta.offsets[1] - adaptive_delta.offsets[0], 15 * MS, delta=MS)
+        self.assertGreaterEqual(adaptive_delta.completion, adaptive_delta.target_completion)
+        self.assertLess(engine.max_index_value_delta, 5 * MS)
+
+    def test_initial_offsets_apply_before_any_row(self):
+        adaptive_delta = AdaptiveDelta(
+            size=2, initial_delta=2 * MS, min_delta=1 * MS, max_delta=40 * MS, initial_offsets=[0, 20 * MS],
+        )
+        rows = []
+        engine = create_engine(adaptive_delta, rows)
+
+        engine.insert(0, SortedBufferEntry(value=0, index_value=100 * MS))
+        engine.insert(1, SortedBufferEntry(value=0, index_value=120 * MS))
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][1].delta, 0)
+
+
+    def test_matches_rows_across_second_boundaries(self):
+        offsets = [0, 400 * MS, -300 * MS]
+        adaptive_delta = AdaptiveDelta(
+            size=3, initial_delta=10 * MS, min_delta=1 * MS, max_delta=50 * MS,
+            initial_offsets=offsets,
+        )
+        rows = []
+        engine = create_engine(adaptive_delta, rows)
+
+        # Full header stamps of a wall clock, crossing a second boundary every 30 frames
+        start = 1_700_000_000 * 1000 * MS + 900 * MS
+        run_streams(engine, offsets, jitter=MS // 4, frames=300, rng=random.Random(4), start=start)
+
+        self.assertGreaterEqual(len(rows), 299)
+        for row in rows:
+            self.assertEqual(len({r.result.value for r in row}), 1)
+        for estimated, offset in zip(adaptive_delta.offsets, offsets):
+            self.assertAlmostEqual(estimated, offset, delta=MS // 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,9 @@
 
+import itertools
+import random
+import sys
+import threading
+import time
 import unittest
 from unittest.mock import Mock
 
@@ -294,5 +299,418 @@ class TestTetrisEngine(unittest.TestCase):
         self.assertEqual(state.skipped["total"], 4)
         self.assertEqual(state.completed, 1)
 
+    def test_should_choose_row_with_smallest_spread(self):
+        on_complete_row = Mock()
+
+        engine = TetrisEngine[str](
+            size=3,
+            max_buffer_size=10,
+            max_index_value_delta=5,
+            remove_lower_index_values_on_complete_row=True,
+            on_complete_row=on_complete_row,
+        )
+
+        engine.insert(0, SortedBufferEntry(value="example1", index_value=96))
+        engine.insert(0, SortedBufferEntry(value="closer-but-wider-row", index_value=103))
+        engine.insert(1, SortedBufferEntry(value="example2", index_value=97))
+        engine.insert(2, SortedBufferEntry(value="example3", index_value=100))
+
+        expected_call = [
+            SortedBufferGetResult(
+                delta=4, index=1, result=SortedBufferEntry(value="example1", index_value=96)
+            ),
+            SortedBufferGetResult(
+                delta=3, index=0, result=SortedBufferEntry(value="example2", index_value=97)
+            ),
+            SortedBufferGetResult(
+                delta=0, index=0, result=SortedBufferEntry(value="example3", index_value=100)
+            ),
+        ]
+
+        on_complete_row.assert_called_once_with(unittest.mock.ANY)
+        self.assertEqual(on_complete_row.call_args[0][0], expected_call)
+
+        state = engine.get_state()
+        self.assertEqual(state.last_row, [96, 97, 100])
+        self.assertEqual(state.last_row_spread, 4)
+        self.assertEqual(len(engine.get_buffers()[0]), 1)
+
+    def test_buffers_emptied_by_a_row_complete_the_next_one(self):
+        rows = []
+        engine = TetrisEngine[str](
+            size=3,
+            max_buffer_size=10,
+            max_index_value_delta=5,
+            remove_lower_index_values_on_complete_row=True,
+            on_complete_row=rows.append,
+        )
+
+        engine.insert(0, SortedBufferEntry(value="a1", index_value=100))
+        engine.insert(0, SortedBufferEntry(value="a2", index_value=133))
+        engine.insert(1, SortedBufferEntry(value="b1", index_value=101))
+        self.assertEqual(engine.empty, {2})
+        engine.insert(2, SortedBufferEntry(value="c1", index_value=99))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(engine.empty, {1, 2})
+
+        engine.insert(1, SortedBufferEntry(value="b2", index_value=134))
+        engine.insert(2, SortedBufferEntry(value="c2", index_value=132))
+        self.assertEqual([r.result.value for r in rows[1]], ["a2", "b2", "c2"])
+        self.assertEqual(engine.empty, {0, 1, 2})
+
+    def test_should_match_brute_force_spread(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            rows = []
+            engine = TetrisEngine[int](
+                size=4,
+                max_buffer_size=8,
+                max_index_value_delta=10,
+                remove_lower_index_values_on_complete_row=False,
+                on_complete_row=rows.append,
+            )
+            for buffer_index in range(3):
+                for index_value in rng.sample(range(80, 121), 4):
+                    engine.insert(buffer_index, SortedBufferEntry(value=index_value, index_value=index_value))
+            self.assertEqual(rows, [])
+
+            buffers = [list(buffer.index_values) for buffer in engine.get_buffers()[:3]]
+            engine.insert(3, SortedBufferEntry(value=100, index_value=100))
+
+            candidates = [
+                max(row + (100,)) - min(row + (100,))
+                for row in itertools.product(*buffers)
+                if all(abs(v - 100) <= 10 for v in row)
+            ]
+            if not candidates:
+                self.assertEqual(rows, [])
+                continue
+            self.assertEqual(len(rows), 1)
+            self.assertEqual(engine.get_state().last_row_spread, min(candidates))
+            self.assertEqual(rows[0][3].result.index_value, 100)
+
+    def test_concurrent_producers_deliver_every_row_once(self):
+        streams, frames = 8, 400
+        interval = sys.getswitchinterval()
+        # Switch threads often so inserts land while other threads match and take rows
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+        for remove_lower in [False, True]:
+            with self.subTest(remove_lower=remove_lower):
+                delivered: list[list[SortedBufferGetResult[tuple[int, int]]]] = []
+
+                def on_complete_row(row):
+                    delivered.append(row)
+                    if len(delivered) % 50 == 0:
+                        time.sleep(0.01)  # An occasional slow consumer
+
+                engine = TetrisEngine[tuple[int, int]](
+                    size=streams,
+                    max_buffer_size=frames,
+                    max_index_value_delta=0,
+                    remove_lower_index_values_on_complete_row=remove_lower,
+                    on_complete_row=on_complete_row,
+                )
+
+                def produce(stream: int):
+                    for frame in range(frames):
+                        engine.insert(stream, SortedBufferEntry(value=(stream, frame), index_value=frame))
+
+                producers = [threading.Thread(target=produce, args=(stream,)) for stream in range(streams)]
+                for producer in producers:
+                    producer.start()
+                for producer in producers:
+                    producer.join()
+
+                self.assertEqual(engine.get_state().completed, frames)
+                self.assertEqual(engine.get_state().skipped["total"], 0)
+                self.assertEqual(len(delivered), frames)
+                self.assertEqual(sorted(row[0].result.index_value for row in delivered), list(range(frames)))
+                for row in delivered:
+                    frame = row[0].result.index_value
+                    self.assertEqual([r.result.value for r in row], [(stream, frame) for stream in range(streams)])
+                self.assertEqual([len(buffer) for buffer in engine.get_buffers()], [0] * streams)
+                self.assertEqual(engine.empty, set(range(streams)))
+
+    def test_slow_consumer_does_not_block_inserts(self):
+        release = threading.Event()
+        delivered = []
+
+        def on_complete_row(row):
+            release.wait(timeout=5)
+            delivered.append(row[0].result.index_value)
+
+        engine = TetrisEngine[str](
+            size=2,
+            max_buffer_size=10,
+            max_index_value_delta=0,
+            remove_lower_index_values_on_complete_row=True,
+            on_complete_row=on_complete_row,
+        )
+
+        engine.insert(0, SortedBufferEntry(value="a", index_value=1))
+        blocked = threading.Thread(target=engine.insert, args=(1, SortedBufferEntry(value="b", index_value=1)))
+        blocked.start()
+        while not engine.delivery_lock.locked():
+            time.sleep(0.001)
+
+        # Completes a second row while the first one is still being delivered
+        engine.insert(0, SortedBufferEntry(value="c", index_value=2))
+        engine.insert(1, SortedBufferEntry(value="d", index_value=2))
+        self.assertEqual(delivered, [])
+
+        release.set()
+        blocked.join()
+        self.assertEqual(delivered, [1, 2])
+
+    def create_blocked_engine(self, policy: str):
+        release = threading.Event()
+        delivered = []
+
+        def on_complete_row(row):
+            release.wait(timeout=5)
+            delivered.append(row[0].result.index_value)
+
+        engine = TetrisEngine[str](
+            size=2,
+            max_buffer_size=10,
+            max_index_value_delta=0,
+            remove_lower_index_values_on_complete_row=True,
+            on_complete_row=on_complete_row,
+            max_pending_rows=2,
+            pending_row_policy=policy,
+        )
+        engine.insert(0, SortedBufferEntry(value="a", index_value=0))
+        blocked = threading.Thread(target=engine.insert, args=(1, SortedBufferEntry(value="b", index_value=0)))
+        blocked.start()
+        while not engine.delivery_lock.locked():
+            time.sleep(0.001)
+        return engine, release, delivered, blocked
+
+    def test_pending_rows_drop_oldest_when_full(self):
+        engine, release, delivered, blocked = self.create_blocked_engine("drop_oldest_row")
+
+        for index_value in range(1, 6):
+            engine.insert(0, SortedBufferEntry(value="c", index_value=index_value))
+            engine.insert(1, SortedBufferEntry(value="d", index_value=index_value))
+        self.assertEqual(len(engine.pending_rows), 2)
+
+        release.set()
+        blocked.join()
+        self.assertEqual(delivered, [0, 4, 5])
+        self.assertEqual(engine.get_state().dropped_rows, 3)
+
+    def test_pending_rows_block_producers_when_full(self):
+        engine, release, delivered, blocked = self.create_blocked_engine("block")
+
+        for index_value in range(1, 3):
+            engine.insert(0, SortedBufferEntry(value="c", index_value=index_value))
+            engine.insert(1, SortedBufferEntry(value="d", index_value=index_value))
+        engine.insert(0, SortedBufferEntry(value="c", index_value=3))
+        producer = threading.Thread(target=engine.insert, args=(1, SortedBufferEntry(value="d", index_value=3)))
+        producer.start()
+        producer.join(timeout=0.05)
+        self.assertTrue(producer.is_alive())
+
+        release.set()
+        producer.join(timeout=1)
+        blocked.join()
+        self.assertFalse(producer.is_alive())
+        self.assertEqual(delivered, [0, 1, 2, 3])
+        self.assertEqual(engine.get_state().dropped_rows, 0)
+
+    def create_partial_engine(self, remove_lower: bool = True):
+        now = [0]
+        rows = []
+        engine = TetrisEngine[str](
+            size=3,
+            max_buffer_size=10,
+            max_index_value_delta=2,
+            remove_lower_index_values_on_complete_row=remove_lower,
+            on_complete_row=rows.append,
+            partial_row_deadline=50,
+            staleness_budget=200,
+            clock=lambda: now[0],
+        )
+        return engine, rows, now
+
+    def test_partial_row_reuses_last_entry_after_deadline(self):
+        engine, rows, now = self.create_partial_engine()
+        for stream in range(3):
+            engine.insert(stream, SortedBufferEntry(value=f"{stream}@0", index_value=0))
+        self.assertEqual(len(rows), 1)
+
+        # Stream 2 stops delivering
+        now[0] = 30
+        engine.insert(0, SortedBufferEntry(value="0@30", index_value=30))
+        engine.insert(1, SortedBufferEntry(value="1@31", index_value=31))
+        self.assertEqual(len(rows), 1)
+
+        now[0] = 90
+        engine.insert(0, SortedBufferEntry(value="0@60", index_value=60))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual([r.result.value for r in rows[1]], ["0@30", "1@31", "2@0"])
+        self.assertEqual([r.fresh for r in rows[1]], [True, True, False])
+        self.assertEqual(rows[1][2].index, -1)
+        self.assertEqual([len(buffer) for buffer in engine.get_buffers()], [1, 0, 0])
+
+        state = engine.get_state()
+        self.assertEqual((state.completed, state.partial, state.reused), (2, 1, [0, 0, 1]))
+        self.assertEqual(state.skipped["total"], 0)
+
+    def test_partial_row_marks_streams_past_staleness_budget_missing(self):
+        engine, rows, now = self.create_partial_engine()
+        for stream in range(3):
+            engine.insert(stream, SortedBufferEntry(value=f"{stream}@0", index_value=0))
+
+        now[0] = 230
+        engine.insert(0, SortedBufferEntry(value="0@230", index_value=230))
+        engine.insert(1, SortedBufferEntry(value="1@230", index_value=230))
+        now[0] = 300
+        engine.insert(0, SortedBufferEntry(value="0@300", index_value=300))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual([r.result and r.result.value for r in rows[1]], ["0@230", "1@230", None])
+        self.assertEqual([r.fresh for r in rows[1]], [True, True, False])
+
+        state = engine.get_state()
+        self.assertEqual((state.partial, state.reused, state.missing), (1, [0, 0, 0], [0, 0, 1]))
+        self.assertEqual(state.last_row, [230, 230, None])
+        self.assertEqual(state.last_row_spread, 0)
+
+        # A full row still completes and refreshes stream 2's reusable entry
+        engine.insert(2, SortedBufferEntry(value="2@300", index_value=300))
+        engine.insert(1, SortedBufferEntry(value="1@300", index_value=300))
+        self.assertEqual([r.result.value for r in rows[2]], ["0@300", "1@300", "2@300"])
+        self.assertTrue(all(r.fresh for r in rows[2]))
+
+    def test_rows_keep_coming_while_a_stream_stops_past_staleness_budget(self):
+        engine, rows, now = self.create_partial_engine()
+        for stream in range(3):
+            engine.insert(stream, SortedBufferEntry(value=f"{stream}@0", index_value=0))
+
+        # Stream 2 stops for four times the staleness budget, the others keep a frame every 30
+        for t in range(30, 810, 30):
+            now[0] = t
+            engine.insert(0, SortedBufferEntry(value=f"0@{t}", index_value=t))
+            engine.insert(1, SortedBufferEntry(value=f"1@{t + 1}", index_value=t + 1))
+
+        # Every frame older than the deadline gets a row, first reusing stream 2's entry, then without it
+        self.assertEqual([row[0].result.value for row in rows[1:]], [f"0@{t}" for t in range(30, 750, 30)])
+        reused = [row for row in rows[1:] if row[2].result is not None]
+        missing = [row for row in rows[1:] if row[2].result is None]
+        self.assertTrue(all(row[2].result.value == "2@0" for row in reused))
+        self.assertTrue(all(r.fresh for row in rows[1:] for r in row[:2]))
+        self.assertEqual(len(reused) + len(missing), len(rows) - 1)
+        self.assertGreater(len(missing), len(reused))
+        self.assertEqual([r.result.value for r in missing[-1][:2]], ["0@720", "1@721"])
+
+        state = engine.get_state()
+        self.assertEqual(state.reused[2], len(reused))
+        self.assertEqual(state.missing, [0, 0, len(missing)])
+
+        # Once stream 2 is back, rows are complete again
+        now[0] = 810
+        for stream in range(3):
+            engine.insert(stream, SortedBufferEntry(value=f"{stream}@810", index_value=810))
+        self.assertEqual([r.result.value for r in rows[-1]], ["0@810", "1@810", "2@810"])
+
+    def test_partial_row_keeps_later_entries_without_removing_lower(self):
+        engine, rows, now = self.create_partial_engine(remove_lower=False)
+        for stream in range(3):
+            engine.insert(stream, SortedBufferEntry(value=f"{stream}@0", index_value=0))
+
+        now[0] = 10
+        engine.insert(0, SortedBufferEntry(value="0@10", index_value=10))
+        engine.insert(0, SortedBufferEntry(value="0@20", index_value=20))
+        now[0] = 70
+        engine.insert(1, SortedBufferEntry(value="1@40", index_value=40))
+
+        self.assertEqual([r.result.value for r in rows[1]], ["0@10", "1@0", "2@0"])
+        self.assertEqual([r.fresh for r in rows[1]], [True, False, False])
+        self.assertEqual(list(engine.get_buffers()[0].index_values), [20])
+        self.assertEqual(list(engine.get_buffers()[1].index_values), [40])
+
+    def test_partial_row_after_dropped_row_marks_its_entries_fresh(self):
+        for policy in ["coalesce_to_latest", "drop_oldest_row"]:
+            with self.subTest(policy=policy):
+                now = [0]
+                rows = []
+                engine = TetrisEngine[str](
+                    size=2,
+                    max_buffer_size=10,
+                    max_index_value_delta=2,
+                    remove_lower_index_values_on_complete_row=True,
+                    on_complete_row=rows.append,
+                    partial_row_deadline=50,
+                    staleness_budget=200,
+                    clock=lambda: now[0],
+                    max_pending_rows=1,
+                    pending_row_policy=policy,
+                )
+                # Rows wait for delivery while someone else delivers
+                engine.delivery_lock.acquire()
+                engine.insert(0, SortedBufferEntry(value="0@0", index_value=0))
+                engine.insert(1, SortedBufferEntry(value="1@0", index_value=0))
+
+                # Stream 1 stops, the partial row reuses 1@0 and drops the row that had it
+                now[0] = 20
+                engine.insert(0, SortedBufferEntry(value="0@40", index_value=40))
+                now[0] = 80
+                engine.insert(0, SortedBufferEntry(value="0@70", index_value=70))
+                self.assertEqual(engine.get_state().dropped_rows, 1)
+
+                engine.delivery_lock.release()
+                now[0] = 90
+                engine.insert(0, SortedBufferEntry(value="0@80", index_value=80))
+                self.assertEqual([r.result.value for r in rows[0]], ["0@40", "1@0"])
+                self.assertEqual([r.fresh for r in rows[0]], [True, True])
+                self.assertEqual(engine.get_state().reused, [0, 1])
+
+    def test_reused_entries_were_delivered_before(self):
+        rng = random.Random(3)
+        for policy in ["coalesce_to_latest", "drop_oldest_row"]:
+            with self.subTest(policy=policy):
+                now = [0]
+                delivered = [None, None, None]
+
+                def on_complete_row(row):
+                    for i, r in enumerate(row):
+                        if r.fresh:
+                            delivered[i] = r.result
+                        elif r.result is not None:
+                            # What the consumer shows for an unchanged entry must be that entry
+                            self.assertIs(r.result, delivered[i])
+
+                engine = TetrisEngine[str](
+                    size=3,
+                    max_buffer_size=10,
+                    max_index_value_delta=3,
+                    remove_lower_index_values_on_complete_row=True,
+                    on_complete_row=on_complete_row,
+                    partial_row_deadline=50,
+                    staleness_budget=200,
+                    clock=lambda: now[0],
+                    max_pending_rows=2,
+                    pending_row_policy=policy,
+                )
+                for t in range(0, 6000, 10):
+                    now[0] = t
+                    # The consumer falls behind now and then
+                    if rng.random() < 0.1:
+                        if engine.delivery_lock.locked():
+                            engine.delivery_lock.release()
+                        else:
+                            engine.delivery_lock.acquire()
+                    for stream in range(3):
+                        # Stream 2 drops out for long stretches
+                        if stream < 2 or (t // 500) % 2 == 0 and rng.random() < 0.8:
+                            value = t + rng.randint(-2, 2)
+                            engine.insert(stream, SortedBufferEntry(value=f"{stream}@{value}", index_value=value))
+                if engine.delivery_lock.locked():
+                    engine.delivery_lock.release()
+                self.assertGreater(engine.get_state().dropped_rows, 0)
+                self.assertGreater(engine.get_state().partial, 0)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,64 @@
+import threading
+import unittest
+from queue import Empty
+
+from tetris_buffer.row_channel import RowChannel
+
+
+class TestRowChannel(unittest.TestCase):
+    def test_block_waits_for_space(self):
+        channel = RowChannel[int]("block", capacity=2)
+        channel.put(0)
+        channel.put(1)
+        self.assertFalse(channel.put(2, timeout=0.01))
+
+        producer = threading.Thread(target=channel.put, args=(3,))
+        producer.start()
+        self.assertEqual(channel.get(timeout=1), 0)
+        producer.join(timeout=1)
+        self.assertFalse(producer.is_alive())
+
+        self.assertEqual([channel.get(timeout=0), channel.get(timeout=0)], [1, 3])
+        self.assertEqual(channel.stats()[2:], (4, 3, 1))
+
+    def test_drop_oldest_row(self):
+        channel = RowChannel[int]("drop_oldest_row", capacity=3)
+        for i in range(5):
+            self.assertTrue(channel.put(i))
+
+        self.assertEqual([channel.get(timeout=0) for _ in range(3)], [2, 3, 4])
+        stats = channel.stats()
+        self.assertEqual((stats.produced, stats.consumed, stats.dropped, stats.occupancy), (5, 3, 2, 0))
+
+    def test_coalesce_to_latest(self):
+        channel = RowChannel[int]("coalesce_to_latest", capacity=10)
+        for i in range(5):
+            channel.put(i)
+
+        self.assertEqual(len(channel), 1)
+        self.assertEqual(channel.get(timeout=0), 4)
+        self.assertEqual(channel.stats()[2:], (5, 1, 4))
+
+    def test_get_latest_drops_older_rows(self):
+        channel = RowChannel[int]("drop_oldest_row", capacity=10)
+        for i in range(4):
+            channel.put(i)
+
+        self.assertEqual(channel.get_latest(timeout=0), 3)
+        self.assertEqual(len(channel), 0)
+        self.assertEqual(channel.stats()[2:], (4, 1, 3))
+
+    def test_get_times_out_when_empty(self):
+        channel = RowChannel[int]("drop_oldest_row")
+        with self.assertRaises(Empty):
+            channel.get(timeout=0.01)
+        with self.assertRaises(Empty):
+            channel.get_latest(timeout=0.01)
+
+    def test_rejects_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            RowChannel[int]("latest")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import random
+import unittest
+from typing import List
+
+from tetris_buffer.sorted_buffer import RemoveResult, SortedBuffer, SortedBufferEntry, SortedBufferGetResult
+
+
+class ListSortedBuffer:
+    """The previous list-based SortedBuffer, kept as the reference for its semantics."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.array: List[SortedBufferEntry] = []
+
+    def __len__(self):
+        return len(self.array)
+
+    def _location_of(self, e_index_val: int, start: int, end: int) -> int:
+        pivot = start + (end - start) // 2
+        if pivot >= len(self.array) or self.array[pivot].index_value == e_index_val:
+            return pivot
+        if end - start <= 1:
+            return pivot if self.array[pivot].index_value < e_index_val else pivot + 1
+        if self.array[pivot].index_value > e_index_val:
+            return self._location_of(e_index_val, pivot + 1, end)
+        else:
+            return self._location_of(e_index_val, start, pivot)
+
+    def insert(self, e: SortedBufferEntry) -> int:
+        location = self._location_of(e.index_value, 0, len(self.array))
+        self.array.insert(location, e)
+        if len(self.array) > self.max_size:
+            self.array.pop()
+        return location
+
+    def get(self, index_value: int, delta: int) -> SortedBufferGetResult | None:
+        loc = self._location_of(index_value, 0, len(self.array))
+        res = None
+        for i in [loc, loc - 1, loc + 1]:
+            if 0 <= i < len(self.array):
+                item = self.array[i]
+                item_delta = abs(item.index_value - index_value)
+                if item_delta <= delta:
+                    if res is None or res.delta > item_delta:
+                        res = SortedBufferGetResult(result=item, delta=item_delta, index=i)
+        return res
+
+    def remove(self, index: int, delete_lower_index_values: bool) -> RemoveResult:
+        if delete_lower_index_values:
+            removed_count = len(self.array) - index
+            del self.array[index:len(self.array)]
+            return RemoveResult(count=removed_count)
+        else:
+            self.array.pop(index)
+            return RemoveResult(count=1)
+
+
+class TestSortedBuffer(unittest.TestCase):
+    def test_matches_list_implementation(self):
+        rng = random.Random(42)
+        for max_size in [1, 5, 30, 300]:
+            with self.subTest(max_size=max_size):
+                buffer = SortedBuffer[int](max_size)
+                reference = ListSortedBuffer(max_size)
+                # Unique index values: the list implementation picks an arbitrary entry among equal ones
+                index_values = rng.sample(range(1_000_000), 3000)
+                for step, index_value in enumerate(index_values):
+                    entry = SortedBufferEntry(step, index_value)
+                    self.assertEqual(buffer.insert(entry), reference.insert(entry))
+
+                    query = index_value + rng.randint(-2000, 2000)
+                    expected = reference.get(query, 1000)
+                    self.assertEqual(buffer.get(query, 1000), expected)
+
+                    if expected is not None and step % 7 == 0:
+                        delete_lower = step % 2 == 0
+                        self.assertEqual(
+                            buffer.remove(expected.index, delete_lower),
+                            reference.remove(expected.index, delete_lower),
+                        )
+                    self.assertEqual(len(buffer), len(reference))
+
+    def test_equal_index_values_newest_first(self):
+        buffer = SortedBuffer[str](10)
+        self.assertEqual(buffer.insert(SortedBufferEntry("a", 5)), 0)
+        self.assertEqual(buffer.insert(SortedBufferEntry("b", 5)), 0)
+        self.assertEqual(buffer.insert(SortedBufferEntry("c", 3)), 2)
+
+        self.assertEqual(buffer.get(5, 0), SortedBufferGetResult(SortedBufferEntry("b", 5), delta=0, index=0))
+
+    def test_equal_distance_prefers_lower_index_value(self):
+        buffer = SortedBuffer[str](10)
+        buffer.insert(SortedBufferEntry("low", 8))
+        buffer.insert(SortedBufferEntry("high", 12))
+
+        self.assertEqual(buffer.get(10, 5), SortedBufferGetResult(SortedBufferEntry("low", 8), delta=2, index=1))
+        self.assertIsNone(buffer.get(10, 1))
+
+    def test_neighbours_on_both_sides(self):
+        buffer = SortedBuffer[str](10)
+        for index_value in [4, 8, 12, 20]:
+            buffer.insert(SortedBufferEntry(str(index_value), index_value))
+
+        below, above = buffer.neighbours(10, 3)
+        self.assertEqual(below, SortedBufferGetResult(SortedBufferEntry("8", 8), delta=2, index=2))
+        self.assertEqual(above, SortedBufferGetResult(SortedBufferEntry("12", 12), delta=2, index=1))
+        self.assertEqual(buffer.neighbours(12, 3)[0].result.index_value, 12)
+        self.assertEqual(buffer.neighbours(16, 3), (None, None))
+        below, above = buffer.neighbours(2, 3)
+        self.assertIsNone(below)
+        self.assertEqual(above.result.index_value, 4)
+        self.assertIsNone(buffer.neighbours(30, 10)[1])
+
+    def test_arrivals_follow_their_entries(self):
+        buffer = SortedBuffer[str](3)
+        buffer.insert(SortedBufferEntry("a", 10), arrival=100)
+        buffer.insert(SortedBufferEntry("b", 5), arrival=200)
+        buffer.insert(SortedBufferEntry("c", 20), arrival=300)
+        self.assertEqual([buffer.arrival(i) for i in range(3)], [300, 100, 200])
+        self.assertEqual(buffer.lowest_arrived_by(150), 10)
+        self.assertEqual(buffer.lowest_arrived_by(250), 5)
+        self.assertIsNone(buffer.lowest_arrived_by(50))
+
+        # Dropping the oldest entry and removals keep arrivals aligned
+        buffer.insert(SortedBufferEntry("d", 30), arrival=400)
+        buffer.remove(2, delete_lower_index_values=True)
+        self.assertEqual([buffer.arrival(i) for i in range(len(buffer))], [400, 300])
+        self.assertEqual(buffer.lowest_arrived_by(350), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
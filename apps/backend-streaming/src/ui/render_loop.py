@@ -1,10 +1,15 @@
 import asyncio
+import time
 import cv2
 import numpy as np
 from core.state import GlobalState
+from fractions import Fraction
 from performance.fps_counter import FPSCounter
 
 FPS = 120
+# RTP clock of video (90 kHz), which the published frames are stamped with
+VIDEO_CLOCK_RATE = 90000
+VIDEO_TIME_BASE = Fraction(1, VIDEO_CLOCK_RATE)
 
 def prepare_cam_frame_texture(img_bgr):
     if img_bgr is None or not isinstance(img_bgr, np.ndarray) or img_bgr.ndim != 3:
@@ -38,6 +43,7 @@ class RenderLoop:
         self.webrtc_runner = None
         self.fps_counter = FPSCounter(console=state.console, name="Render Loop")
         self.fps_counter.start()
+        self.video_clock_start = time.monotonic()
     
     def stop(self):
         """Stop the render loop gracefully"""
@@ -93,11 +99,15 @@ class RenderLoop:
                 # self.state.renderer.camera_display_scene.set_depth_images(depths)
                 # self.state.renderer.camera_display_scene.update_buffers()
                 self.state.renderer.render_frame()
+                if self.state.video_frame_slot is not None:
+                    self.publish_video_frame()
                 self.fps_counter.increment()
             except Exception as e:
                 self.state.console.log(f"Error during frame rendering: {e}")
                 pass
-            self.state.canvas.request_draw()
+            if self.state.frame_readback is None:
+                # Presents to the canvas, which downloads the frame again
+                self.state.canvas.request_draw()
             #await asyncio.sleep(1 / FPS)
             
         
@@ -105,6 +115,25 @@ class RenderLoop:
         if self.webrtc_runner:
             await self.webrtc_runner.cleanup()
 
+    def publish_video_frame(self):
+        """
+        Publish the frame rendered since the last call to the WebRTC tracks, once for all peers.
+
+        Frames are only converted while a track waits for a newer one. A track waits
+        once per frame it sends and a track behind the others takes the published
+        frame without waiting, so this converts at the rate of the fastest track, not
+        the render loop's, and not at all without peers.
+        """
+        if self.state.video_frame_slot.stats().waiting == 0:
+            return
+        frame = self.state.renderer.next_video_frame()
+        if frame is None:
+            return
+        # One clock for all tracks, whose copies of the frame keep its timestamp
+        frame.pts = round((time.monotonic() - self.video_clock_start) * VIDEO_CLOCK_RATE)
+        frame.time_base = VIDEO_TIME_BASE
+        self.state.video_frame_slot.publish(frame)
+
     def set_metrics_callback(self, callback):
         if self.fps_counter:
             self.fps_counter._metrics_callback = callback
@@ -25,6 +25,7 @@
 
 #pragma once
 
+#include <stddef.h>
 #include <stdint.h>
 #include <vector>
 
@@ -215,6 +216,11 @@ void DequantizeDepthImage(
     int height,
     const uint16_t* quantized,
     std::vector<uint16_t>& depth);
+void DequantizeDepthImage(
+    int width,
+    int height,
+    const uint16_t* quantized,
+    uint16_t* depth);
 
 
 //------------------------------------------------------------------------------
@@ -286,6 +292,24 @@ public:
         int& height,
         std::vector<uint16_t>& depth_out);
 
+    // Decompress buffer to a caller-provided depth array.
+    // depth_out must hold at least width*height values; the dimensions can be
+    // read from the header beforehand with PeekDimensions().
+    // Returns DepthResult::Success if original depth can be recovered
+    DepthResult Decompress(
+        const uint8_t* compressed_data,
+        size_t compressed_bytes,
+        int& width,
+        int& height,
+        uint16_t* depth_out);
+
+    // Read the frame dimensions from a compressed buffer without decoding it
+    static DepthResult PeekDimensions(
+        const uint8_t* compressed_data,
+        size_t compressed_bytes,
+        int& width,
+        int& height);
+
 protected:
     // Depth values quantized for current and last frame
     std::vector<uint16_t> QuantizedDepth[2];
@@ -310,6 +334,14 @@ protected:
     std::vector<uint8_t> Packed;
 
 
+    // Decodes into QuantizedDepth and returns a pointer to the decoded image
+    DepthResult DecompressQuantized(
+        const uint8_t* compressed_data,
+        size_t compressed_bytes,
+        int& width,
+        int& height,
+        const uint16_t*& quantized);
+
     void CompressImage(
         int width,
         int height,
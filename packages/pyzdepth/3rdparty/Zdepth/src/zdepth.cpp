@@ -131,6 +131,19 @@ void DequantizeDepthImage(
     }
 }
 
+void DequantizeDepthImage(
+    int width,
+    int height,
+    const uint16_t* quantized,
+    uint16_t* depth)
+{
+    const int n = width * height;
+
+    for (int i = 0; i < n; ++i) {
+        depth[i] = AzureKinectDequantizeDepth(quantized[i]);
+    }
+}
+
 
 //------------------------------------------------------------------------------
 // Depth Predictors
@@ -581,10 +594,74 @@ DepthResult DepthCompressor::Decompress(
     int& height,
     std::vector<uint16_t>& depth_out)
 {
-    if (compressed.size() < kDepthHeaderBytes) {
+    const uint16_t* depth = nullptr;
+    DepthResult result = DecompressQuantized(
+        compressed.data(),
+        compressed.size(),
+        width,
+        height,
+        depth);
+    if (result != DepthResult::Success) {
+        return result;
+    }
+
+    DequantizeDepthImage(width, height, depth, depth_out);
+    return DepthResult::Success;
+}
+
+DepthResult DepthCompressor::Decompress(
+    const uint8_t* compressed_data,
+    size_t compressed_bytes,
+    int& width,
+    int& height,
+    uint16_t* depth_out)
+{
+    const uint16_t* depth = nullptr;
+    DepthResult result = DecompressQuantized(
+        compressed_data,
+        compressed_bytes,
+        width,
+        height,
+        depth);
+    if (result != DepthResult::Success) {
+        return result;
+    }
+
+    DequantizeDepthImage(width, height, depth, depth_out);
+    return DepthResult::Success;
+}
+
+DepthResult DepthCompressor::PeekDimensions(
+    const uint8_t* compressed_data,
+    size_t compressed_bytes,
+    int& width,
+    int& height)
+{
+    if (compressed_bytes < kDepthHeaderBytes) {
         return DepthResult::FileTruncated;
     }
-    const uint8_t* src = compressed.data();
+    if (compressed_data[0] != kDepthFormatMagic) {
+        return DepthResult::WrongFormat;
+    }
+    width = ReadU16_LE(compressed_data + 4);
+    height = ReadU16_LE(compressed_data + 6);
+    if (width < 1 || width > 4096 || height < 1 || height > 4096) {
+        return DepthResult::Corrupted;
+    }
+    return DepthResult::Success;
+}
+
+DepthResult DepthCompressor::DecompressQuantized(
+    const uint8_t* compressed_data,
+    size_t compressed_bytes,
+    int& width,
+    int& height,
+    const uint16_t*& quantized)
+{
+    if (compressed_bytes < kDepthHeaderBytes) {
+        return DepthResult::FileTruncated;
+    }
+    const uint8_t* src = compressed_data;
     if (src[0] != kDepthFormatMagic) {
         return DepthResult::WrongFormat;
     }
@@ -628,7 +705,7 @@ DepthResult DepthCompressor::Decompress(
         return DepthResult::Corrupted;
     }
 
-    if (compressed.size() !=
+    if (compressed_bytes !=
         kDepthHeaderBytes +
         ZeroesCompressedBytes +
         BlocksCompressedBytes +
@@ -691,7 +768,7 @@ DepthResult DepthCompressor::Decompress(
         return DepthResult::Corrupted;
     }
 
-    DequantizeDepthImage(width, height, depth, depth_out);
+    quantized = depth;
     return DepthResult::Success;
 }
 
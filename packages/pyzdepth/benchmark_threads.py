@@ -0,0 +1,101 @@
+"""
+Measures aggregate Zdepth decode throughput for an increasing number of threads.
+
+Every thread owns its own DepthCompressor, like the per-camera decoder threads in
+backend-streaming. Because the codec releases the GIL, throughput should scale
+with the thread count up to the number of physical cores. The same camera counts
+are then decoded from a single Python thread through decompress_batch.
+
+Usage: python benchmark_threads.py [--width 320] [--height 288] [--seconds 3] [--threads 1 2 4 8]
+"""
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+import pyzdepth
+
+KEYFRAME_INTERVAL = 30
+
+
+def create_sequence(width: int, height: int, frame_count: int) -> list[bytes]:
+    """Compress a synthetic moving depth scene with a keyframe every KEYFRAME_INTERVAL frames."""
+    ys, xs = np.mgrid[0:height, 0:width]
+    rng = np.random.default_rng(0)
+    compressor = pyzdepth.DepthCompressor()
+    sequence = []
+    for i in range(frame_count):
+        depth = 1500 + 400 * np.sin((xs + 3 * i) / 25.0) * np.cos(ys / 30.0)
+        depth += rng.normal(0, 5, size=depth.shape)
+        depth[:, : width // 10] = 0  # invalid border, like a real sensor
+        frame = np.clip(depth, 0, 10000).astype(np.uint16)
+        result, compressed = compressor.Compress(width, height, frame.tobytes(), i % KEYFRAME_INTERVAL == 0)
+        if result != 5:
+            raise RuntimeError(f"Compression failed with result {result}")
+        sequence.append(compressed)
+    return sequence
+
+
+def run(sequence: list[bytes], width: int, height: int, thread_count: int, seconds: float) -> float:
+    """Decode the sequence in a loop on thread_count threads and return frames per second."""
+    counts = [0] * thread_count
+    start = threading.Barrier(thread_count + 1)
+    stop = threading.Event()
+
+    def worker(slot: int):
+        decompressor = pyzdepth.DepthCompressor()
+        out = np.empty((height, width), dtype=np.uint16)
+        start.wait()
+        while not stop.is_set():
+            for payload in sequence:
+                decompressor.DecompressInto(payload, out)
+                counts[slot] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(thread_count)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / (time.perf_counter() - began)
+
+
+def run_batched(sequence: list[bytes], width: int, height: int, camera_count: int, seconds: float) -> float:
+    """Decode camera_count streams with one decompress_batch call per row and return frames per second."""
+    decompressors = [pyzdepth.DepthCompressor() for _ in range(camera_count)]
+    outs = [np.empty((height, width), dtype=np.uint16) for _ in range(camera_count)]
+    frames = 0
+    began = time.perf_counter()
+    while time.perf_counter() - began < seconds:
+        for payload in sequence:
+            pyzdepth.decompress_batch([(d, payload, out) for d, out in zip(decompressors, outs)])
+            frames += camera_count
+    return frames / (time.perf_counter() - began)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--height", type=int, default=288)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    sequence = create_sequence(args.width, args.height, KEYFRAME_INTERVAL * 2)
+    print(f"{args.width}x{args.height}, {os.cpu_count()} CPUs")
+    baseline = None
+    for thread_count in args.threads:
+        fps = run(sequence, args.width, args.height, thread_count, args.seconds)
+        baseline = baseline or fps
+        print(f"  threads={thread_count}: {fps:8.1f} frames/s  ({fps / baseline:.2f}x)")
+    for camera_count in args.threads:
+        fps = run_batched(sequence, args.width, args.height, camera_count, args.seconds)
+        print(f"  batch={camera_count}:   {fps:8.1f} frames/s  ({fps / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,18 +3,37 @@
 
 #include <Python.h>
 #include <zdepth.hpp>
+#include <algorithm>
+#include <atomic>
+#include <condition_variable>
+#include <deque>
+#include <functional>
+#include <memory>
+#include <mutex>
+#include <new>
+#include <thread>
+#include <unordered_set>
 
+// The codec runs with the GIL released, so each compressor carries its own
+// lock to keep concurrent calls on the same instance from corrupting its
+// P-frame state. Calls on different instances run fully in parallel.
 typedef 
 struct
 {
     PyObject_HEAD
     zdepth::DepthCompressor zddc;
+    std::mutex lock;
 }
 DepthCompressor;
 
+static PyTypeObject *DepthCompressor_type = NULL;
+
 PyObject *DepthCompressor_new(PyTypeObject *type, PyObject *, PyObject *)
 {
     DepthCompressor *self = (DepthCompressor*) type->tp_alloc(type, 0);
+    if (self == NULL) {return NULL;}
+    new (&self->zddc) zdepth::DepthCompressor();
+    new (&self->lock) std::mutex();
     return (PyObject*) self;
 }
 
@@ -25,51 +44,341 @@ int DepthCompressor_init(PyObject *self, PyObject *args, PyObject *kwds)
 
 void DepthCompressor_dealloc(DepthCompressor *self)
 {
-    Py_TYPE(self)->tp_free((PyObject*)self);
+    PyTypeObject *type = Py_TYPE(self);
+    self->zddc.~DepthCompressor();
+    self->lock.~mutex();
+    type->tp_free((PyObject*)self);
+    Py_DECREF(type);
 }
 
 PyObject *DepthCompressor_Compress(PyObject *self, PyObject *args)
 {
     int width;
     int height;
-    char const *unquantized_depth;
-    Py_ssize_t size;
+    // Held until the end: the depth values are read without the GIL
+    Py_buffer unquantized_depth;
     int keyframe;
 
-    if (!PyArg_ParseTuple(args, "iiy#p", &width, &height, &unquantized_depth, &size, &keyframe)) {return NULL;}
+    if (!PyArg_ParseTuple(args, "iiy*p", &width, &height, &unquantized_depth, &keyframe)) {return NULL;}
+
+    if (width < 0 || height < 0 || unquantized_depth.len < (Py_ssize_t)width * height * (Py_ssize_t)sizeof(uint16_t))
+    {
+        PyBuffer_Release(&unquantized_depth);
+        PyErr_SetString(PyExc_ValueError, "depth buffer is smaller than width * height uint16 values");
+        return NULL;
+    }
 
     DepthCompressor* _self = reinterpret_cast<DepthCompressor*>(self);
     
     std::vector<uint8_t> compressed;
+    zdepth::DepthResult result;
 
-    zdepth::DepthResult result = _self->zddc.Compress(width, height, (uint16_t*)unquantized_depth, compressed, keyframe != 0);
+    Py_BEGIN_ALLOW_THREADS
+    {
+        std::lock_guard<std::mutex> guard(_self->lock);
+        result = _self->zddc.Compress(width, height, (uint16_t const*)unquantized_depth.buf, compressed, keyframe != 0);
+    }
+    Py_END_ALLOW_THREADS
 
+    PyBuffer_Release(&unquantized_depth);
     return Py_BuildValue("iy#", (int)result, compressed.data(), compressed.size() * sizeof(uint8_t));
 }
 
 PyObject *DepthCompressor_Decompress(PyObject *self, PyObject *args)
 {
-    char const *data;
-    Py_ssize_t size;
+    // Held until the end: the payload is copied without the GIL
+    Py_buffer data;
 
-    if (!PyArg_ParseTuple(args, "y#", &data, &size)) {return NULL;}
+    if (!PyArg_ParseTuple(args, "y*", &data)) {return NULL;}
 
     DepthCompressor * _self = reinterpret_cast<DepthCompressor*>(self);
 
-    std::vector<uint8_t> compressed(data, data + size);
-    int width;
-    int height;
+    int width = 0;
+    int height = 0;
     std::vector<uint16_t> depth_out;
-    
-    zdepth::DepthResult result = _self->zddc.Decompress(compressed, width, height, depth_out);
+    zdepth::DepthResult result;
 
+    Py_BEGIN_ALLOW_THREADS
+    {
+        uint8_t const *begin = (uint8_t const*)data.buf;
+        std::vector<uint8_t> compressed(begin, begin + data.len);
+        std::lock_guard<std::mutex> guard(_self->lock);
+        result = _self->zddc.Decompress(compressed, width, height, depth_out);
+    }
+    Py_END_ALLOW_THREADS
+
+    PyBuffer_Release(&data);
     return Py_BuildValue("iiiy#", (int)result, width, height, depth_out.data(), depth_out.size() * sizeof(uint16_t));
 }
 
+// Rejects anything that is not a C-contiguous buffer of 16-bit items
+static bool IsUInt16Buffer(Py_buffer const &view)
+{
+    if (view.itemsize != sizeof(uint16_t)) {return false;}
+    if (view.format == NULL) {return true;}
+    char const *format = view.format;
+    if (*format == '<' || *format == '=' || *format == '@') {format++;}
+    return format[0] == 'H' && format[1] == '\0';
+}
+
+// One DecompressInto call. The buffers are acquired and validated with the GIL
+// held, the decode itself runs without it. The job owns a reference to the
+// compressor and the buffer exports keep the payload and out objects alive, so
+// the caller may drop or mutate its job list meanwhile.
+struct DecodeJob
+{
+    DepthCompressor *compressor = NULL;
+    Py_buffer payload = {};
+    Py_buffer out = {};
+    int width = 0;
+    int height = 0;
+    zdepth::DepthResult result = zdepth::DepthResult::Success;
+};
+
+static bool DecodeJob_Acquire(DecodeJob &job, DepthCompressor *compressor, PyObject *payload_obj, PyObject *out_obj)
+{
+    if (PyObject_GetBuffer(payload_obj, &job.payload, PyBUF_SIMPLE) < 0) {return false;}
+    if (PyObject_GetBuffer(out_obj, &job.out, PyBUF_WRITABLE | PyBUF_FORMAT | PyBUF_C_CONTIGUOUS) < 0)
+    {
+        PyBuffer_Release(&job.payload);
+        return false;
+    }
+
+    if (!IsUInt16Buffer(job.out))
+    {
+        PyBuffer_Release(&job.out);
+        PyBuffer_Release(&job.payload);
+        PyErr_SetString(PyExc_TypeError, "out must be a C-contiguous uint16 buffer");
+        return false;
+    }
+
+    // Validate the output size before touching the decoder so that a rejected
+    // call does not advance the P-frame sequence
+    job.result = zdepth::DepthCompressor::PeekDimensions((uint8_t const*)job.payload.buf, (size_t)job.payload.len, job.width, job.height);
+    size_t needed = (size_t)job.width * (size_t)job.height * sizeof(uint16_t);
+    if (job.result == zdepth::DepthResult::Success && (size_t)job.out.len < needed)
+    {
+        PyErr_Format(PyExc_ValueError, "out holds %zd bytes but a %dx%d frame needs %zu", job.out.len, job.width, job.height, needed);
+        PyBuffer_Release(&job.out);
+        PyBuffer_Release(&job.payload);
+        return false;
+    }
+    Py_INCREF((PyObject*)compressor);
+    job.compressor = compressor;
+    return true;
+}
+
+// Must be called without the GIL
+static void DecodeJob_Run(DecodeJob &job)
+{
+    if (job.result != zdepth::DepthResult::Success) {return;}
+    std::lock_guard<std::mutex> guard(job.compressor->lock);
+    job.result = job.compressor->zddc.Decompress((uint8_t const*)job.payload.buf, (size_t)job.payload.len, job.width, job.height, (uint16_t*)job.out.buf);
+}
+
+static void DecodeJob_Release(DecodeJob &job)
+{
+    PyBuffer_Release(&job.out);
+    PyBuffer_Release(&job.payload);
+    Py_CLEAR(job.compressor);
+}
+
+// Persistent worker threads for decompress_batch. The calling thread claims jobs
+// as well, so a batch always completes even if no worker picks it up.
+class DecodePool
+{
+public:
+    static DecodePool &Instance()
+    {
+        // Intentionally leaked: the workers are detached and outlive interpreter teardown
+        static DecodePool *pool = new DecodePool();
+        return *pool;
+    }
+
+    void Run(std::vector<DecodeJob> &jobs)
+    {
+        struct Batch
+        {
+            std::vector<DecodeJob> *jobs;
+            std::atomic<size_t> next{0};
+            std::atomic<size_t> done{0};
+            std::mutex lock;
+            std::condition_variable finished;
+        };
+
+        auto batch = std::make_shared<Batch>();
+        batch->jobs = &jobs;
+        size_t const count = jobs.size();
+
+        auto drain = [batch, count]()
+        {
+            for (size_t i = batch->next++; i < count; i = batch->next++)
+            {
+                DecodeJob_Run((*batch->jobs)[i]);
+                if (++batch->done == count)
+                {
+                    std::lock_guard<std::mutex> guard(batch->lock);
+                    batch->finished.notify_all();
+                }
+            }
+        };
+
+        size_t helpers = std::min(workers.size(), count > 0 ? count - 1 : 0);
+        if (helpers > 0)
+        {
+            std::lock_guard<std::mutex> guard(lock);
+            for (size_t i = 0; i < helpers; i++) {tasks.push_back(drain);}
+        }
+        wake.notify_all();
+
+        drain();
+
+        std::unique_lock<std::mutex> guard(batch->lock);
+        batch->finished.wait(guard, [&]() {return batch->done.load() == count;});
+    }
+
+private:
+    DecodePool()
+    {
+        unsigned cores = std::thread::hardware_concurrency();
+        unsigned worker_count = cores > 1 ? std::min(cores - 1, 15u) : 0;
+        for (unsigned i = 0; i < worker_count; i++)
+        {
+            workers.emplace_back([this]() {Work();});
+            workers.back().detach();
+        }
+    }
+
+    void Work()
+    {
+        for (;;)
+        {
+            std::function<void()> task;
+            {
+                std::unique_lock<std::mutex> guard(lock);
+                wake.wait(guard, [this]() {return !tasks.empty();});
+                task = std::move(tasks.front());
+                tasks.pop_front();
+            }
+            task();
+        }
+    }
+
+    std::mutex lock;
+    std::condition_variable wake;
+    std::deque<std::function<void()>> tasks;
+    std::vector<std::thread> workers;
+};
+
+PyObject *DepthCompressor_PeekDimensions(PyObject *self, PyObject *args)
+{
+    Py_buffer payload;
+
+    if (!PyArg_ParseTuple(args, "y*", &payload)) {return NULL;}
+
+    int width = 0;
+    int height = 0;
+    zdepth::DepthResult result = zdepth::DepthCompressor::PeekDimensions((uint8_t const*)payload.buf, (size_t)payload.len, width, height);
+
+    PyBuffer_Release(&payload);
+    return Py_BuildValue("iii", (int)result, width, height);
+}
+
+PyObject *DepthCompressor_DecompressInto(PyObject *self, PyObject *args)
+{
+    PyObject *payload_obj;
+    PyObject *out_obj;
+
+    if (!PyArg_ParseTuple(args, "OO", &payload_obj, &out_obj)) {return NULL;}
+
+    DecodeJob job;
+    if (!DecodeJob_Acquire(job, reinterpret_cast<DepthCompressor*>(self), payload_obj, out_obj)) {return NULL;}
+
+    Py_BEGIN_ALLOW_THREADS
+    DecodeJob_Run(job);
+    Py_END_ALLOW_THREADS
+
+    DecodeJob_Release(job);
+    return Py_BuildValue("iii", (int)job.result, job.width, job.height);
+}
+
+PyObject *pyzdepth_decompress_batch(PyObject *module, PyObject *args)
+{
+    PyObject *jobs_obj;
+
+    if (!PyArg_ParseTuple(args, "O", &jobs_obj)) {return NULL;}
+
+    PyObject *items = PySequence_Fast(jobs_obj, "decompress_batch expects a sequence of (compressor, payload, out) tuples");
+    if (items == NULL) {return NULL;}
+
+    Py_ssize_t count = PySequence_Fast_GET_SIZE(items);
+    std::vector<DecodeJob> jobs;
+    jobs.reserve((size_t)count);
+    std::unordered_set<DepthCompressor*> seen;
+    bool ok = true;
+
+    for (Py_ssize_t i = 0; i < count && ok; i++)
+    {
+        PyObject *item = PySequence_Fast_GET_ITEM(items, i);
+        PyObject *compressor_obj;
+        PyObject *payload_obj;
+        PyObject *out_obj;
+        if (!PyTuple_Check(item))
+        {
+            PyErr_SetString(PyExc_TypeError, "decompress_batch expects (compressor, payload, out) tuples");
+            ok = false;
+            break;
+        }
+        if (!PyArg_ParseTuple(item, "O!OO;decompress_batch expects (compressor, payload, out) tuples", DepthCompressor_type, &compressor_obj, &payload_obj, &out_obj))
+        {
+            ok = false;
+            break;
+        }
+
+        DepthCompressor *compressor = reinterpret_cast<DepthCompressor*>(compressor_obj);
+        if (!seen.insert(compressor).second)
+        {
+            // Frames of one stream depend on each other, they cannot be decoded in parallel
+            PyErr_SetString(PyExc_ValueError, "each DepthCompressor may appear only once per batch");
+            ok = false;
+            break;
+        }
+
+        jobs.emplace_back();
+        if (!DecodeJob_Acquire(jobs.back(), compressor, payload_obj, out_obj))
+        {
+            jobs.pop_back();
+            ok = false;
+        }
+    }
+
+    PyObject *results = NULL;
+    if (ok)
+    {
+        Py_BEGIN_ALLOW_THREADS
+        DecodePool::Instance().Run(jobs);
+        Py_END_ALLOW_THREADS
+
+        results = PyList_New(count);
+        for (Py_ssize_t i = 0; results != NULL && i < count; i++)
+        {
+            PyObject *result = Py_BuildValue("iii", (int)jobs[i].result, jobs[i].width, jobs[i].height);
+            if (result == NULL) {Py_CLEAR(results); break;}
+            PyList_SET_ITEM(results, i, result);
+        }
+    }
+
+    for (DecodeJob &job : jobs) {DecodeJob_Release(job);}
+    Py_DECREF(items);
+    return results;
+}
+
 static PyMethodDef DepthCompressor_methods[] =
 {
     {"Compress",   (PyCFunction)DepthCompressor_Compress,   METH_VARARGS, PyDoc_STR("Compress uint16 depth frame")},
     {"Decompress", (PyCFunction)DepthCompressor_Decompress, METH_VARARGS, PyDoc_STR("Decompress uint16 depth frame")},
+    {"DecompressInto", (PyCFunction)DepthCompressor_DecompressInto, METH_VARARGS, PyDoc_STR("Decompress uint16 depth frame into a writable uint16 buffer")},
+    {"PeekDimensions", (PyCFunction)DepthCompressor_PeekDimensions, METH_VARARGS, PyDoc_STR("Read width and height from a compressed frame header")},
     {NULL, NULL, 0, NULL}
 };
 
@@ -91,13 +400,19 @@ static PyType_Spec DepthCompressor_spec =
     DepthCompressor_slots
 };
 
+static PyMethodDef pyzdepth_methods[] =
+{
+    {"decompress_batch", (PyCFunction)pyzdepth_decompress_batch, METH_VARARGS, PyDoc_STR("Decompress a list of (compressor, payload, out) jobs in parallel, returns a list of (result, width, height)")},
+    {NULL, NULL, 0, NULL}
+};
+
 PyModuleDef DepthCompressor_module =
 {
     PyModuleDef_HEAD_INIT,
     "pyzdepth",
     "Wrapper for Zdepth",
     -1,
-    NULL,
+    pyzdepth_methods,
     NULL,
     NULL,
     NULL,
@@ -107,9 +422,15 @@ PyModuleDef DepthCompressor_module =
 PyMODINIT_FUNC PyInit_pyzdepth()
 {
     PyObject* module = PyModule_Create(&DepthCompressor_module);
+    if (module == NULL) {return NULL;}
+#ifdef Py_GIL_DISABLED
+    // All codec state lives in DepthCompressor instances guarded by their own lock
+    PyUnstable_Module_SetGIL(module, Py_MOD_GIL_NOT_USED);
+#endif
     PyObject* depthcompressor = PyType_FromSpec(&DepthCompressor_spec);
     if (depthcompressor == NULL) {return NULL;}
     Py_INCREF(depthcompressor);
+    DepthCompressor_type = (PyTypeObject*)depthcompressor;
     if (PyModule_AddObject(module, "DepthCompressor", depthcompressor) < 0)
     {
         Py_DECREF(depthcompressor);